@@ -0,0 +1,459 @@
+# backend/benchmarks/run_benchmarks.py
+"""
+Benchmarks for the scoring pipeline and the storage layer
+
+Each benchmark times a hot path repeatedly and reports throughput and
+percentile latency. Every run also times a fixed reference workload, and
+each median is stored relative to the reference's median, so a baseline
+recorded on one machine can be compared on another. The run fails when a
+relative median regresses by more than the threshold.
+
+Usage:
+    python -m backend.benchmarks.run_benchmarks
+    python -m backend.benchmarks.run_benchmarks --only normalize
+    python -m backend.benchmarks.run_benchmarks --update-baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Allowed slowdown of the median latency before a benchmark fails
+DEFAULT_THRESHOLD = 0.25
+
+BENCHMARKS = {}
+
+# Name of the fixed workload every median is measured relative to
+REFERENCE = "reference"
+
+
+def benchmark(name, repeat=100, warmup=3, threshold=None):
+    """
+    Register a setup function returning the callable to time
+
+    Args:
+        name: Benchmark name
+        repeat: Timed calls
+        warmup: Untimed calls before timing
+        threshold: Allowed median slowdown overriding the global threshold,
+            for benchmarks with inherent jitter such as HTTP round trips
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = {
+            "setup": setup,
+            "repeat": repeat,
+            "warmup": warmup,
+            "threshold": threshold,
+        }
+        return setup
+
+    return register
+
+
+def measure(func, repeat=100, warmup=3):
+    """
+    Time func repeatedly
+
+    Returns:
+        dict: Calls, throughput per second and min/p50/p95/p99 latency in ms
+    """
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+
+    durations_ms = np.array(durations) * 1000
+    return {
+        "calls": repeat,
+        "throughput": round(repeat / sum(durations), 2),
+        "min_ms": round(float(durations_ms.min()), 4),
+        "p50_ms": round(float(np.percentile(durations_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(durations_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(durations_ms, 99)), 4),
+    }
+
+
+def reference_workload():
+    """Fixed pure-Python work (building, sorting and JSON round-tripping
+    dicts) that tracks the speed of the machine and interpreter"""
+    rows = [
+        {
+            "date": f"2024-{day % 12 + 1:02d}-{day % 28 + 1:02d}",
+            "score": day * 7919 % 1000 / 10,
+        }
+        for day in range(2000)
+    ]
+    rows.sort(key=lambda row: (row["score"], row["date"]))
+    return json.loads(json.dumps(rows))
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Find benchmarks whose median relative to the reference workload
+    regressed beyond the threshold, or beyond their own threshold when
+    that is larger
+
+    Returns:
+        list: Dicts with name, baseline and current relative median and
+        their ratio
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if name == REFERENCE or not previous or "relative" not in previous:
+            continue
+        spec = BENCHMARKS.get(name, {})
+        allowed = max(threshold, spec.get("threshold") or 0)
+        ratio = result["relative"] / previous["relative"]
+        if ratio > 1 + allowed:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline_relative": previous["relative"],
+                    "relative": result["relative"],
+                    "ratio": round(ratio, 2),
+                }
+            )
+    return regressions
+
+
+class BenchmarkContext:
+    """Shared fixtures: sample data, a temp directory and a local PostgREST"""
+
+    def __init__(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="agci-bench-")
+        self._server = None
+        self._generator = None
+        self._history = None
+        self._supabase = None
+
+        # Keep the generator's storage local and in memory
+        self._environ = {
+            name: os.environ.get(name)
+            for name in ["AGCI_STORAGE_BACKEND", "AGCI_SQLITE_PATH"]
+        }
+        os.environ["AGCI_STORAGE_BACKEND"] = "sqlite"
+        os.environ["AGCI_SQLITE_PATH"] = ":memory:"
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            from backend.pipeline.historic_data_generator import (
+                SimplifiedHistoricDataGenerator,
+            )
+
+            self._generator = SimplifiedHistoricDataGenerator(
+                reference_date=datetime(2025, 1, 1)
+            )
+        return self._generator
+
+    def raw_data(self):
+        return self.generator.generate_data_for_date(datetime(2024, 6, 1))
+
+    def generate_history(self, days=365):
+        start = datetime(2024, 1, 1)
+        return self.generator.generate_historic_dataset(
+            start, end_date=start + timedelta(days=days - 1)
+        )
+
+    @property
+    def history(self):
+        """One generated year, shared by the save, load and write benchmarks"""
+        if self._history is None:
+            self._history = self.generate_history(365)
+        return self._history
+
+    def supabase(self):
+        """SupabaseManager writing to the local PostgREST server"""
+        from supabase import create_client
+
+        from backend.storage.local_postgrest import (
+            LOCAL_API_KEY,
+            LocalPostgRESTServer,
+        )
+        from backend.storage.supabase_client import SupabaseManager
+
+        db = SupabaseManager()
+        if self._server is None:
+            self._server = LocalPostgRESTServer().start()
+            # SupabaseManager is a singleton, put its client back afterwards
+            self._supabase = (db, db.client)
+            db.client = create_client(self._server.url, LOCAL_API_KEY)
+        return db
+
+    def close(self):
+        if self._server is not None:
+            self._server.stop()
+            db, client = self._supabase
+            db.client = client
+        for name, value in self._environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+@benchmark("calculate_index", repeat=200)
+def _calculate_index(ctx):
+    from backend.pipeline.green_city_index import GreenCityIndex
+
+    gci = GreenCityIndex()
+    raw_data = ctx.raw_data()
+    return lambda: gci.calculate_index(raw_data)
+
+
+def _normalize(dimension, collector_path, class_name):
+    def setup(ctx):
+        import importlib
+
+        collector = getattr(importlib.import_module(collector_path), class_name)()
+        metrics = ctx.raw_data()[dimension]
+        return lambda: collector.normalize_metrics(metrics)
+
+    return setup
+
+
+for _dimension, _module, _class in [
+    ("air", "backend.collectors.air_quality", "AirQualityCollector"),
+    ("water", "backend.collectors.water_management", "WaterManagementSimulator"),
+    (
+        "nature",
+        "backend.collectors.nature_biodiversity",
+        "NatureBiodiversitySimulator",
+    ),
+    ("waste", "backend.collectors.waste_circular_economy", "WasteSimulator"),
+    ("noise", "backend.collectors.noise_pollution", "NoiseSimulator"),
+]:
+    benchmark(f"normalize_metrics.{_dimension}", repeat=500)(
+        _normalize(_dimension, _module, _class)
+    )
+
+
+@benchmark("generate_data_for_date", repeat=500)
+def _generate_data_for_date(ctx):
+    generator = ctx.generator
+    return lambda: generator.generate_data_for_date(datetime(2024, 6, 1))
+
+
+@benchmark("generate_historic_dataset.365d", repeat=10, warmup=1)
+def _generate_historic_dataset(ctx):
+    return lambda: ctx.generate_history(365)
+
+
+@benchmark("save_to_json.365d", repeat=10, warmup=1)
+def _save_to_json(ctx):
+    history = ctx.history
+    path = os.path.join(ctx.tmpdir, "history.json")
+    return lambda: ctx.generator.save_to_json(history, path)
+
+
+@benchmark("load_json.365d", repeat=20, warmup=1)
+def _load_json(ctx):
+    from backend.pipeline.load_historic_data import iter_json_records
+
+    path = os.path.join(ctx.tmpdir, "history_load.json")
+    ctx.generator.save_to_json(ctx.history, path)
+    return lambda: list(iter_json_records(path))
+
+
+@benchmark("compute_rollups.month.365d", repeat=20, warmup=1)
+def _compute_rollups(ctx):
+    from backend.storage.rollups import compute_rollups
+
+    rows = [
+        dict(
+            date=index["date"],
+            overall_score=index["overall_score"],
+            **{
+                f"{dim}_score": score
+                for dim, score in index["dimension_scores"].items()
+            },
+        )
+        for index in ctx.history
+    ]
+    return lambda: compute_rollups(rows, "month")
+
+
+@benchmark("supabase.store_raw_metrics_bulk", repeat=200, threshold=0.5)
+def _store_raw_metrics_bulk(ctx):
+    db = ctx.supabase()
+    rows = [
+        {
+            "dimension": dimension,
+            "metric_name": name,
+            "value": value,
+            "unit": "",
+            "source": "Simulated",
+        }
+        for dimension, metrics in ctx.raw_data().items()
+        if dimension != "timestamp"
+        for name, value in metrics.items()
+    ]
+    return lambda: db.store_raw_metrics_bulk(rows)
+
+
+@benchmark("supabase.store_index", repeat=200, threshold=0.5)
+def _store_index(ctx):
+    from backend.pipeline.index_calculator import IndexCalculator
+
+    db = ctx.supabase()
+    index = IndexCalculator().compute(ctx.raw_data(), date="2024-06-01")
+    return lambda: db.store_index(
+        index["date"], index["overall_score"], index["dimension_scores"], 70.0
+    )
+
+
+@benchmark("supabase.store_indexes_bulk.365d", repeat=20, warmup=1, threshold=0.5)
+def _store_indexes_bulk(ctx):
+    db = ctx.supabase()
+    indexes = [
+        {
+            "date": index["date"],
+            "overall_score": index["overall_score"],
+            "dimension_scores": index["dimension_scores"],
+            "target_score": 70.0,
+        }
+        for index in ctx.history
+    ]
+    return lambda: db.store_indexes_bulk(indexes)
+
+
+def run(names=None, repeat=None, warmup=None):
+    """
+    Run the selected benchmarks
+
+    Args:
+        names: Substrings selecting benchmarks by name (default: all)
+        repeat: Timed calls of every benchmark (default: its own)
+        warmup: Untimed calls of every benchmark (default: its own)
+
+    Returns:
+        dict: Benchmark name -> measurement, including the reference
+        workload; every measurement has its p50 relative to the
+        reference's p50
+    """
+    ctx = BenchmarkContext()
+    results = {REFERENCE: measure(reference_workload, repeat=50, warmup=3)}
+    results[REFERENCE]["relative"] = 1.0
+    try:
+        for name, spec in BENCHMARKS.items():
+            if names and not any(part in name for part in names):
+                continue
+            # The pipeline prints progress, keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                func = spec["setup"](ctx)
+                results[name] = measure(
+                    func,
+                    spec["repeat"] if repeat is None else repeat,
+                    spec["warmup"] if warmup is None else warmup,
+                )
+            result = results[name]
+            # Four significant digits, microsecond benchmarks are far below 1
+            result["relative"] = float(
+                f"{result['p50_ms'] / results[REFERENCE]['p50_ms']:.4g}"
+            )
+            print(
+                f"{name:<36} {result['throughput']:>10.1f}/s  "
+                f"p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  "
+                f"p99 {result['p99_ms']:>9.3f} ms  {result['relative']:>9.4g}x ref"
+            )
+    finally:
+        ctx.close()
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Merge results into the baseline file"""
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "machine": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "processor": platform.machine(),
+                },
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+                "results": dict(sorted(baseline.items())),
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the scoring pipeline and storage layer"
+    )
+    parser.add_argument(
+        "--only", nargs="*", default=None, help="Run benchmarks whose name contains"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("AGCI_BENCH_THRESHOLD", DEFAULT_THRESHOLD)),
+        help="Allowed slowdown of the relative median, e.g. 0.25 for 25%%",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the new baseline",
+    )
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline updated in {args.baseline}")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['name']}: p50 {regression['relative']}x "
+            f"reference vs baseline {regression['baseline_relative']}x "
+            f"({regression['ratio']}x)"
+        )
+    if regressions:
+        return 1
+
+    print(f"No benchmark slower than {args.threshold:.0%} over baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,234 @@
 # air_quality.py
+import asyncio
+import os
 import requests
+import httpx
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from backend.collectors.http_cache import ResponseCache
+from backend.collectors.normalization import normalize_record
+
+# Approximate centre points of Aarhus districts
+AARHUS_DISTRICTS = {
+    "Midtbyen": (56.1567, 10.2108),
+    "Trøjborg": (56.1718, 10.2116),
+    "Frederiksbjerg": (56.1458, 10.2045),
+    "Aarhus V": (56.1640, 10.1660),
+    "Aarhus N": (56.1920, 10.1770),
+    "Risskov": (56.1930, 10.2350),
+    "Viby": (56.1290, 10.1620),
+    "Højbjerg": (56.1150, 10.2000),
+    "Brabrand": (56.1550, 10.1050),
+}
+
+# Hourly variables requested for grid fetches and their metric names
+GRID_HOURLY_METRICS = {
+    "pm10": "pm10",
+    "pm2_5": "pm2_5",
+    "nitrogen_dioxide": "no2",
+    "european_aqi": "european_aqi",
+}
 
 
 class AirQualityCollector:
-    def __init__(self, latitude=56.1567, longitude=10.2108):
+    def __init__(
+        self,
+        latitude=56.1567,
+        longitude=10.2108,
+        timeout=10.0,
+        max_connections=10,
+        max_retries=3,
+        backoff=0.5,
+        cache=None,
+    ):
+        """
+        Args:
+            latitude, longitude: Default location to fetch
+            timeout: Seconds before an HTTP request is abandoned
+            max_connections: Upper bound on concurrent pooled connections for
+                the async client
+            max_retries: Retries after a failed async request
+            backoff: Initial retry delay in seconds, doubled after each retry
+            cache: A ResponseCache instance, True for a ResponseCache at its
+                default path, False to always hit the API, or None to cache
+                only when AGCI_HTTP_CACHE_PATH is set
+        """
         self.latitude = latitude
         self.longitude = longitude
         self.base_url = "https://air-quality-api.open-meteo.com/v1/air-quality"
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
 
-    def fetch_current_data(self):
-        """Fetch today's air quality data"""
-        today = datetime.now().strftime("%Y-%m-%d")
+        # Reuse connections across synchronous calls
+        self.session = requests.Session()
+
+        if cache is None:
+            cache = bool(os.getenv("AGCI_HTTP_CACHE_PATH"))
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache or None
 
-        params = {
-            "latitude": self.latitude,
-            "longitude": self.longitude,
+    def _build_params(
+        self, latitude=None, longitude=None, start_date=None, end_date=None
+    ):
+        """Build query parameters for one location and date range"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        return {
+            "latitude": self.latitude if latitude is None else latitude,
+            "longitude": self.longitude if longitude is None else longitude,
             "hourly": ["pm10", "pm2_5", "nitrogen_dioxide"],
             "current": "european_aqi",
-            "start_date": today,
-            "end_date": today,
+            "start_date": start_date or today,
+            "end_date": end_date or start_date or today,
         }
 
-        response = requests.get(self.base_url, params=params)
+    def fetch_current_data(self):
+        """Fetch today's air quality data"""
+        params = self._build_params()
+
+        data = self._get_json(params)
+
+        return self._process_response(data)
+
+    def _get_json(self, params):
+        """GET the endpoint over the shared session and decode the JSON body,
+        raising requests.HTTPError for error responses"""
+        if self.cache:
+            cached = self.cache.get(self.base_url, params)
+            if cached is not None:
+                return cached
+
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        # Error bodies like {"error": true, "reason": ...} must not be
+        # processed as empty data
+        response.raise_for_status()
         data = response.json()
+        if isinstance(data, dict) and data.get("error"):
+            raise requests.HTTPError(
+                f"Air quality API error: {data.get('reason')}", response=response
+            )
+
+        if self.cache:
+            self.cache.set(self.base_url, params, data)
+        return data
+
+    def fetch_grid(
+        self, locations=None, start_date=None, end_date=None, locations_per_request=50
+    ):
+        """
+        Fetch daily mean air quality for many locations over a date range
+
+        The API accepts comma-separated coordinate lists, so each request
+        covers up to locations_per_request points for the whole date range.
+
+        Args:
+            locations: Dict of name -> (latitude, longitude)
+                (default: AARHUS_DISTRICTS)
+            start_date: First date (YYYY-MM-DD, default: today)
+            end_date: Last date (YYYY-MM-DD, default: start_date)
+            locations_per_request: Maximum coordinates sent in one request
+
+        Returns:
+            DataFrame: One row per location and date with pm10, pm2_5, no2
+            and european_aqi daily means
+        """
+        locations = locations or AARHUS_DISTRICTS
+        names = list(locations)
+
+        responses = []
+        for start in range(0, len(names), locations_per_request):
+            chunk = names[start : start + locations_per_request]
+            params = {
+                "latitude": ",".join(str(locations[name][0]) for name in chunk),
+                "longitude": ",".join(str(locations[name][1]) for name in chunk),
+                "hourly": ",".join(GRID_HOURLY_METRICS),
+                "start_date": start_date or datetime.now().strftime("%Y-%m-%d"),
+                "end_date": end_date
+                or start_date
+                or datetime.now().strftime("%Y-%m-%d"),
+            }
+            data = self._get_json(params)
+            # A single coordinate returns an object, several return a list
+            responses.extend(data if isinstance(data, list) else [data])
+
+        return self.aggregate_daily(responses, names)
+
+    def fetch_history(self, start_date, end_date, days_per_request=92):
+        """
+        Fetch daily mean air quality at this location for a past date range
+
+        The range is split into a few large date-range requests instead of
+        one request per day.
 
-        # Process the response
+        Args:
+            start_date: First date (YYYY-MM-DD)
+            end_date: Last date (YYYY-MM-DD)
+            days_per_request: Maximum number of days covered by one request
+
+        Returns:
+            dict: Date string -> dict of pm10, pm2_5, no2 and european_aqi
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        location = {"history": (self.latitude, self.longitude)}
+
+        frames = []
+        while start <= end:
+            chunk_end = min(end, start + timedelta(days=days_per_request - 1))
+            frames.append(
+                self.fetch_grid(
+                    location,
+                    start.strftime("%Y-%m-%d"),
+                    chunk_end.strftime("%Y-%m-%d"),
+                )
+            )
+            start = chunk_end + timedelta(days=1)
+
+        daily = pd.concat(frames, ignore_index=True).drop(columns="location")
+        daily["date"] = pd.to_datetime(daily["date"]).dt.strftime("%Y-%m-%d")
+        # Days without any hourly values become None like a missing API value
+        daily = daily.astype(object).where(daily.notna(), None)
+        return {row.pop("date"): row for row in daily.to_dict("records")}
+
+    def aggregate_daily(self, responses, names):
+        """
+        Aggregate hourly API responses into per-location daily means
+
+        Args:
+            responses: List of API response dicts, one per location
+            names: Location name for each response
+
+        Returns:
+            DataFrame: Columns location, date and one column per metric
+        """
+        frames = []
+        for name, data in zip(names, responses):
+            hourly = data.get("hourly", {})
+            times = np.asarray(hourly.get("time", []), dtype="datetime64[m]")
+            frame = {
+                "location": np.full(len(times), name, dtype=object),
+                "date": times.astype("datetime64[D]"),
+            }
+            for variable, metric in GRID_HOURLY_METRICS.items():
+                # Missing hours arrive as null and are skipped by the mean
+                frame[metric] = np.asarray(
+                    hourly.get(variable, [None] * len(times)), dtype=float
+                )
+            frames.append(pd.DataFrame(frame))
+
+        if not frames:
+            return pd.DataFrame(
+                columns=["location", "date", *GRID_HOURLY_METRICS.values()]
+            )
+
+        hourly = pd.concat(frames, ignore_index=True)
+        return hourly.groupby(["location", "date"], sort=False).mean().reset_index()
+
+    def _process_response(self, data):
+        """Reduce an API response to daily averages and the current AQI"""
         current_data = {
             "pm10": self._get_daily_average(data, "pm10"),
             "pm2_5": self._get_daily_average(data, "pm2_5"),
@@ -36,6 +238,86 @@ class AirQualityCollector:
 
         return current_data
 
+    def _create_async_client(self, max_connections=None):
+        """Create a pooled async HTTP client"""
+        max_connections = max_connections or self.max_connections
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def _get_json_async(self, client, params):
+        """GET the endpoint, retrying transport errors, 429 and 5xx with backoff"""
+        if self.cache:
+            cached = self.cache.get(self.base_url, params)
+            if cached is not None:
+                return cached
+
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.get(self.base_url, params=params)
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                    data = response.json()
+                    if self.cache:
+                        self.cache.set(self.base_url, params, data)
+                    return data
+                error = httpx.HTTPStatusError(
+                    f"Server returned {response.status_code}",
+                    request=response.request,
+                    response=response,
+                )
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    async def fetch_current_data_async(self, client=None):
+        """Fetch today's air quality data without blocking the event loop"""
+        if client is not None:
+            data = await self._get_json_async(client, self._build_params())
+            return self._process_response(data)
+
+        async with self._create_async_client() as client:
+            data = await self._get_json_async(client, self._build_params())
+        return self._process_response(data)
+
+    async def fetch_many_async(self, queries, concurrency=None):
+        """
+        Fetch many locations and date ranges over one connection pool
+
+        Args:
+            queries: List of dicts with any of latitude, longitude, start_date
+                and end_date (defaults: this collector's location, today)
+            concurrency: Maximum requests in flight (default: max_connections)
+
+        Returns:
+            list: Processed metrics per query, in the order given. A query
+            that still fails after all retries yields the exception instead.
+        """
+        concurrency = concurrency or self.max_connections
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with self._create_async_client(concurrency) as client:
+
+            async def fetch(query):
+                async with semaphore:
+                    data = await self._get_json_async(
+                        client, self._build_params(**query)
+                    )
+                return self._process_response(data)
+
+            return await asyncio.gather(
+                *(fetch(query) for query in queries), return_exceptions=True
+            )
+
     def _get_daily_average(self, data, metric):
         """Calculate daily average for a metric from hourly data"""
         if "hourly" not in data or f"{metric}" not in data["hourly"]:
@@ -45,29 +327,5 @@ class AirQualityCollector:
         return sum(values) / len(values) if values else None
 
     def normalize_metrics(self, metrics):
-        """Convert raw metrics to 0-100 scores"""
-        normalized = {}
-
-        # PM2.5 normalization (WHO guideline: 5µg/m³, EU limit: 25µg/m³)
-        if "pm2_5" in metrics and metrics["pm2_5"] is not None:
-            pm25 = metrics["pm2_5"]
-            # 5 or below = 100, 25 or above = 0, linear in between
-            normalized["pm2_5"] = max(0, min(100, 100 - ((pm25 - 5) * 5)))
-
-        # PM10 normalization (WHO guideline: 15µg/m³, EU limit: 40µg/m³)
-        if "pm10" in metrics and metrics["pm10"] is not None:
-            pm10 = metrics["pm10"]
-            # 15 or below = 100, 40 or above = 0, linear in between
-            normalized["pm10"] = max(0, min(100, 100 - ((pm10 - 15) * 4)))
-
-        # NO2 normalization (WHO guideline: 10µg/m³, EU limit: 40µg/m³)
-        if "no2" in metrics and metrics["no2"] is not None:
-            no2 = metrics["no2"]
-            # 10 or below = 100, 40 or above = 0, linear in between
-            normalized["no2"] = max(0, min(100, 100 - ((no2 - 10) * 3.33)))
-
-        # Calculate overall air quality score (average of all normalized metrics)
-        if normalized:
-            normalized["overall"] = sum(normalized.values()) / len(normalized)
-
-        return normalized
+        """Convert raw metrics to 0-100 scores (see METRIC_SCALES["air"])"""
+        return normalize_record("air", metrics)
@@ -0,0 +1,160 @@
+# http_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a response is not in the cache"""
+
+
+class ResponseCache:
+    """
+    On-disk cache of decoded JSON API responses, stored in SQLite
+
+    Entries are keyed on the URL and query parameters. Responses whose
+    end_date lies in the past never change and are kept without expiry,
+    everything else expires after the endpoint's TTL. When the cache grows
+    beyond max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        default_ttl=3600,
+        endpoint_ttls=None,
+        max_bytes=50 * 1024 * 1024,
+        offline=None,
+    ):
+        """
+        Args:
+            path: SQLite file (default: AGCI_HTTP_CACHE_PATH or
+                .cache/http_cache.sqlite)
+            default_ttl: Seconds a response for a current date stays fresh
+            endpoint_ttls: Dict of URL -> TTL in seconds overriding default_ttl
+            max_bytes: Upper bound on the total size of cached bodies
+            offline: Only serve from the cache, raising CacheMissError on a miss
+                (default: AGCI_HTTP_CACHE_OFFLINE environment variable)
+        """
+        self.path = path or os.getenv(
+            "AGCI_HTTP_CACHE_PATH", os.path.join(".cache", "http_cache.sqlite")
+        )
+        self.default_ttl = default_ttl
+        self.endpoint_ttls = endpoint_ttls or {}
+        self.max_bytes = max_bytes
+        if offline is None:
+            offline = os.getenv("AGCI_HTTP_CACHE_OFFLINE", "") not in ("", "0")
+        self.offline = offline
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL
+                )
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                "ON responses (last_access)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection; one per operation keeps the cache thread-safe"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def make_key(self, url, params):
+        """Build a stable key from the URL and query parameters"""
+        canonical = json.dumps([url, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def ttl_for(self, url, params):
+        """
+        Return the TTL in seconds for a request, or None to cache forever
+
+        Requests ending before today cover finished days whose data is final.
+        """
+        end_date = (params or {}).get("end_date")
+        if end_date and str(end_date) < datetime.now().strftime("%Y-%m-%d"):
+            return None
+        return self.endpoint_ttls.get(url, self.default_ttl)
+
+    def get(self, url, params):
+        """
+        Return the cached response, or None if missing or expired
+
+        Raises:
+            CacheMissError: In offline mode when there is no usable entry
+        """
+        key = self.make_key(url, params)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and (row[1] is None or row[1] > now or self.offline):
+                conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+                )
+                return json.loads(row[0])
+
+        if self.offline:
+            raise CacheMissError(f"No cached response for {url} {params}")
+        return None
+
+    def set(self, url, params, data):
+        """Store a decoded response and evict old entries beyond max_bytes"""
+        body = json.dumps(data)
+        ttl = self.ttl_for(url, params)
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, body, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.make_key(url, params), url, body, len(body), expires_at, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        query = "SELECT COALESCE(SUM(size), 0) FROM responses"
+        total = conn.execute(query).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
@@ -3,6 +3,7 @@ import requests
 import random
 from datetime import datetime
 import math
+from backend.collectors.normalization import normalize_record
 
 
 class NatureBiodiversitySimulator:
@@ -75,28 +76,5 @@ class NatureBiodiversitySimulator:
         }
 
     def normalize_metrics(self, metrics):
-        """Convert raw metrics to 0-100 scores"""
-        normalized = {}
-
-        # Protected areas: 0=0%, 100=10%+
-        if "protected_area_pct" in metrics:
-            protected = metrics["protected_area_pct"]
-            normalized["protected_area_pct"] = max(0, min(100, protected * 10))
-
-        # Tree canopy: 0=5%, 100=30%
-        if "tree_canopy_pct" in metrics:
-            canopy = metrics["tree_canopy_pct"]
-            normalized["tree_canopy_pct"] = max(0, min(100, (canopy - 5) * 4))
-
-        # Bird species change: 0=-20%, 100=+20%
-        if "bird_species_change_pct" in metrics:
-            change = metrics["bird_species_change_pct"]
-            normalized["bird_species_change_pct"] = max(
-                0, min(100, (change + 20) * 2.5)
-            )
-
-        # Overall score
-        if normalized:
-            normalized["overall"] = sum(normalized.values()) / len(normalized)
-
-        return normalized
+        """Convert raw metrics to 0-100 scores (see METRIC_SCALES["nature"])"""
+        return normalize_record("nature", metrics)
@@ -2,6 +2,7 @@
 import random
 from datetime import datetime
 import requests
+from backend.collectors.normalization import normalize_record
 
 
 class NoiseSimulator:
@@ -104,26 +105,5 @@ class NoiseSimulator:
         }
 
     def normalize_metrics(self, metrics):
-        """Convert raw metrics to 0-100 scores"""
-        normalized = {}
-
-        # Population exposed to Lden ≥ 55 dB: 100=0%, 0=40%
-        if "lden_exposed_pct" in metrics:
-            lden = metrics["lden_exposed_pct"]
-            normalized["lden_exposed_pct"] = max(0, min(100, 100 - (lden * 2.5)))
-
-        # Population exposed to Lnight ≥ 50 dB: 100=0%, 0=40%
-        if "lnight_exposed_pct" in metrics:
-            lnight = metrics["lnight_exposed_pct"]
-            normalized["lnight_exposed_pct"] = max(0, min(100, 100 - (lnight * 2.5)))
-
-        # Population with high sleep disturbance: 100=0%, 0=25%
-        if "sleep_disturbed_pct" in metrics:
-            disturbed = metrics["sleep_disturbed_pct"]
-            normalized["sleep_disturbed_pct"] = max(0, min(100, 100 - (disturbed * 4)))
-
-        # Overall score
-        if normalized:
-            normalized["overall"] = sum(normalized.values()) / len(normalized)
-
-        return normalized
+        """Convert raw metrics to 0-100 scores (see METRIC_SCALES["noise"])"""
+        return normalize_record("noise", metrics)
@@ -0,0 +1,135 @@
+# normalization.py
+import numpy as np
+import pandas as pd
+
+LOWER_IS_BETTER = "lower_is_better"
+HIGHER_IS_BETTER = "higher_is_better"
+
+# Linear 0-100 scales for every scored metric
+# Format: metric: (lower bound, upper bound, direction, weight)
+# The better bound scores 100, the other bound 0, values are clamped in between
+METRIC_SCALES = {
+    "air": {
+        # WHO guideline: 5µg/m³, EU limit: 25µg/m³
+        "pm2_5": (5.0, 25.0, LOWER_IS_BETTER, 1.0),
+        # WHO guideline: 15µg/m³, EU limit: 40µg/m³
+        "pm10": (15.0, 40.0, LOWER_IS_BETTER, 1.0),
+        # WHO guideline: 10µg/m³, EU limit: 40µg/m³ (slope of 3.33 points per µg/m³)
+        "no2": (10.0, 10.0 + 100 / 3.33, LOWER_IS_BETTER, 1.0),
+    },
+    "water": {
+        # L/capita/day
+        "consumption": (100.0, 200.0, LOWER_IS_BETTER, 1.0),
+        # Infrastructure Leakage Index
+        "ili": (1.0, 6.0, LOWER_IS_BETTER, 1.0),
+        # % compliance with UWWTD
+        "treatment_compliance": (50.0, 100.0, HIGHER_IS_BETTER, 1.0),
+    },
+    "nature": {
+        "protected_area_pct": (0.0, 10.0, HIGHER_IS_BETTER, 1.0),
+        "tree_canopy_pct": (5.0, 30.0, HIGHER_IS_BETTER, 1.0),
+        "bird_species_change_pct": (-20.0, 20.0, HIGHER_IS_BETTER, 1.0),
+    },
+    "waste": {
+        # tonnes/year
+        "waste_per_capita": (0.2, 0.7, LOWER_IS_BETTER, 1.0),
+        # Score = actual %
+        "recycling_rate": (0.0, 100.0, HIGHER_IS_BETTER, 1.0),
+        "landfill_rate": (0.0, 60.0, LOWER_IS_BETTER, 1.0),
+    },
+    "noise": {
+        # % population exposed to Lden ≥ 55 dB
+        "lden_exposed_pct": (0.0, 40.0, LOWER_IS_BETTER, 1.0),
+        # % population exposed to Lnight ≥ 50 dB
+        "lnight_exposed_pct": (0.0, 40.0, LOWER_IS_BETTER, 1.0),
+        # % population with high sleep disturbance
+        "sleep_disturbed_pct": (0.0, 25.0, LOWER_IS_BETTER, 1.0),
+    },
+}
+
+
+def normalize_batch(dimension, data, scales=None):
+    """
+    Convert columns of raw metrics to 0-100 scores in one vectorized call
+
+    Args:
+        dimension: Dimension whose scales apply (air, water, etc.)
+        data: DataFrame or dict of metric name -> array-like of raw values,
+            one entry per day or location. Missing values (None/NaN) are
+            left out of the overall score.
+        scales: Scales shaped like METRIC_SCALES (default: METRIC_SCALES)
+
+    Returns:
+        Normalized scores plus an "overall" weighted average, as a DataFrame
+        when data is a DataFrame, otherwise a dict of numpy arrays. Metrics
+        without a column in data are left out.
+    """
+    scales = (scales or METRIC_SCALES)[dimension]
+    scores = {}
+    for metric, (lower, upper, direction, weight) in scales.items():
+        if metric not in data:
+            continue
+
+        values = np.asarray(data[metric], dtype=float)
+        if direction == LOWER_IS_BETTER:
+            score = 100 * (upper - values) / (upper - lower)
+        else:
+            score = 100 * (values - lower) / (upper - lower)
+        scores[metric] = np.clip(score, 0, 100)
+
+    if scores:
+        stacked = np.vstack(np.broadcast_arrays(*scores.values()))
+        weights = np.array([scales[metric][3] for metric in scores])[:, None]
+        present = ~np.isnan(stacked)
+        total_weight = (weights * present).sum(axis=0)
+        weighted = np.where(present, stacked * weights, 0).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores["overall"] = np.where(
+                total_weight > 0, weighted / total_weight, np.nan
+            )
+
+    if isinstance(data, pd.DataFrame):
+        return pd.DataFrame(scores, index=data.index)
+    return scores
+
+
+def normalize_record(dimension, metrics, scales=None):
+    """
+    Normalize a single dict of raw metrics
+
+    Scores the same way as normalize_batch, in plain Python: for one record
+    building numpy arrays costs far more than the arithmetic.
+
+    Args:
+        dimension: Dimension whose scales apply
+        metrics: Dict of metric name -> raw value
+        scales: Scales shaped like METRIC_SCALES (default: METRIC_SCALES)
+
+    Returns:
+        dict: Scores for the metrics present in metrics, plus "overall"
+    """
+    scales = (scales or METRIC_SCALES)[dimension]
+    normalized = {}
+    weighted = total_weight = 0.0
+    for metric, (lower, upper, direction, weight) in scales.items():
+        value = metrics.get(metric)
+        if value is None:
+            continue
+        value = float(value)
+        if value != value:  # NaN
+            continue
+
+        if direction == LOWER_IS_BETTER:
+            score = 100 * (upper - value) / (upper - lower)
+        else:
+            score = 100 * (value - lower) / (upper - lower)
+        score = min(max(score, 0.0), 100.0)
+        normalized[metric] = score
+        weighted += score * weight
+        total_weight += weight
+
+    if normalized:
+        normalized["overall"] = (
+            weighted / total_weight if total_weight > 0 else float("nan")
+        )
+    return normalized
@@ -1,6 +1,7 @@
 # waste_circular_economy.py
 import random
 from datetime import datetime, timedelta
+from backend.collectors.normalization import normalize_record
 
 
 class WasteSimulator:
@@ -75,28 +76,5 @@ class WasteSimulator:
         }
 
     def normalize_metrics(self, metrics):
-        """Convert raw metrics to 0-100 scores"""
-        normalized = {}
-
-        # Waste per capita: 100=0.2t, 0=0.7t, linear
-        if "waste_per_capita" in metrics:
-            waste = metrics["waste_per_capita"]
-            normalized["waste_per_capita"] = max(
-                0, min(100, 100 - ((waste - 0.2) * 200))
-            )
-
-        # Recycling rate: Score = actual %
-        if "recycling_rate" in metrics:
-            recycling = metrics["recycling_rate"]
-            normalized["recycling_rate"] = recycling
-
-        # Landfill rate: 100=0%, 0=60%, linear
-        if "landfill_rate" in metrics:
-            landfill = metrics["landfill_rate"]
-            normalized["landfill_rate"] = max(0, min(100, 100 - (landfill * 5 / 3)))
-
-        # Overall score
-        if normalized:
-            normalized["overall"] = sum(normalized.values()) / len(normalized)
-
-        return normalized
+        """Convert raw metrics to 0-100 scores (see METRIC_SCALES["waste"])"""
+        return normalize_record("waste", metrics)
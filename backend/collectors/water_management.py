@@ -3,6 +3,7 @@ import random
 from datetime import datetime
 import pandas as pd
 import numpy as np
+from backend.collectors.normalization import normalize_record
 
 
 class WaterManagementSimulator:
@@ -70,26 +71,5 @@ class WaterManagementSimulator:
         }
 
     def normalize_metrics(self, metrics):
-        """Convert raw metrics to 0-100 scores"""
-        normalized = {}
-
-        # Water consumption (L/capita/day): 100=100L, 0=300L, linear
-        if "consumption" in metrics:
-            consumption = metrics["consumption"]
-            normalized["consumption"] = max(0, min(100, 100 - (consumption - 100)))
-
-        # ILI: 100=1.0, 0=6.0, linear
-        if "ili" in metrics:
-            ili = metrics["ili"]
-            normalized["ili"] = max(0, min(100, 100 - (ili - 1.0) * 20))
-
-        # Treatment compliance: 100=100%, 0=50%, linear
-        if "treatment_compliance" in metrics:
-            compliance = metrics["treatment_compliance"]
-            normalized["treatment_compliance"] = max(0, min(100, (compliance - 50) * 2))
-
-        # Overall water score
-        if normalized:
-            normalized["overall"] = sum(normalized.values()) / len(normalized)
-
-        return normalized
+        """Convert raw metrics to 0-100 scores (see METRIC_SCALES["water"])"""
+        return normalize_record("water", metrics)
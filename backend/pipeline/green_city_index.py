@@ -1,130 +1,257 @@
 # green_city_index.py
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import nullcontext
 from datetime import datetime
 import json
 import os
+import time
 
-# Change this import
-from backend.storage.supabase_client import SupabaseManager
-
-# Fix these imports too
+from backend.pipeline.index_calculator import IndexCalculator
+from backend.pipeline.scoring_config import load_scoring_config
+from backend.pipeline.write_behind import WriteBehindWriter
 from backend.collectors.air_quality import AirQualityCollector
 from backend.collectors.water_management import WaterManagementSimulator
 from backend.collectors.nature_biodiversity import NatureBiodiversitySimulator
 from backend.collectors.waste_circular_economy import WasteSimulator
 from backend.collectors.noise_pollution import NoiseSimulator
 
+# Seconds to wait for a collector when collecting concurrently
+DEFAULT_COLLECTOR_TIMEOUT = 30
+
 
 class GreenCityIndex:
-    def __init__(self):
-        """Initialize the Green City Index calculator"""
+    def __init__(
+        self,
+        storage=None,
+        bulk_writes=True,
+        chunk_size=None,
+        concurrent=True,
+        collector_timeout=DEFAULT_COLLECTOR_TIMEOUT,
+        scoring_config=None,
+        instrumentation=None,
+        write_behind=False,
+        write_queue_size=1000,
+    ):
+        """
+        Initialize the Green City Index calculator
+
+        Args:
+            storage: Sink that persists raw data and index results, e.g.
+                SupabaseManager(). Without one nothing is stored.
+            bulk_writes: Store raw metrics and normalized scores with one
+                multi-row insert per table instead of one insert per metric
+            chunk_size: Maximum rows per bulk insert (default: the storage's)
+            concurrent: Run the dimension collectors in parallel threads
+            collector_timeout: Seconds to wait for each collector when running
+                concurrently, either one value or a dict keyed by dimension
+            scoring_config: ScoringConfig with the weights and metric scales
+                (default: load_scoring_config())
+            instrumentation: Optional Instrumentation recording the timing,
+                call counts, errors and bytes of stages, collectors, HTTP
+                requests and storage calls
+            write_behind: Hand writes to a background writer instead of
+                waiting for the storage, so collection and scoring never block
+                on database latency; call flush() to wait for the writes
+            write_queue_size: Writes the background writer holds before
+                handing over more rows blocks
+        """
         self.air_collector = AirQualityCollector()
         self.water_simulator = WaterManagementSimulator()
         self.nature_simulator = NatureBiodiversitySimulator()
         self.waste_simulator = WasteSimulator()
         self.noise_simulator = NoiseSimulator()
 
-        self.supabase = SupabaseManager()
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.track_session(self.air_collector.session, "http.air")
+            if storage is not None:
+                storage = instrumentation.instrument(storage, "storage")
 
-        # Dimension weights (equal by default)
-        self.weights = {
-            "air": 0.2,
-            "water": 0.2,
-            "nature": 0.2,
-            "waste": 0.2,
-            "noise": 0.2,
-        }
+        self.storage = storage
+        self.bulk_writes = bulk_writes
+        self.chunk_size = chunk_size
+        self.concurrent = concurrent
+        self.collector_timeout = collector_timeout
+
+        # Dimension weights (equal by default), shared with the calculator
+        self.scoring_config = scoring_config or load_scoring_config()
+        self.weights = dict(self.scoring_config.weights)
+        self.calculator = IndexCalculator(self.weights, self.scoring_config.scales)
+
+        self.writer = None
+        if write_behind and storage is not None:
+            self.writer = WriteBehindWriter(
+                self.storage, max_queue=write_queue_size, chunk_size=chunk_size
+            )
 
-    def collect_all_data(self):
-        """Collect data from all dimensions"""
+    def collect_all_data(self, concurrent=None, dimensions=None):
+        """
+        Collect data from all dimensions
+
+        Args:
+            concurrent: Override the instance's concurrent setting
+            dimensions: Only collect these dimensions (default: all)
+
+        Returns:
+            dict: Raw metrics per dimension. A collector that fails, or
+            exceeds its timeout when collecting concurrently, is left out
+            and the other dimensions are still returned.
+        """
         print("Collecting Green City Index data...")
 
-        # Collect raw data
-        raw_data = {
-            "air": self.air_collector.fetch_current_data(),
-            "water": self.water_simulator.get_current_data(),
-            "nature": self.nature_simulator.get_current_data(),
-            "waste": self.waste_simulator.get_current_data(),
-            "noise": self.noise_simulator.get_current_data(),
-            "timestamp": datetime.now().isoformat(),
+        collectors = {
+            "air": self.air_collector.fetch_current_data,
+            "water": self.water_simulator.get_current_data,
+            "nature": self.nature_simulator.get_current_data,
+            "waste": self.waste_simulator.get_current_data,
+            "noise": self.noise_simulator.get_current_data,
         }
+        if dimensions is not None:
+            collectors = {
+                dim: collect for dim, collect in collectors.items() if dim in dimensions
+            }
+
+        if self.instrumentation is not None:
+            collectors = {
+                dim: self.instrumentation.wrap(f"collector.{dim}", collect)
+                for dim, collect in collectors.items()
+            }
+
+        if concurrent is None:
+            concurrent = self.concurrent
+
+        # Collect raw data
+        with self._stage("collect"):
+            if concurrent:
+                raw_data = self._collect_concurrently(collectors)
+            else:
+                raw_data = self._collect_sequentially(collectors)
+        raw_data["timestamp"] = datetime.now().isoformat()
 
         # Store raw data
-        self._store_raw_data(raw_data)
+        if self.storage is not None:
+            with self._stage("store_raw_data"):
+                self._store_raw_data(raw_data)
 
         return raw_data
 
-    def calculate_index(self, raw_data=None):
-        """Calculate normalized scores and overall index"""
-        if raw_data is None:
-            raw_data = self.collect_all_data()
+    def _collect_sequentially(self, collectors):
+        """Run collectors one after another, dropping failing ones"""
+        raw_data = {}
+        for dim, collect in collectors.items():
+            try:
+                raw_data[dim] = collect()
+            except Exception as e:
+                print(f"Collector for {dim} failed: {e}")
+        return raw_data
 
-        # Calculate normalized scores for each dimension
-        normalized = {
-            "air": self.air_collector.normalize_metrics(raw_data["air"]),
-            "water": self.water_simulator.normalize_metrics(raw_data["water"]),
-            "nature": self.nature_simulator.normalize_metrics(raw_data["nature"]),
-            "waste": self.waste_simulator.normalize_metrics(raw_data["waste"]),
-            "noise": self.noise_simulator.normalize_metrics(raw_data["noise"]),
-            "timestamp": datetime.now().isoformat(),
-        }
+    def _collect_concurrently(self, collectors):
+        """Run collectors in a thread pool, dropping slow or failing ones"""
+        executor = ThreadPoolExecutor(
+            max_workers=len(collectors), thread_name_prefix="gci-collector"
+        )
+        started = time.monotonic()
+        futures = {dim: executor.submit(collect) for dim, collect in collectors.items()}
 
-        # Calculate dimension scores (overall for each dimension)
-        dimension_scores = {
-            "air": normalized["air"].get("overall", 0),
-            "water": normalized["water"].get("overall", 0),
-            "nature": normalized["nature"].get("overall", 0),
-            "waste": normalized["waste"].get("overall", 0),
-            "noise": normalized["noise"].get("overall", 0),
-        }
+        raw_data = {}
+        for dim, future in futures.items():
+            timeout = self.collector_timeout
+            if isinstance(timeout, dict):
+                timeout = timeout.get(dim, DEFAULT_COLLECTOR_TIMEOUT)
+            remaining = max(0, started + timeout - time.monotonic())
 
-        # Calculate weighted overall index
-        overall_index = sum(
-            score * self.weights[dim] for dim, score in dimension_scores.items()
-        )
+            try:
+                raw_data[dim] = future.result(timeout=remaining)
+            except TimeoutError:
+                print(f"Collector for {dim} timed out after {timeout}s, skipping")
+            except Exception as e:
+                print(f"Collector for {dim} failed: {e}")
 
-        # Create index object
-        index = {
-            "overall_score": round(overall_index, 1),
-            "dimension_scores": {
-                dim: round(score, 1) for dim, score in dimension_scores.items()
-            },
-            "normalized_metrics": normalized,
-            "raw_data": raw_data,
-            "timestamp": datetime.now().isoformat(),
-            "date": datetime.now().strftime("%Y-%m-%d"),
-        }
+        # Don't wait for collectors that timed out
+        executor.shutdown(wait=False, cancel_futures=True)
+        return raw_data
+
+    def calculate_index(self, raw_data=None):
+        """Calculate normalized scores and overall index, storing them if a
+        storage sink is configured
 
+        A partial index, missing dimensions whose collectors failed, is
+        returned with partial set but never stored, so it can't replace a
+        complete index of the same date."""
+        if raw_data is None:
+            raw_data = self.collect_all_data()
+
+        with self._stage("normalization"):
+            index = self.calculator.compute(raw_data)
+
+        if index["partial"]:
+            print(
+                "Not storing partial index, missing "
+                + ", ".join(index["missing_dimensions"])
+            )
         # Store index data
-        self._store_index(index)
+        elif self.storage is not None:
+            with self._stage("store_index"):
+                self._store_index(index)
 
         return index
 
+    def _stage(self, name):
+        """Time a pipeline stage when instrumentation is enabled"""
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.stage(f"stage.{name}")
+
     def _store_raw_data(self, raw_data):
-        """Store raw data in Supabase"""
+        """Store raw data in the storage sink"""
+        rows = []
         for dimension, metrics in raw_data.items():
             if dimension == "timestamp":
                 continue
 
             for name, value in metrics.items():
-                self.supabase.store_raw_metric(
-                    dimension=dimension,
-                    metric_name=name,
-                    value=value,
-                    unit=self._get_unit(dimension, name),
-                    source="API" if dimension == "air" else "Simulated",
+                rows.append(
+                    {
+                        "dimension": dimension,
+                        "metric_name": name,
+                        "value": value,
+                        "unit": self._get_unit(dimension, name),
+                        "source": "API" if dimension == "air" else "Simulated",
+                    }
                 )
 
+        if self.writer is not None and self.bulk_writes:
+            # Stamp rows with their collection time, so writes of several
+            # collections coalesced into one call stay separate rows
+            for row in rows:
+                row["collection_timestamp"] = raw_data["timestamp"]
+            self.writer.submit("store_raw_metrics_bulk", rows)
+        elif self.writer is not None:
+            self.writer.submit("store_raw_metric", rows)
+        elif self.bulk_writes:
+            report = self.storage.store_raw_metrics_bulk(rows, self.chunk_size)
+            self._log_failed_rows("raw_metrics", report)
+        else:
+            for row in rows:
+                self.storage.store_raw_metric(**row)
+
     def _store_index(self, index):
-        """Store index data in Supabase"""
+        """Store index data in the storage sink"""
         # Store overall index
-        self.supabase.store_index(
-            date=index["date"],
-            overall_score=index["overall_score"],
-            dimension_scores=index["dimension_scores"],
-            target_score=70,  # Example target
-        )
+        index_row = {
+            "date": index["date"],
+            "overall_score": index["overall_score"],
+            "dimension_scores": index["dimension_scores"],
+            "target_score": 70,  # Example target
+        }
+        if self.writer is not None:
+            self.writer.submit("store_index", [index_row])
+        else:
+            self.storage.store_index(**index_row)
 
-        # Store normalized scores
+        # Store normalized scores, labelled with the scoring version
+        calculation_method = self.scoring_config.calculation_method
+        rows = []
         for dimension, metrics in index["normalized_metrics"].items():
             if dimension == "timestamp":
                 continue
@@ -132,15 +259,73 @@ class GreenCityIndex:
             for name, score in metrics.items():
                 if name != "overall":
                     raw_value = index["raw_data"][dimension].get(name, None)
-                    self.supabase.store_normalized_score(
-                        dimension=dimension,
-                        metric_name=name,
-                        raw_value=raw_value,
-                        normalized_score=int(score),
-                        calculation_method="linear_scaling",
-                        date=index["date"],
+                    rows.append(
+                        {
+                            "dimension": dimension,
+                            "metric_name": name,
+                            "raw_value": raw_value,
+                            "normalized_score": int(score),
+                            "calculation_method": calculation_method,
+                            "date": index["date"],
+                        }
                     )
 
+        if self.writer is not None:
+            method = (
+                "store_normalized_scores_bulk"
+                if self.bulk_writes
+                else "store_normalized_score"
+            )
+            self.writer.submit(method, rows)
+        elif self.bulk_writes:
+            report = self.storage.store_normalized_scores_bulk(rows, self.chunk_size)
+            self._log_failed_rows("normalized_scores", report)
+        else:
+            for row in rows:
+                self.storage.store_normalized_score(**row)
+
+    def flush(self, timeout=None):
+        """
+        Wait for the background writer to store everything handed to it
+
+        Args:
+            timeout: Maximum seconds to wait (default: no limit)
+
+        Returns:
+            dict: Rows stored and failed since the last flush, see
+            WriteBehindWriter.flush; empty counts without write_behind
+        """
+        if self.writer is None:
+            return {"stored": 0, "failed": [], "pending": 0}
+
+        with self._stage("flush_writes"):
+            report = self.writer.flush(timeout)
+        if report["failed"]:
+            print(
+                f"Failed to store {len(report['failed'])} rows: "
+                f"{report['failed'][0]['error']}"
+            )
+        return report
+
+    def close(self, timeout=None):
+        """Flush pending writes and stop the background writer"""
+        report = self.flush(timeout)
+        if self.writer is not None:
+            self.writer.close(timeout)
+        return report
+
+    def _log_failed_rows(self, table, report):
+        """Print a summary of the rows a bulk write could not store"""
+        failed = report["failed"]
+        if failed:
+            names = ", ".join(
+                f"{f['row']['dimension']}.{f['row']['metric_name']}" for f in failed
+            )
+            print(
+                f"Failed to store {len(failed)} {table} rows ({names}): "
+                f"{failed[0]['error']}"
+            )
+
     def _get_unit(self, dimension, metric_name):
         """Get the unit for a specific metric"""
         units = {
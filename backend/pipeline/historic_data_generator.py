@@ -10,15 +10,31 @@ import random
 import json
 import os
 from datetime import datetime, timedelta
-from backend.pipeline.green_city_index import GreenCityIndex
-from backend.storage.supabase_client import SupabaseManager
+import numpy as np
+from backend.collectors.air_quality import AirQualityCollector
+from backend.pipeline.history_export import save_to_parquet
+from backend.pipeline.scoring_config import load_scoring_config
+from backend.storage.factory import get_storage_backend
 
 
 class SimplifiedHistoricDataGenerator:
-    def __init__(self):
-        """Initialize the historic data generator with mock data"""
-        self.gci = GreenCityIndex()
-        self.supabase = SupabaseManager()
+    def __init__(self, reference_date=None, scoring_config=None):
+        """
+        Initialize the historic data generator with mock data
+
+        Args:
+            reference_date: Date the long-term trend is measured from
+                (default: the current time when data is generated)
+            scoring_config: ScoringConfig with the weights and metric scales
+                (default: load_scoring_config())
+        """
+        self.scoring_config = scoring_config or load_scoring_config()
+        self.calculator = self.scoring_config.calculator()
+        # Created on first use, so generating and exporting data needs
+        # neither database credentials nor the air quality API
+        self._air_collector = None
+        self._storage = None
+        self.reference_date = reference_date
 
         # Base data from yesterday (2025-05-05)
         self.base_data = {
@@ -140,6 +156,28 @@ class SimplifiedHistoricDataGenerator:
             "12-25": {"waste": 1.3, "noise": 0.8},  # Christmas Day
         }
 
+    @property
+    def air_collector(self):
+        """AirQualityCollector used for air_source='archive'"""
+        if self._air_collector is None:
+            self._air_collector = AirQualityCollector()
+        return self._air_collector
+
+    @air_collector.setter
+    def air_collector(self, collector):
+        self._air_collector = collector
+
+    @property
+    def storage(self):
+        """Storage backend used by save_to_database"""
+        if self._storage is None:
+            self._storage = get_storage_backend()
+        return self._storage
+
+    @storage.setter
+    def storage(self, storage):
+        self._storage = storage
+
     def _apply_seasonal_modifier(self, dimension, date, base_value):
         """Apply seasonal modifier based on month"""
         month = date.month
@@ -148,7 +186,7 @@ class SimplifiedHistoricDataGenerator:
 
     def _apply_trend_modifier(self, dimension, date, base_value):
         """Apply long-term trend based on years from now"""
-        now = datetime.now()
+        now = self.reference_date or datetime.now()
         years_diff = (now.year - date.year) + ((now.month - date.month) / 12)
         trend_factor = 1.0 - (self.annual_trends[dimension] * years_diff)
         return base_value * trend_factor
@@ -163,15 +201,15 @@ class SimplifiedHistoricDataGenerator:
             return base_value * self.special_events[month_day][dimension]
         return base_value
 
-    def _apply_random_noise(self, base_value, noise_level=0.05):
-        """Apply random noise to values"""
-        noise = 1.0 + random.uniform(-noise_level, noise_level)
+    def _apply_random_noise(self, base_value, noise_level=0.05, rng=random):
+        """Apply random noise to values drawn from rng"""
+        noise = 1.0 + rng.uniform(-noise_level, noise_level)
         return base_value * noise
 
     def generate_data_for_date(self, target_date):
         """Generate environmental data for a specific date with all modifiers"""
-        # Use random seed based on date for consistency
-        random.seed(int(target_date.timestamp()))
+        # Use an independent generator seeded by date for consistency
+        rng = random.Random(int(target_date.timestamp()))
 
         # Create deep copies of the base data
         air_data = dict(self.base_data["air"])
@@ -186,7 +224,7 @@ class SimplifiedHistoricDataGenerator:
             base = self._apply_seasonal_modifier("air", target_date, base)
             base = self._apply_trend_modifier("air", target_date, base)
             base = self._apply_special_event("air", target_date, base)
-            base = self._apply_random_noise(base)
+            base = self._apply_random_noise(base, rng=rng)
             air_data[metric] = base
 
         # Apply modifiers to water data
@@ -195,7 +233,7 @@ class SimplifiedHistoricDataGenerator:
             base = self._apply_seasonal_modifier("water", target_date, base)
             base = self._apply_trend_modifier("water", target_date, base)
             base = self._apply_special_event("water", target_date, base)
-            base = self._apply_random_noise(base)
+            base = self._apply_random_noise(base, rng=rng)
             water_data[metric] = base
 
         # Apply modifiers to nature data
@@ -205,7 +243,7 @@ class SimplifiedHistoricDataGenerator:
                 base = self._apply_seasonal_modifier("nature", target_date, base)
                 base = self._apply_trend_modifier("nature", target_date, base)
                 base = self._apply_special_event("nature", target_date, base)
-                base = self._apply_random_noise(base)
+                base = self._apply_random_noise(base, rng=rng)
                 nature_data[metric] = base
 
         # Apply modifiers to waste data
@@ -214,7 +252,7 @@ class SimplifiedHistoricDataGenerator:
             base = self._apply_seasonal_modifier("waste", target_date, base)
             base = self._apply_trend_modifier("waste", target_date, base)
             base = self._apply_special_event("waste", target_date, base)
-            base = self._apply_random_noise(base)
+            base = self._apply_random_noise(base, rng=rng)
             waste_data[metric] = base
 
         # Apply modifiers to noise data
@@ -223,7 +261,7 @@ class SimplifiedHistoricDataGenerator:
             base = self._apply_seasonal_modifier("noise", target_date, base)
             base = self._apply_trend_modifier("noise", target_date, base)
             base = self._apply_special_event("noise", target_date, base)
-            base = self._apply_random_noise(base)
+            base = self._apply_random_noise(base, rng=rng)
             noise_data[metric] = base
 
         # Compile all data
@@ -238,7 +276,137 @@ class SimplifiedHistoricDataGenerator:
 
         return raw_data
 
-    def generate_historic_dataset(self, start_date, end_date=None, sampling="daily"):
+    def _metric_keys(self):
+        """List the (dimension, metric) pairs that receive modifiers"""
+        return [
+            (dimension, metric)
+            for dimension, metrics in self.base_data.items()
+            for metric, value in metrics.items()
+            if isinstance(value, (int, float))
+        ]
+
+    def generate_data_matrix(self, dates, noise="python", seed=None):
+        """
+        Generate environmental data for many dates in one vectorized pass
+
+        Seasonal, trend, event and noise factors are built as date x metric
+        matrices and applied in the same order as generate_data_for_date.
+
+        Args:
+            dates: Sequence of datetimes (or numpy datetime64 values)
+            noise: 'python' draws noise per date from random.Random seeded with
+                the date's timestamp, matching generate_data_for_date exactly;
+                'numpy' draws the whole noise matrix from one numpy Generator
+            seed: Seed for the numpy Generator when noise='numpy'
+
+        Returns:
+            tuple: (metric_keys, values) where metric_keys is a list of
+                (dimension, metric) pairs and values is an array of shape
+                (len(dates), len(metric_keys))
+        """
+        keys = self._metric_keys()
+        dimensions = list(self.base_data)
+        dim_idx = np.array([dimensions.index(dim) for dim, _ in keys])
+
+        days = np.asarray(dates, dtype="datetime64[D]")
+        years = days.astype("datetime64[Y]").astype(int) + 1970
+        months = days.astype("datetime64[M]").astype(int) % 12 + 1
+        month_days = (days - days.astype("datetime64[M]")).astype(int) + 1
+
+        base = np.array([float(self.base_data[dim][metric]) for dim, metric in keys])
+
+        # Month x dimension lookup tables, expanded to date x metric
+        seasonal_table = np.ones((13, len(dimensions)))
+        for d, dim in enumerate(dimensions):
+            for month, factor in self.seasonal_patterns[dim].items():
+                seasonal_table[month, d] = factor
+        seasonal = seasonal_table[months][:, dim_idx]
+
+        now = self.reference_date or datetime.now()
+        years_diff = (now.year - years) + ((now.month - months) / 12)
+        trends = np.array([self.annual_trends[dim] for dim in dimensions])
+        trend = (1.0 - trends[None, :] * years_diff[:, None])[:, dim_idx]
+
+        event = np.ones((len(days), len(dimensions)))
+        day_codes = months * 100 + month_days
+        for month_day, impacts in self.special_events.items():
+            month, day = (int(part) for part in month_day.split("-"))
+            hit = day_codes == month * 100 + day
+            for dim, factor in impacts.items():
+                event[hit, dimensions.index(dim)] = factor
+        event = event[:, dim_idx]
+
+        if noise == "python":
+            noise_factor = np.empty((len(days), len(keys)))
+            for i, date in enumerate(self._as_datetimes(dates)):
+                rng = random.Random(int(date.timestamp()))
+                noise_factor[i] = [rng.uniform(-0.05, 0.05) for _ in keys]
+            noise_factor += 1.0
+        elif noise == "numpy":
+            rng = np.random.default_rng(seed)
+            noise_factor = 1.0 + rng.uniform(-0.05, 0.05, size=(len(days), len(keys)))
+        else:
+            raise ValueError(f"Unknown noise mode: {noise}")
+
+        values = base * seasonal
+        values = values * trend
+        values = values * event
+        values = values * noise_factor
+        return keys, values
+
+    def generate_data_for_dates(self, dates, noise="python", seed=None):
+        """
+        Generate raw data dicts for many dates using the vectorized engine
+
+        Returns:
+            List of raw data dicts in the format of generate_data_for_date
+        """
+        dates = self._as_datetimes(dates)
+        keys, values = self.generate_data_matrix(dates, noise=noise, seed=seed)
+
+        all_raw_data = []
+        for date, row in zip(dates, values.tolist()):
+            raw_data = {dim: dict(self.base_data[dim]) for dim in self.base_data}
+            for (dim, metric), value in zip(keys, row):
+                raw_data[dim][metric] = value
+            raw_data["timestamp"] = date.isoformat()
+            all_raw_data.append(raw_data)
+
+        return all_raw_data
+
+    def _as_datetimes(self, dates):
+        """Convert a sequence of dates or datetime64 values to datetimes"""
+        if isinstance(dates, np.ndarray):
+            dates = dates.astype("datetime64[s]").tolist()
+        return [
+            (
+                date
+                if isinstance(date, datetime)
+                else datetime(date.year, date.month, date.day)
+            )
+            for date in dates
+        ]
+
+    def _date_range(self, start_date, end_date, sampling):
+        """List the sampled dates from start_date to end_date inclusive"""
+        # Determine sampling interval
+        if sampling == "weekly":
+            delta = timedelta(days=7)
+        elif sampling == "monthly":
+            delta = timedelta(days=30)  # Approximate
+        else:  # Default to daily
+            delta = timedelta(days=1)
+
+        total_points = ((end_date - start_date).days // delta.days) + 1
+        return [start_date + i * delta for i in range(total_points)]
+
+    def generate_historic_dataset(
+        self,
+        start_date,
+        end_date=None,
+        sampling="daily",
+        air_source="simulated",
+    ):
         """
         Generate a historic dataset from start_date to end_date
 
@@ -246,6 +414,9 @@ class SimplifiedHistoricDataGenerator:
             start_date: Start date (datetime object or YYYY-MM-DD string)
             end_date: End date (datetime or string, default: today)
             sampling: 'daily', 'weekly', or 'monthly'
+            air_source: 'simulated' scales the base air data like every other
+                dimension, 'archive' uses measured daily averages from the
+                air quality API
 
         Returns:
             List of index data for the date range
@@ -259,44 +430,43 @@ class SimplifiedHistoricDataGenerator:
         elif isinstance(end_date, str):
             end_date = datetime.strptime(end_date, "%Y-%m-%d")
 
-        # Determine sampling interval
-        if sampling == "weekly":
-            delta = timedelta(days=7)
-        elif sampling == "monthly":
-            delta = timedelta(days=30)  # Approximate
-        else:  # Default to daily
-            delta = timedelta(days=1)
-
-        # Generate data for each date in the range
-        current_date = start_date
-        all_indexes = []
-
-        total_points = ((end_date - start_date).days // delta.days) + 1
+        dates = self._date_range(start_date, end_date, sampling)
         print(
-            f"Generating {total_points} data points from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+            f"Generating {len(dates)} data points from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
         )
 
-        while current_date <= end_date:
-            date_str = current_date.strftime("%Y-%m-%d")
-            print(f"Generating data for {date_str}...")
+        # Generate raw data for every date in one vectorized pass
+        all_raw_data = self.generate_data_for_dates(dates)
 
-            # Generate raw data for this date
-            raw_data = self.generate_data_for_date(current_date)
+        if air_source == "archive":
+            self._apply_archive_air_data(dates, all_raw_data)
 
-            # Calculate index
-            index = self.gci.calculate_index(raw_data)
+        # Score every date at once; indexes are stamped with their date rather
+        # than the generation time so output does not depend on when it ran
+        timestamps = [raw_data["timestamp"] for raw_data in all_raw_data]
+        all_indexes = self.calculator.compute_batch(
+            all_raw_data, [timestamp[:10] for timestamp in timestamps], timestamps
+        )
 
-            # Explicitly set the date
-            index["date"] = date_str
+        print(f"Generated {len(all_indexes)} historical data points")
+        return all_indexes
 
-            # Add to collection
-            all_indexes.append(index)
+    def _apply_archive_air_data(self, dates, all_raw_data):
+        """Replace simulated air data with measured daily averages"""
+        history = self.air_collector.fetch_history(
+            dates[0].strftime("%Y-%m-%d"), dates[-1].strftime("%Y-%m-%d")
+        )
+        empty = {"pm10": None, "pm2_5": None, "no2": None, "european_aqi": None}
 
-            # Move to next date
-            current_date += delta
+        missing = 0
+        for date, raw_data in zip(dates, all_raw_data):
+            air_data = history.get(date.strftime("%Y-%m-%d"))
+            if air_data is None:
+                missing += 1
+            raw_data["air"] = dict(air_data or empty)
 
-        print(f"Generated {len(all_indexes)} historical data points")
-        return all_indexes
+        if missing:
+            print(f"No archive air data for {missing} of {len(dates)} dates")
 
     def save_to_json(self, data, filename=None):
         """Save generated data to JSON file"""
@@ -317,26 +487,39 @@ class SimplifiedHistoricDataGenerator:
         print(f"Saved historical data to {filepath}")
         return filepath
 
-    def save_to_database(self, data):
-        """Save all generated historical data to database"""
-        saved_count = 0
-        for index in data:
-            date_str = index["date"]
-
-            # Store in Supabase
-            try:
-                success = self.supabase.store_index(
-                    date=date_str,
-                    overall_score=index["overall_score"],
-                    dimension_scores=index["dimension_scores"],
-                    target_score=70.0,  # Example target
-                )
-
-                if success:
-                    saved_count += 1
-            except Exception as e:
-                print(f"Failed to store index for {date_str}: {e}")
+    def save_to_parquet(self, data, filename=None):
+        """Save generated data to a compressed columnar Parquet file"""
+        if not filename:
+            filename = (
+                f"green_city_index_history_{datetime.now().strftime('%Y%m%d')}.parquet"
+            )
+
+        # Ensure the processed directory exists
+        os.makedirs("data/processed", exist_ok=True)
+
+        return save_to_parquet(data, os.path.join("data/processed", filename))
+
+    def save_to_database(self, data, chunk_size=None):
+        """Save all generated historical data to database in batched upserts"""
+        report = self.storage.store_indexes_bulk(
+            [
+                {
+                    "date": index["date"],
+                    "overall_score": index["overall_score"],
+                    "dimension_scores": index["dimension_scores"],
+                    "target_score": 70.0,  # Example target
+                }
+                for index in data
+            ],
+            chunk_size=chunk_size,
+        )
+
+        for failure in report["failed"]:
+            print(
+                f"Failed to store index for {failure['row']['date']}: {failure['error']}"
+            )
 
+        saved_count = report["stored"]
         print(f"Successfully stored {saved_count} of {len(data)} historical records")
         return saved_count
 
@@ -364,6 +547,18 @@ if __name__ == "__main__":
         default="daily",
         help="Data frequency",
     )
+    parser.add_argument(
+        "--air-source",
+        choices=["simulated", "archive"],
+        default="simulated",
+        help="Simulate air data or backfill measured values from the API",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "parquet"],
+        default="json",
+        help="File format of the saved history",
+    )
     parser.add_argument("--save-db", action="store_true", help="Save to database")
     args = parser.parse_args()
 
@@ -371,13 +566,21 @@ if __name__ == "__main__":
 
     # Generate the dataset
     historical_data = generator.generate_historic_dataset(
-        start_date=args.start, end_date=args.end, sampling=args.sampling
+        start_date=args.start,
+        end_date=args.end,
+        sampling=args.sampling,
+        air_source=args.air_source,
     )
 
     # Save the complete dataset to one file
-    json_path = generator.save_to_json(
-        historical_data, "green_city_index_complete_history.json"
-    )
+    if args.format == "parquet":
+        generator.save_to_parquet(
+            historical_data, "green_city_index_complete_history.parquet"
+        )
+    else:
+        generator.save_to_json(
+            historical_data, "green_city_index_complete_history.json"
+        )
 
     # Optionally save to database
     if args.save_db and historical_data:
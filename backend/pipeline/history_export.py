@@ -0,0 +1,187 @@
+"""
+Columnar Parquet export and import of Green City Index history
+
+The history is stored in long format, one row per date x metric, sorted by
+date and compressed. Readers can project only the columns they need and
+push date-range predicates down to the row groups, e.g. reading just
+date and overall_score without parsing any nested metrics.
+"""
+
+import argparse
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+HISTORY_SCHEMA = pa.schema(
+    [
+        ("date", pa.date32()),
+        ("overall_score", pa.float64()),
+        ("dimension", pa.dictionary(pa.int8(), pa.string())),
+        ("dimension_score", pa.float64()),
+        ("metric_name", pa.dictionary(pa.int16(), pa.string())),
+        ("raw_value", pa.float64()),
+        ("normalized_score", pa.float64()),
+    ]
+)
+
+# Columns with a single value per date
+DATE_LEVEL_COLUMNS = {"date", "overall_score"}
+
+
+def indexes_to_table(indexes):
+    """
+    Flatten index dicts into a long-format Arrow table
+
+    Every raw or normalized metric becomes one row carrying its date,
+    overall score and dimension score; metrics without a normalized score
+    (e.g. european_aqi) have a null normalized_score.
+    """
+    columns = {name: [] for name in HISTORY_SCHEMA.names}
+
+    for index in sorted(indexes, key=lambda index: index["date"]):
+        index_date = datetime.strptime(index["date"], "%Y-%m-%d").date()
+        raw_data = index.get("raw_data", {})
+        normalized = index.get("normalized_metrics", {})
+
+        for dimension, dimension_score in index["dimension_scores"].items():
+            raw_metrics = raw_data.get(dimension, {})
+            scores = normalized.get(dimension, {})
+            metrics = list(raw_metrics) + [
+                name for name in scores if name != "overall" and name not in raw_metrics
+            ]
+            # Keep dimensions without metrics so their score survives
+            for metric in metrics or [None]:
+                columns["date"].append(index_date)
+                columns["overall_score"].append(index["overall_score"])
+                columns["dimension"].append(dimension)
+                columns["dimension_score"].append(dimension_score)
+                columns["metric_name"].append(metric)
+                columns["raw_value"].append(raw_metrics.get(metric))
+                columns["normalized_score"].append(scores.get(metric))
+
+    return pa.table(columns, schema=HISTORY_SCHEMA)
+
+
+def save_to_parquet(indexes, path, compression="zstd", row_group_size=16384):
+    """
+    Write index history to a Parquet file
+
+    Args:
+        indexes: List of index dicts as produced by the generator or pipeline
+        path: Output file
+        compression: Parquet codec (default: zstd)
+        row_group_size: Rows per row group; smaller groups make date-range
+            reads skip more data
+
+    Returns:
+        str: The path written
+    """
+    table = indexes_to_table(indexes)
+    pq.write_table(table, path, compression=compression, row_group_size=row_group_size)
+    print(f"Saved {table.num_rows} rows for {len(indexes)} dates to {path}")
+    return path
+
+
+def _as_date(value):
+    """Accept a date, datetime or YYYY-MM-DD string"""
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def read_history_table(path, columns=None, start=None, end=None):
+    """
+    Read history from Parquet with column projection and date pushdown
+
+    Args:
+        path: Parquet file written by save_to_parquet
+        columns: Columns to read (default: all)
+        start: First date to include (date or YYYY-MM-DD)
+        end: Last date to include (date or YYYY-MM-DD)
+
+    Returns:
+        pyarrow.Table: The selected rows; when only date-level columns are
+        requested there is one row per date
+    """
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", _as_date(start)))
+    if end is not None:
+        filters.append(("date", "<=", _as_date(end)))
+
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+
+    if columns and set(columns) <= DATE_LEVEL_COLUMNS:
+        # Date-level values repeat on every metric row
+        table = table.group_by(list(columns), use_threads=False).aggregate([])
+        table = table.select(list(columns))
+        if "date" in columns:
+            table = table.take(pc.sort_indices(table, [("date", "ascending")]))
+    return table
+
+
+def read_history(path, columns=None, start=None, end=None):
+    """Read history from Parquet into a pandas DataFrame, see read_history_table"""
+    return read_history_table(path, columns, start, end).to_pandas()
+
+
+def load_indexes(path, start=None, end=None):
+    """
+    Rebuild index dicts from a Parquet history file
+
+    Returns:
+        list: Dicts with date, overall_score, dimension_scores, raw_data and
+        normalized_metrics, in date order
+    """
+    rows = read_history_table(path, start=start, end=end).to_pylist()
+
+    indexes = {}
+    for row in rows:
+        date_str = row["date"].strftime("%Y-%m-%d")
+        index = indexes.setdefault(
+            date_str,
+            {
+                "date": date_str,
+                "overall_score": row["overall_score"],
+                "dimension_scores": {},
+                "raw_data": {},
+                "normalized_metrics": {},
+            },
+        )
+        dimension = row["dimension"]
+        index["dimension_scores"][dimension] = row["dimension_score"]
+        raw_metrics = index["raw_data"].setdefault(dimension, {})
+        scores = index["normalized_metrics"].setdefault(dimension, {})
+        if row["metric_name"] is None:
+            continue
+        if row["raw_value"] is not None:
+            raw_metrics[row["metric_name"]] = row["raw_value"]
+        if row["normalized_score"] is not None:
+            scores[row["metric_name"]] = row["normalized_score"]
+
+    return [indexes[key] for key in sorted(indexes)]
+
+
+if __name__ == "__main__":
+    from backend.pipeline.load_historic_data import iter_json_records
+
+    parser = argparse.ArgumentParser(
+        description="Convert JSON index history to compressed Parquet"
+    )
+    parser.add_argument(
+        "--input",
+        default="data/processed/green_city_index_complete_history.json",
+        help="JSON history file",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/processed/green_city_index_complete_history.parquet",
+        help="Parquet file to write",
+    )
+    args = parser.parse_args()
+
+    save_to_parquet(list(iter_json_records(args.input)), args.output)
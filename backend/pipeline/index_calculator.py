@@ -0,0 +1,136 @@
+# index_calculator.py
+import math
+from datetime import datetime
+
+from backend.collectors.normalization import normalize_batch, normalize_record
+
+# Dimension weights (equal by default)
+DEFAULT_WEIGHTS = {
+    "air": 0.2,
+    "water": 0.2,
+    "nature": 0.2,
+    "waste": 0.2,
+    "noise": 0.2,
+}
+
+
+class IndexCalculator:
+    """
+    Side-effect-free scoring core of the Green City Index
+
+    Turns raw metrics into normalized scores, dimension scores and the
+    weighted overall index without collecting or storing anything.
+    """
+
+    def __init__(self, weights=None, scales=None):
+        """
+        Args:
+            weights: Dict of dimension -> weight (default: DEFAULT_WEIGHTS)
+            scales: Metric scales shaped like METRIC_SCALES (default:
+                METRIC_SCALES)
+        """
+        self.weights = weights if weights is not None else dict(DEFAULT_WEIGHTS)
+        self.scales = scales
+
+    def compute(self, raw_data, date=None, timestamp=None):
+        """
+        Calculate normalized scores and overall index
+
+        Args:
+            raw_data: Dict of dimension -> raw metrics, as from collect_all_data
+            date: Date of the index (YYYY-MM-DD, default: today)
+            timestamp: Timestamp of the calculation (default: now)
+
+        Returns:
+            dict: Index with overall_score, dimension_scores,
+            normalized_metrics, raw_data, timestamp and date. Dimensions
+            missing from raw_data are listed in missing_dimensions, partial
+            is set and the overall score is reweighted over the others.
+        """
+        now = datetime.now()
+        timestamp = timestamp or now.isoformat()
+
+        # Calculate normalized scores for each dimension
+        normalized = {
+            dim: normalize_record(dim, raw_data[dim], self.scales)
+            for dim in self.weights
+            if dim in raw_data
+        }
+        return self._index(
+            raw_data, normalized, date or now.strftime("%Y-%m-%d"), timestamp
+        )
+
+    def compute_batch(self, all_raw_data, dates, timestamps):
+        """
+        Calculate the index for many records, normalizing each dimension in
+        one vectorized call
+
+        Args:
+            all_raw_data: List of raw data dicts, as passed to compute
+            dates: Date of each index (YYYY-MM-DD)
+            timestamps: Timestamp of each index
+
+        Returns:
+            list: Index dicts identical to calling compute for every record
+        """
+        columns = {}
+        for dim in self.weights:
+            records = [raw_data.get(dim, {}) for raw_data in all_raw_data]
+            metrics = {metric for record in records for metric in record}
+            scores = normalize_batch(
+                dim,
+                {
+                    metric: [record.get(metric) for record in records]
+                    for metric in metrics
+                },
+                self.scales,
+            )
+            columns[dim] = {
+                metric: values.tolist() for metric, values in scores.items()
+            }
+
+        indexes = []
+        for i, raw_data in enumerate(all_raw_data):
+            # Same shape as normalize_record: unscored metrics are left out
+            normalized = {
+                dim: {
+                    metric: scores[i]
+                    for metric, scores in columns[dim].items()
+                    if not math.isnan(scores[i])
+                }
+                for dim in self.weights
+                if dim in raw_data
+            }
+            indexes.append(self._index(raw_data, normalized, dates[i], timestamps[i]))
+        return indexes
+
+    def _index(self, raw_data, normalized, date, timestamp):
+        """Weight the normalized dimensions of one record into its index"""
+        # Dimensions without data (e.g. a failed collector) are left out and
+        # the remaining weights scaled up to the full total
+        present = [dim for dim in self.weights if dim in raw_data]
+        missing = [dim for dim in self.weights if dim not in raw_data]
+        normalized["timestamp"] = timestamp
+
+        # Calculate dimension scores (overall for each dimension)
+        dimension_scores = {dim: normalized[dim].get("overall", 0) for dim in present}
+
+        # Calculate weighted overall index
+        present_weight = sum(self.weights[dim] for dim in present)
+        scale = sum(self.weights.values()) / present_weight if present_weight else 0
+        overall_index = scale * sum(
+            score * self.weights[dim] for dim, score in dimension_scores.items()
+        )
+
+        return {
+            "overall_score": round(overall_index, 1),
+            "dimension_scores": {
+                dim: round(score, 1) for dim, score in dimension_scores.items()
+            },
+            "normalized_metrics": normalized,
+            "raw_data": raw_data,
+            "timestamp": timestamp,
+            "date": date,
+            "partial": bool(missing),
+            "missing_dimensions": missing,
+        }
@@ -0,0 +1,273 @@
+# instrumentation.py
+"""
+Lightweight timing and metrics collection for pipeline runs
+
+Stages, collectors, storage calls and HTTP requests are recorded under a
+name with their call count, error count, wall time and bytes transferred.
+At the end of a run the totals are written as a JSON report and optionally
+as a Prometheus textfile for the node exporter's textfile collector.
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def _payload_size(value):
+    """Approximate the bytes of a payload by its JSON encoding"""
+    try:
+        return len(json.dumps(value, default=str).encode())
+    except (TypeError, ValueError):
+        return 0
+
+
+def _is_failure(result):
+    """Treat False and bulk reports with failed rows as errors"""
+    if result is False:
+        return True
+    return isinstance(result, dict) and bool(result.get("failed"))
+
+
+class Instrumentation:
+    def __init__(self, name="daily_update"):
+        """
+        Args:
+            name: Name of the run, used in report file names and metric labels
+        """
+        self.name = name
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.metrics = {}
+
+    def record(self, name, seconds, error=False, bytes_transferred=0):
+        """Add one call of the named operation to the totals"""
+        with self._lock:
+            metric = self.metrics.setdefault(
+                name,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "bytes": 0,
+                },
+            )
+            metric["calls"] += 1
+            metric["errors"] += int(error)
+            metric["seconds"] += seconds
+            metric["max_seconds"] = max(metric["max_seconds"], seconds)
+            metric["bytes"] += bytes_transferred
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code, counting an exception as an error"""
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, error)
+
+    def wrap(self, name, func, measure_payload=False):
+        """
+        Return func instrumented under name
+
+        Args:
+            name: Metric name, e.g. "collector.air"
+            func: Callable to wrap
+            measure_payload: Count the JSON size of the arguments and the
+                result as bytes transferred
+
+        A generator result (e.g. from a query_* method that pages through a
+        table) is wrapped so the time is recorded when it is exhausted or
+        closed; only the arguments count as bytes then.
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                self.record(name, time.perf_counter() - started, error=True)
+                raise
+
+            if inspect.isgenerator(result):
+                size = _payload_size([args, kwargs]) if measure_payload else 0
+                return self._timed_generator(name, result, started, size)
+
+            size = 0
+            if measure_payload:
+                size = _payload_size([args, kwargs]) + _payload_size(result)
+            self.record(name, time.perf_counter() - started, _is_failure(result), size)
+            return result
+
+        return wrapper
+
+    def _timed_generator(self, name, generator, started, size):
+        """Yield from generator, recording the call once it is finished"""
+        error = False
+        try:
+            yield from generator
+        except GeneratorExit:
+            # Abandoned by the consumer, e.g. after the first page
+            raise
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, error, size)
+
+    def instrument(self, obj, prefix, measure_payload=None):
+        """Wrap every public method of obj, see InstrumentedProxy"""
+        return InstrumentedProxy(obj, self, prefix, measure_payload)
+
+    def track_session(self, session, name="http"):
+        """
+        Record every response of a requests.Session
+
+        Wall time is the response's elapsed time and bytes the body size.
+        """
+
+        def on_response(response, *args, **kwargs):
+            self.record(
+                f"{name}.{response.request.method.lower()}",
+                response.elapsed.total_seconds(),
+                error=response.status_code >= 400,
+                bytes_transferred=len(response.content or b""),
+            )
+
+        session.hooks.setdefault("response", []).append(on_response)
+        return session
+
+    def report(self, status="success", **extra):
+        """
+        Build the run report
+
+        Returns:
+            dict: Run name, status, start time, total seconds, per-operation
+            metrics and any extra fields
+        """
+        with self._lock:
+            metrics = {
+                name: dict(metric, seconds=round(metric["seconds"], 6))
+                for name, metric in sorted(self.metrics.items())
+            }
+        return {
+            "run": self.name,
+            "status": status,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(time.perf_counter() - self._started, 6),
+            "metrics": metrics,
+            **extra,
+        }
+
+    def write_report(self, directory="logs", status="success", **extra):
+        """
+        Write the run report as JSON
+
+        Returns:
+            str: Path of the report
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(
+            directory,
+            f"run_report_{self.name}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json",
+        )
+        with open(path, "w") as f:
+            json.dump(self.report(status, **extra), f, indent=2)
+        return path
+
+    def write_prometheus(self, path, status="success"):
+        """
+        Write the metrics in the Prometheus text exposition format
+
+        The file is replaced atomically so a scraping node exporter never
+        sees a partial file.
+        """
+        report = self.report(status)
+        run = report["run"]
+        lines = [
+            "# HELP agci_run_duration_seconds Wall time of the last pipeline run",
+            "# TYPE agci_run_duration_seconds gauge",
+            f'agci_run_duration_seconds{{run="{run}"}} {report["duration_seconds"]}',
+            "# HELP agci_run_success Whether the last pipeline run succeeded",
+            "# TYPE agci_run_success gauge",
+            f'agci_run_success{{run="{run}"}} {int(status == "success")}',
+            "# HELP agci_run_timestamp_seconds Start time of the last pipeline run",
+            "# TYPE agci_run_timestamp_seconds gauge",
+            f'agci_run_timestamp_seconds{{run="{run}"}} '
+            f"{self.started_at.timestamp():.0f}",
+        ]
+        for field, help_text in [
+            ("calls", "Calls of the operation in the last run"),
+            ("errors", "Failed calls of the operation in the last run"),
+            ("seconds", "Wall time spent in the operation in the last run"),
+            ("max_seconds", "Slowest call of the operation in the last run"),
+            ("bytes", "Bytes transferred by the operation in the last run"),
+        ]:
+            metric_name = f"agci_operation_{field}"
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} gauge")
+            for name, metric in report["metrics"].items():
+                lines.append(
+                    f'{metric_name}{{run="{run}",operation="{name}"}} {metric[field]}'
+                )
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        return path
+
+
+class InstrumentedProxy:
+    """
+    Proxy that records every public method call of the wrapped object as
+    "<prefix>.<method>"
+
+    Serializing a payload to measure it costs about as much as the call
+    itself for large reads, so by default only write methods (store_*,
+    update_*) have the JSON size of their payload counted.
+    """
+
+    WRITE_PREFIXES = ("store_", "update_")
+
+    def __init__(self, obj, instrumentation, prefix, measure_payload=None):
+        """
+        Args:
+            obj: Object whose methods are recorded
+            instrumentation: Instrumentation receiving the records
+            prefix: Name prefix of the records
+            measure_payload: True or False to count payload bytes of every
+                call or of none (default: only write methods)
+        """
+        self._obj = obj
+        self._instrumentation = instrumentation
+        self._prefix = prefix
+        self._measure_payload = measure_payload
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+        measure_payload = self._measure_payload
+        if measure_payload is None:
+            measure_payload = name.startswith(self.WRITE_PREFIXES)
+        return self._instrumentation.wrap(
+            f"{self._prefix}.{name}", attr, measure_payload=measure_payload
+        )
@@ -1,10 +1,13 @@
 """
-Script to load previously generated historic data from JSON into Supabase database
+Script to load previously generated historic data from JSON into the configured
+storage backend (Supabase by default, see backend.storage.factory)
 """
 
 import json
+import os
+import time
 import argparse
-from backend.storage.supabase_client import SupabaseManager
+from backend.storage.factory import get_storage_backend
 
 
 def load_json_to_supabase(json_file_path, target_score=70.0):
@@ -21,8 +24,8 @@ def load_json_to_supabase(json_file_path, target_score=70.0):
     with open(json_file_path, "r") as f:
         data = json.load(f)
 
-    # Initialize Supabase client
-    supabase = SupabaseManager()
+    # Initialize the configured storage backend
+    storage = get_storage_backend()
     print(f"Loaded {len(data)} records from file")
 
     # Store each record in database
@@ -39,7 +42,7 @@ def load_json_to_supabase(json_file_path, target_score=70.0):
         date_str = index["date"]
 
         try:
-            success = supabase.store_index(
+            success = storage.store_index(
                 date=date_str,
                 overall_score=index["overall_score"],
                 dimension_scores=index["dimension_scores"],
@@ -57,6 +60,177 @@ def load_json_to_supabase(json_file_path, target_score=70.0):
     return saved_count
 
 
+def iter_json_records(json_file_path, read_size=65536, max_record_size=2**24):
+    """
+    Yield the records of a top-level JSON array one at a time
+
+    The file is read in blocks of read_size characters, so memory use is
+    bounded by the largest single record rather than the whole file.
+
+    Args:
+        json_file_path: Path to a JSON file containing a list of objects
+        read_size: Number of characters read from disk at a time
+        max_record_size: Characters a single record may span; a malformed
+            record is reported once it exceeds this instead of buffering
+            the rest of the file
+
+    Raises:
+        ValueError: If the file is not a JSON array of records
+    """
+    decoder = json.JSONDecoder()
+    with open(json_file_path, "r") as f:
+        buffer = ""
+        pos = 0
+        started = False
+        eof = False
+
+        while True:
+            # Skip whitespace and separators between records
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"{json_file_path} is not a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    yield record
+                    pos = end
+                    continue
+                except json.JSONDecodeError as e:
+                    # The record continues past the end of the buffer,
+                    # unless it is malformed and never will decode
+                    if eof:
+                        raise
+                    if len(buffer) - pos > max_record_size:
+                        raise ValueError(
+                            f"Record in {json_file_path} exceeds "
+                            f"{max_record_size} characters: {e}"
+                        ) from e
+
+            if eof:
+                if not started:
+                    raise ValueError(f"{json_file_path} is not a JSON array")
+                raise ValueError(f"Unexpected end of file in {json_file_path}")
+
+            chunk = f.read(read_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def _read_checkpoint(checkpoint_path):
+    """Return the last committed date from a checkpoint file, or None"""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, "r") as f:
+        return json.load(f).get("last_date")
+
+
+def _write_checkpoint(checkpoint_path, last_date):
+    """Atomically record the last committed date"""
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_date": last_date}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def stream_json_to_supabase(
+    json_file_path, target_score=70.0, batch_size=200, checkpoint_path=None
+):
+    """
+    Stream historic AGCI data from a JSON file to Supabase in batched upserts
+
+    Records are read incrementally and stored batch_size dates per upsert.
+    After each committed batch its last date is written to checkpoint_path,
+    and records up to that date are skipped when the load is restarted, so
+    the file is expected to be sorted by date. The load stops at the first
+    failed batch so the checkpoint never skips unsaved records.
+
+    Args:
+        json_file_path: Path to JSON file containing historic data
+        target_score: Target score to use (default: 70.0)
+        batch_size: Number of dates per upsert (default: 200)
+        checkpoint_path: File used to record progress (default: no checkpoint)
+
+    Returns:
+        int: Number of records stored in this run
+    """
+    storage = get_storage_backend()
+    resume_after = _read_checkpoint(checkpoint_path)
+    if resume_after:
+        print(f"Resuming after {resume_after}")
+
+    started = time.perf_counter()
+    saved_count = 0
+    skipped = 0
+    batch = []
+
+    def commit(batch):
+        report = storage.store_indexes_bulk(batch, chunk_size=len(batch))
+        if report["failed"]:
+            failure = report["failed"][0]
+            print(
+                f"Failed to store batch ending {batch[-1]['date']}: {failure['error']}"
+            )
+            return False
+        if checkpoint_path:
+            _write_checkpoint(checkpoint_path, batch[-1]["date"])
+        return True
+
+    for index in iter_json_records(json_file_path):
+        if (
+            "date" not in index
+            or "overall_score" not in index
+            or "dimension_scores" not in index
+        ):
+            print(f"Skipping incomplete record: {index.get('date', 'unknown date')}")
+            continue
+
+        if resume_after and index["date"] <= resume_after:
+            skipped += 1
+            continue
+
+        batch.append(
+            {
+                "date": index["date"],
+                "overall_score": index["overall_score"],
+                "dimension_scores": index["dimension_scores"],
+                "target_score": target_score,
+            }
+        )
+
+        if len(batch) >= batch_size:
+            if not commit(batch):
+                break
+            saved_count += len(batch)
+            batch = []
+            elapsed = time.perf_counter() - started
+            print(
+                f"Saved {saved_count} records ({saved_count / elapsed:.1f} records/s)"
+            )
+    else:
+        # Only reached when no batch failed
+        if batch and commit(batch):
+            saved_count += len(batch)
+
+    elapsed = time.perf_counter() - started
+    rate = saved_count / elapsed if elapsed > 0 else 0.0
+    if skipped:
+        print(f"Skipped {skipped} records already committed")
+    print(
+        f"Successfully stored {saved_count} historical records "
+        f"in {elapsed:.2f}s ({rate:.1f} records/s)"
+    )
+    return saved_count
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Load historic AGCI data from JSON to Supabase"
@@ -69,7 +243,25 @@ if __name__ == "__main__":
     parser.add_argument(
         "--target", type=float, default=70.0, help="Target score to use"
     )
+    parser.add_argument(
+        "--batch-size", type=int, default=200, help="Number of dates per upsert"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Checkpoint file for resuming an interrupted load",
+    )
+    parser.add_argument(
+        "--per-record",
+        action="store_true",
+        help="Load the whole file and store one record at a time",
+    )
     args = parser.parse_args()
 
     # Load data
-    load_json_to_supabase(args.file, args.target)
+    if args.per_record:
+        load_json_to_supabase(args.file, args.target)
+    else:
+        stream_json_to_supabase(
+            args.file, args.target, args.batch_size, args.checkpoint
+        )
@@ -0,0 +1,219 @@
+# recompute_index.py
+"""
+Incremental recomputation of stored indexes after a methodology change
+
+Compares a new scoring configuration with the one the stored scores were
+calculated with, re-scores only the dimensions whose metric scales changed
+from the raw values kept in normalized_scores, reweights the overall score
+when the weights changed, and writes back only the rows whose stored value
+actually differs.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from backend.collectors.normalization import normalize_batch
+from backend.pipeline.scoring_config import ScoringConfig, load_scoring_config
+from backend.storage.factory import get_storage_backend
+
+
+def _rescore_dimensions(rows, dimensions, config):
+    """
+    Recalculate normalized and dimension scores from stored raw values
+
+    Args:
+        rows: Normalized score rows of the affected dimensions
+        dimensions: Dimensions to re-score
+        config: New ScoringConfig
+
+    Returns:
+        tuple: (changed normalized score rows, dict of date -> {dimension:
+        unrounded dimension score})
+    """
+    # Keep the latest stored row per metric and date
+    latest = {}
+    for row in rows:
+        latest[(row["dimension"], row["metric_name"], row["date"])] = row
+    if not latest:
+        return [], {}
+
+    frame = pd.DataFrame(list(latest.values()))
+    changed_rows = []
+    dimension_scores = {}
+
+    for dimension in dimensions:
+        group = frame[frame["dimension"] == dimension]
+        if group.empty:
+            continue
+
+        raw_values = group.pivot(
+            index="date", columns="metric_name", values="raw_value"
+        ).astype(float)
+        scores = normalize_batch(dimension, raw_values, config.scales)
+
+        for row in group.to_dict("records"):
+            if row["metric_name"] not in scores:
+                continue
+            score = scores.at[row["date"], row["metric_name"]]
+            if np.isnan(score) or int(score) == row["normalized_score"]:
+                continue
+            changed_rows.append(
+                {
+                    **row,
+                    "normalized_score": int(score),
+                    "calculation_method": config.calculation_method,
+                }
+            )
+
+        overall = scores["overall"] if "overall" in scores else None
+        for date in raw_values.index:
+            value = overall[date] if overall is not None else np.nan
+            dimension_scores.setdefault(date, {})[dimension] = (
+                0 if np.isnan(value) else float(value)
+            )
+
+    return changed_rows, dimension_scores
+
+
+def _recalculate_indexes(index_rows, dimension_scores, config, reweight):
+    """Return index records for the dates whose scores change"""
+    changed = []
+    for index in index_rows:
+        updated = dimension_scores.get(index["date"], {})
+        if not updated and not reweight:
+            continue
+
+        current = {dim: index[f"{dim}_score"] or 0 for dim in config.weights}
+        scores = dict(current, **updated)
+        overall = sum(score * config.weights[dim] for dim, score in scores.items())
+
+        record = {
+            "date": index["date"],
+            "overall_score": round(overall, 1),
+            "dimension_scores": {dim: round(score, 1) for dim, score in scores.items()},
+            "target_score": index["target_score"],
+        }
+        if (
+            record["overall_score"] != index["overall_score"]
+            or record["dimension_scores"] != current
+        ):
+            changed.append(record)
+
+    return changed
+
+
+def recompute_index(
+    storage,
+    config,
+    previous=None,
+    start=None,
+    end=None,
+    dry_run=False,
+    chunk_size=None,
+):
+    """
+    Re-score stored indexes with a new scoring configuration
+
+    Args:
+        storage: StorageBackend holding the indexes and normalized scores
+        config: New ScoringConfig
+        previous: ScoringConfig the stored scores were calculated with
+            (default: the built-in configuration)
+        start: First date to recompute (YYYY-MM-DD, default: unbounded)
+        end: Last date to recompute (YYYY-MM-DD, default: unbounded)
+        dry_run: Only report what would change
+        chunk_size: Maximum rows per bulk write (default: the storage's)
+
+    Returns:
+        dict: Report with the re-scored dimensions, the number of dates
+        checked, the normalized_scores and index rows changed and the
+        number of failed writes
+    """
+    previous = previous or ScoringConfig()
+    dimensions = config.changed_dimensions(previous)
+    reweight = config.weights_changed(previous)
+
+    report = {
+        "dimensions": dimensions,
+        "reweighted": reweight,
+        "dates": 0,
+        "normalized_scores": 0,
+        "indexes": 0,
+        "failed": 0,
+    }
+    if not dimensions and not reweight:
+        print(f"Scoring v{config.version} matches v{previous.version}, nothing to do")
+        return report
+
+    changed_rows, dimension_scores = [], {}
+    if dimensions:
+        changed_rows, dimension_scores = _rescore_dimensions(
+            storage.get_normalized_scores(start, end, dimensions), dimensions, config
+        )
+
+    index_rows = storage.get_indexes(start, end)
+    changed_indexes = _recalculate_indexes(
+        index_rows, dimension_scores, config, reweight
+    )
+
+    report["dates"] = len(index_rows)
+    report["normalized_scores"] = len(changed_rows)
+    report["indexes"] = len(changed_indexes)
+
+    if not dry_run:
+        for table, write, rows in [
+            (
+                "normalized_scores",
+                storage.update_normalized_scores_bulk,
+                changed_rows,
+            ),
+            ("indexes", storage.store_indexes_bulk, changed_indexes),
+        ]:
+            if not rows:
+                continue
+            failed = write(rows, chunk_size)["failed"]
+            if failed:
+                print(f"Failed to update {len(failed)} {table}: {failed[0]['error']}")
+            report["failed"] += len(failed)
+
+    action = "Would update" if dry_run else "Updated"
+    print(
+        f"{action} {report['normalized_scores']} normalized scores and "
+        f"{report['indexes']} of {report['dates']} indexes "
+        f"(re-scored: {', '.join(dimensions) or 'none'}, "
+        f"reweighted: {'yes' if reweight else 'no'})"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recompute stored indexes after a scoring configuration change"
+    )
+    parser.add_argument(
+        "--config", required=True, help="JSON file with the new scoring config"
+    )
+    parser.add_argument(
+        "--previous",
+        default=None,
+        help="JSON file with the config the stored scores used (default: built-in)",
+    )
+    parser.add_argument("--start", default=None, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Last date (YYYY-MM-DD)")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report changes without writing"
+    )
+    args = parser.parse_args()
+
+    previous = load_scoring_config(args.previous) if args.previous else None
+    report = recompute_index(
+        get_storage_backend(),
+        load_scoring_config(args.config),
+        previous=previous,
+        start=args.start,
+        end=args.end,
+        dry_run=args.dry_run,
+    )
+    raise SystemExit(1 if report["failed"] else 0)
@@ -1,7 +1,11 @@
 # run_daily_update.py
 import logging
+import os
 from datetime import datetime
 from backend.pipeline.green_city_index import GreenCityIndex
+from backend.pipeline.instrumentation import Instrumentation
+from backend.storage.factory import get_storage_backend
+from backend.storage.history_store import PartitionedHistoryStore
 
 
 def main():
@@ -18,8 +22,13 @@ def main():
     )
     logger = logging.getLogger("green_city_index")
 
-    # Initialize Green City Index
-    gci = GreenCityIndex()
+    # Initialize Green City Index, persisting results to the configured backend
+    instrumentation = Instrumentation("daily_update")
+    storage = get_storage_backend()
+    gci = GreenCityIndex(
+        storage=storage, instrumentation=instrumentation, write_behind=True
+    )
+    status = "failed"
 
     try:
         # Collect data and calculate index
@@ -30,6 +39,14 @@ def main():
         # Calculate the index
         logger.info("Calculating Green City Index...")
         index = gci.calculate_index(raw_data)
+        if index["partial"]:
+            # The raw data of the other dimensions is still stored
+            logger.error(
+                "Index not stored, no data for "
+                + ", ".join(index["missing_dimensions"])
+            )
+            status = "partial"
+            return False
 
         # Log results
         logger.info(
@@ -37,11 +54,44 @@ def main():
         )
         logger.info(f"Dimension scores: {index['dimension_scores']}")
 
+        # Wait until the raw data and scores handed to the writer are stored
+        report = gci.flush()
+        stored_all = not report["failed"] and not report["pending"]
+        if stored_all:
+            logger.info(f"Stored {report['stored']} rows")
+        else:
+            logger.warning(
+                f"Stored {report['stored']} rows, failed to store "
+                f"{len(report['failed'])} rows, {report['pending']} writes pending"
+            )
+
+        # Append today's result to the partitioned history in data/
+        with instrumentation.stage("stage.append_history"):
+            history = PartitionedHistoryStore()
+            history.append(index)
+        logger.info(f"Appended {index['date']} to history in {history.root}")
+
+        if not stored_all:
+            return False
+        status = "success"
         return True
     except Exception as e:
         logger.error(f"Error in Green City Index update: {e}")
         return False
+    finally:
+        # Stop the writer, then deliver writes still queued in the outbox,
+        # if one is configured
+        gci.close()
+        with instrumentation.stage("stage.close_storage"):
+            storage.close()
+
+        # Timings, call counts and errors of this run
+        report_path = instrumentation.write_report("logs", status)
+        logger.info(f"Run report written to {report_path}")
+        textfile = os.getenv("AGCI_PROMETHEUS_TEXTFILE")
+        if textfile:
+            instrumentation.write_prometheus(textfile, status)
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(0 if main() else 1)
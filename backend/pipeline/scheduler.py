@@ -0,0 +1,378 @@
+# scheduler.py
+"""
+Resident scheduler for the Green City Index
+
+Keeps one GreenCityIndex, its HTTP session and storage client warm and
+collects each dimension on its own interval, e.g. air hourly and nature
+weekly. After collecting, and at most every snapshot interval, an intraday
+index snapshot is computed from the latest data of every dimension; it
+replaces today's index in storage and is appended to the history.
+
+Usage:
+    python -m backend.pipeline.scheduler
+    python -m backend.pipeline.scheduler --interval air=30m --interval nature=7d
+    python -m backend.pipeline.scheduler --once
+"""
+
+import argparse
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime
+
+from backend.pipeline.green_city_index import GreenCityIndex
+from backend.pipeline.instrumentation import Instrumentation
+from backend.storage.factory import get_storage_backend
+from backend.storage.history_store import PartitionedHistoryStore
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock, run without the process lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds between collections of each dimension
+DEFAULT_INTERVALS = {
+    "air": 3600,
+    "water": 86400,
+    "nature": 7 * 86400,
+    "waste": 86400,
+    "noise": 86400,
+}
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_interval(value):
+    """
+    Parse a duration such as "90", "30m", "1h" or "7d" into seconds
+
+    Returns:
+        float: Seconds
+    """
+    value = str(value).strip().lower()
+    if value and value[-1] in UNITS:
+        return float(value[:-1]) * UNITS[value[-1]]
+    return float(value)
+
+
+def parse_intervals(specs):
+    """
+    Parse "dimension=duration" pairs, separated by commas or given as a list,
+    over DEFAULT_INTERVALS
+
+    Returns:
+        dict: Dimension -> seconds
+    """
+    if isinstance(specs, str):
+        specs = specs.split(",")
+    intervals = dict(DEFAULT_INTERVALS)
+    for spec in specs or []:
+        if not spec.strip():
+            continue
+        dimension, _, duration = spec.partition("=")
+        dimension = dimension.strip()
+        if dimension not in DEFAULT_INTERVALS:
+            raise ValueError(f"Unknown dimension in schedule: {dimension}")
+        intervals[dimension] = parse_interval(duration)
+    return intervals
+
+
+class SchedulerLock:
+    """
+    Exclusive lock file so two schedulers on one host never collect and
+    store at the same time
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """
+        Returns:
+            bool: Whether the lock was acquired
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a")
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+        return True
+
+    def release(self):
+        if self._file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class CollectionScheduler:
+    def __init__(
+        self,
+        gci,
+        intervals=None,
+        snapshot_interval=3600,
+        jitter=0.1,
+        retry_interval=300,
+        history=None,
+        instrumentation=None,
+        prometheus_path=None,
+    ):
+        """
+        Args:
+            gci: GreenCityIndex to collect with, kept for the whole run
+            intervals: Dimension -> seconds between collections
+                (default: DEFAULT_INTERVALS)
+            snapshot_interval: Minimum seconds between index snapshots
+            jitter: Random fraction added to or taken from every interval,
+                so runs don't align with other jobs or API rate limits
+            retry_interval: Seconds before retrying a dimension whose
+                collection failed, if shorter than its interval
+            history: PartitionedHistoryStore receiving the snapshots, or None
+            instrumentation: The Instrumentation gci records to, written
+                as a Prometheus textfile after every cycle
+            prometheus_path: Textfile for instrumentation
+
+        Raises:
+            RuntimeError: If gci's storage holds duplicate normalized scores,
+                see add_unique_keys
+        """
+        self.gci = gci
+        # Every snapshot writes today's normalized scores again; upsert them
+        # on (dimension, metric_name, date) rather than adding rows
+        if gci.storage is not None:
+            gci.storage.enable_idempotent_writes()
+        self.intervals = dict(intervals or DEFAULT_INTERVALS)
+        self.snapshot_interval = snapshot_interval
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+        self.history = history
+        self.instrumentation = instrumentation
+        self.prometheus_path = prometheus_path
+
+        # Everything is due on start
+        self.next_run = {dim: 0.0 for dim in self.intervals}
+        self.next_snapshot = 0.0
+        self.latest = {}
+        self.pending_snapshot = False
+        self.last_index = None
+        # Runs that raised and snapshots whose writes failed
+        self.failures = 0
+        self._stop = threading.Event()
+
+    def _jittered(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def due(self, now):
+        """Return the dimensions whose collection is due"""
+        return [dim for dim, at in self.next_run.items() if at <= now]
+
+    def missing_dimensions(self):
+        """Return the dimensions of the index without good data yet"""
+        return [dim for dim in self.gci.weights if dim not in self.latest]
+
+    def run_pending(self, now=None):
+        """
+        Collect the due dimensions and take a snapshot if one is due
+
+        Jobs run one after another in the calling thread, so a slow
+        collection delays the next one instead of overlapping it; the next
+        run of a dimension is scheduled from when its collection finished.
+
+        Args:
+            now: time.monotonic() reading (default: now)
+
+        Returns:
+            dict: Collected dimensions and the snapshot index, if any
+        """
+        clock = time.monotonic if now is None else (lambda: now)
+        now = clock()
+        result = {"collected": [], "snapshot": None}
+
+        dimensions = self.due(now)
+        if dimensions:
+            raw_data = self.gci.collect_all_data(dimensions=dimensions)
+            finished = clock()
+            for dim in dimensions:
+                interval = self.intervals[dim]
+                if raw_data.get(dim):
+                    self.latest[dim] = raw_data[dim]
+                else:
+                    # Keep the last good data and retry soon
+                    interval = min(interval, self.retry_interval)
+                self.next_run[dim] = finished + self._jittered(interval)
+            result["collected"] = dimensions
+
+            # A snapshot before every dimension has data would be partial
+            missing = self.missing_dimensions()
+            if missing:
+                logger.warning(
+                    "No snapshot until data is collected for " + ", ".join(missing)
+                )
+            else:
+                self.pending_snapshot = True
+
+        if self.pending_snapshot and now >= self.next_snapshot:
+            result["snapshot"] = self.snapshot()
+            self.next_snapshot = now + self.snapshot_interval
+            self.pending_snapshot = False
+
+        if self.instrumentation is not None and self.prometheus_path:
+            self.instrumentation.write_prometheus(
+                self.prometheus_path, "failed" if self.failures else "success"
+            )
+        return result
+
+    def snapshot(self):
+        """
+        Compute the index from the latest data of every dimension, store it
+        as today's index and append it to the history
+
+        Returns:
+            dict: The index, or None while dimensions lack data; a partial
+            index is neither stored nor appended to the history
+        """
+        raw_data = dict(self.latest, timestamp=datetime.now().isoformat())
+        index = self.gci.calculate_index(raw_data)
+        if index["partial"]:
+            logger.warning(
+                "Skipping snapshot, no data for "
+                + ", ".join(index["missing_dimensions"])
+            )
+            return None
+
+        report = self.gci.flush()
+        if report["failed"]:
+            logger.warning(f"Failed to store {len(report['failed'])} snapshot rows")
+            self.failures += 1
+        if self.history is not None:
+            self.history.append(index)
+        logger.info(
+            f"Index snapshot {index['timestamp']}: {index['overall_score']} "
+            f"{index['dimension_scores']}"
+        )
+        self.last_index = index
+        return index
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the next collection or pending snapshot is due"""
+        now = time.monotonic() if now is None else now
+        upcoming = list(self.next_run.values())
+        if self.pending_snapshot:
+            upcoming.append(self.next_snapshot)
+        return max(0.0, min(upcoming) - now)
+
+    def run(self):
+        """Run jobs as they fall due until stop() is called"""
+        logger.info(
+            "Scheduler started with intervals "
+            + ", ".join(f"{dim}={sec:g}s" for dim, sec in self.intervals.items())
+        )
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Scheduled run failed: {e}")
+                self.failures += 1
+            self._stop.wait(self.seconds_until_next())
+        logger.info("Scheduler stopped")
+
+    def stop(self, *args):
+        """Stop after the running job; usable as a signal handler"""
+        self._stop.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Collect Green City Index data on per-dimension intervals"
+    )
+    parser.add_argument(
+        "--interval",
+        action="append",
+        default=None,
+        help="dimension=duration, e.g. air=1h or nature=7d (repeatable, "
+        "default: AGCI_SCHEDULE)",
+    )
+    parser.add_argument(
+        "--snapshot-interval",
+        default=os.getenv("AGCI_SNAPSHOT_INTERVAL", "1h"),
+        help="Minimum time between index snapshots",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.1,
+        help="Random fraction added to or taken from each interval",
+    )
+    parser.add_argument(
+        "--lock",
+        default=os.path.join("data", "local", "scheduler.lock"),
+        help="Lock file preventing overlapping schedulers",
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Collect everything once and exit"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    lock = SchedulerLock(args.lock)
+    if not lock.acquire():
+        logger.error(f"Another scheduler holds {args.lock}, exiting")
+        return 1
+
+    instrumentation = Instrumentation("scheduler")
+    storage = get_storage_backend()
+    gci = GreenCityIndex(
+        storage=storage, instrumentation=instrumentation, write_behind=True
+    )
+    scheduler = CollectionScheduler(
+        gci,
+        intervals=parse_intervals(args.interval or os.getenv("AGCI_SCHEDULE", "")),
+        snapshot_interval=parse_interval(args.snapshot_interval),
+        jitter=args.jitter,
+        history=PartitionedHistoryStore(),
+        instrumentation=instrumentation,
+        prometheus_path=os.getenv("AGCI_PROMETHEUS_TEXTFILE"),
+    )
+
+    # Finish the running job, then flush and exit
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+
+    status = "failed"
+    try:
+        if args.once:
+            result = scheduler.run_pending()
+            status = "success" if result["snapshot"] is not None else "partial"
+        else:
+            scheduler.run()
+            status = "success"
+    finally:
+        report = gci.close()
+        storage.close()
+        if scheduler.failures or report["failed"] or report["pending"]:
+            status = "failed"
+        instrumentation.write_report("logs", status)
+        lock.release()
+    return 0 if status == "success" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
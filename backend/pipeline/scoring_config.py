@@ -0,0 +1,112 @@
+# scoring_config.py
+"""
+Versioned scoring configuration of the Green City Index
+
+A configuration bundles the dimension weights and the metric scales with a
+version string. The built-in default is version "1"; a methodology update is
+described by a JSON file such as
+
+    {
+        "version": "2",
+        "weights": {"air": 0.3, "water": 0.2, "nature": 0.2,
+                    "waste": 0.15, "noise": 0.15},
+        "scales": {"air": {"pm2_5": [5.0, 15.0, "lower_is_better", 1.0]}}
+    }
+
+where weights and scales not listed keep their default values.
+"""
+
+import copy
+import json
+import os
+
+from backend.collectors.normalization import METRIC_SCALES
+from backend.pipeline.index_calculator import DEFAULT_WEIGHTS, IndexCalculator
+
+DEFAULT_VERSION = "1"
+
+
+class ScoringConfig:
+    def __init__(self, version=DEFAULT_VERSION, weights=None, scales=None):
+        """
+        Args:
+            version: Version of the methodology
+            weights: Dict of dimension -> weight (default: DEFAULT_WEIGHTS)
+            scales: Metric scales shaped like METRIC_SCALES (default:
+                METRIC_SCALES)
+        """
+        self.version = str(version)
+        self.weights = dict(weights if weights is not None else DEFAULT_WEIGHTS)
+        self.scales = copy.deepcopy(scales if scales is not None else METRIC_SCALES)
+
+    @property
+    def calculation_method(self):
+        """Label stored with every normalized score"""
+        return f"linear_scaling:v{self.version}"
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a configuration, filling unlisted weights and scales from
+        the defaults"""
+        weights = dict(DEFAULT_WEIGHTS)
+        weights.update(data.get("weights", {}))
+
+        scales = copy.deepcopy(METRIC_SCALES)
+        for dimension, metrics in data.get("scales", {}).items():
+            scales.setdefault(dimension, {}).update(
+                {metric: tuple(scale) for metric, scale in metrics.items()}
+            )
+
+        return cls(data.get("version", DEFAULT_VERSION), weights, scales)
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "weights": dict(self.weights),
+            "scales": {
+                dimension: {metric: list(scale) for metric, scale in metrics.items()}
+                for dimension, metrics in self.scales.items()
+            },
+        }
+
+    def calculator(self):
+        """Return an IndexCalculator using this configuration"""
+        return IndexCalculator(dict(self.weights), self.scales)
+
+    def changed_dimensions(self, previous):
+        """
+        Compare the scales with a previous configuration
+
+        Returns:
+            list: Dimensions whose metric scales differ, i.e. whose scores
+            must be recalculated from raw values
+        """
+        dimensions = set(self.scales) | set(previous.scales)
+        return sorted(
+            dim
+            for dim in dimensions
+            if self.scales.get(dim) != previous.scales.get(dim)
+        )
+
+    def weights_changed(self, previous):
+        """Whether the overall score must be reweighted"""
+        return self.weights != previous.weights
+
+
+def load_scoring_config(path=None):
+    """
+    Load a scoring configuration
+
+    Args:
+        path: JSON configuration file (default: AGCI_SCORING_CONFIG
+            environment variable; without either the built-in default)
+
+    Returns:
+        ScoringConfig: The configuration
+    """
+    path = path or os.getenv("AGCI_SCORING_CONFIG")
+    if not path:
+        return ScoringConfig()
+
+    with open(path, "r") as f:
+        return ScoringConfig.from_dict(json.load(f))
@@ -0,0 +1,191 @@
+# write_behind.py
+"""
+Write-behind queue between the pipeline and its storage sink
+
+The pipeline hands rows to a WriteBehindWriter and carries on; a background
+thread performs the storage calls. Consecutive bulk writes to the same
+method are coalesced into one call. flush() waits until everything handed
+over so far has been written.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindWriter:
+    def __init__(self, storage, max_queue=1000, batch_size=500, chunk_size=None):
+        """
+        Args:
+            storage: StorageBackend receiving the writes
+            max_queue: Writes held before submit() blocks the caller
+            batch_size: Maximum rows coalesced into one bulk call
+            chunk_size: Maximum rows per bulk insert (default: the storage's)
+        """
+        self.storage = storage
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._carry = None
+        self._stop = threading.Event()
+
+        # Writes submitted but not yet finished, and their combined report
+        self._pending = 0
+        self._done = threading.Condition()
+        self._report = {"stored": 0, "failed": []}
+
+        self._thread = threading.Thread(
+            target=self._run, name="gci-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, method, rows):
+        """
+        Queue rows for a storage method
+
+        Methods ending in "_bulk" get the list of rows in one call, any other
+        method is called once per row with the row as keyword arguments.
+        Raw metrics without a collection_timestamp are stamped with the
+        submit time, so metrics of separate submits coalesced into one call
+        stay separate rows. Blocks while the queue is full.
+
+        Args:
+            method: Storage method name, e.g. "store_raw_metrics_bulk"
+            rows: List of row dicts
+        """
+        if not rows:
+            return
+        if method == "store_raw_metrics_bulk":
+            collection_timestamp = datetime.now().isoformat()
+            rows = [
+                {
+                    **row,
+                    "collection_timestamp": row.get("collection_timestamp")
+                    or collection_timestamp,
+                }
+                for row in rows
+            ]
+        with self._done:
+            self._pending += 1
+        self._queue.put((method, list(rows)))
+
+    def _next_batch(self):
+        """Take the next write and coalesce the bulk writes queued behind it"""
+        if self._carry is not None:
+            (method, rows), self._carry = self._carry, None
+        else:
+            method, rows = self._queue.get()
+        if method is None:
+            return None, rows, 1
+
+        count = 1
+        while method.endswith("_bulk") and len(rows) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] != method or len(rows) + len(item[1]) > self.batch_size:
+                self._carry = item
+                break
+            rows = rows + item[1]
+            count += 1
+        return method, rows, count
+
+    def _write(self, method, rows):
+        """Perform one storage call, returning its report"""
+        func = getattr(self.storage, method)
+        try:
+            if method.endswith("_bulk"):
+                return func(rows, self.chunk_size)
+
+            report = {"stored": 0, "failed": []}
+            for i, row in enumerate(rows):
+                if func(**row):
+                    report["stored"] += 1
+                else:
+                    report["failed"].append(
+                        {"index": i, "row": row, "error": f"{method} failed"}
+                    )
+            return report
+        except Exception as e:
+            return {
+                "stored": 0,
+                "failed": [
+                    {"index": i, "row": row, "error": str(e)}
+                    for i, row in enumerate(rows)
+                ],
+            }
+
+    def _run(self):
+        while not self._stop.is_set():
+            method, rows, count = self._next_batch()
+            if method is None:
+                break
+
+            report = self._write(method, rows)
+            if report["failed"]:
+                logger.error(
+                    f"Failed to write {len(report['failed'])} of {len(rows)} rows "
+                    f"with {method}: {report['failed'][0]['error']}"
+                )
+            with self._done:
+                self._report["stored"] += report["stored"]
+                self._report["failed"].extend(
+                    dict(failed, method=method) for failed in report["failed"]
+                )
+                self._pending -= count
+                self._done.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every submitted write has been performed
+
+        Args:
+            timeout: Maximum seconds to wait (default: no limit)
+
+        Returns:
+            dict: Rows stored and failed since the previous flush, failed
+            rows carrying the method they were written with; "pending" is
+            the number of writes still queued when the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._done:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._done.wait(remaining)
+
+            report = dict(self._report, pending=self._pending)
+            self._report = {"stored": 0, "failed": []}
+        return report
+
+    def close(self, timeout=None):
+        """
+        Flush, then stop the background thread
+
+        Args:
+            timeout: Maximum seconds to wait in total (default: no limit).
+                Writes still queued when it expires are not performed and
+                are counted as pending in the report.
+
+        Returns:
+            dict: The report of the final flush
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        report = self.flush(timeout)
+        if self._thread.is_alive():
+            self._stop.set()
+            try:
+                # Wakes the thread if it waits for a write
+                self._queue.put_nowait((None, []))
+            except queue.Full:
+                # It is busy writing and stops after the current write
+                pass
+            remaining = None if deadline is None else deadline - time.monotonic()
+            self._thread.join(None if remaining is None else max(remaining, 0))
+        return report
@@ -0,0 +1,324 @@
+# backend/storage/base.py
+import logging
+from abc import ABC, abstractmethod
+
+from backend.storage.rollups import (
+    ROLLUP_METRICS,
+    ROLLUP_PERIODS,
+    compute_rollups,
+    period_bounds,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class StorageBackend(ABC):
+    """
+    Interface shared by every persistence layer of the Green City Index
+
+    Bulk methods return a report dict of the form
+    {"stored": int, "failed": [{"index", "row", "error"}, ...]}; single-row
+    methods return a success bool.
+    """
+
+    # Whether raw metrics and normalized scores are upserted on their natural
+    # keys instead of inserted, see enable_idempotent_writes
+    idempotent_writes = False
+
+    @abstractmethod
+    def store_raw_metric(self, dimension, metric_name, value, unit, source):
+        """Store one raw metric"""
+
+    @abstractmethod
+    def store_raw_metrics_bulk(self, rows, chunk_size=None):
+        """Store many raw metrics, see SupabaseManager.store_raw_metrics_bulk"""
+
+    @abstractmethod
+    def store_normalized_score(
+        self,
+        dimension,
+        metric_name,
+        raw_value,
+        normalized_score,
+        calculation_method,
+        date,
+    ):
+        """Store one normalized score"""
+
+    @abstractmethod
+    def store_normalized_scores_bulk(self, rows, chunk_size=None):
+        """Store many normalized scores"""
+
+    @abstractmethod
+    def update_normalized_scores_bulk(self, rows, chunk_size=None):
+        """Overwrite stored normalized scores keyed on their id"""
+
+    @abstractmethod
+    def store_dimension_score(self, dimension, score, date):
+        """Upsert one dimension score keyed on (dimension, date)"""
+
+    @abstractmethod
+    def store_index(self, date, overall_score, dimension_scores, target_score):
+        """Upsert the index and its dimension scores for one date"""
+
+    @abstractmethod
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        """Upsert the index and dimension scores for many dates"""
+
+    @abstractmethod
+    def get_latest_index(self):
+        """Return the most recent index row, or None"""
+
+    @abstractmethod
+    def get_historical_index(self, days=30):
+        """Return the latest N index rows, newest first"""
+
+    @abstractmethod
+    def query_index(self, start=None, end=None, columns=None, page_size=None):
+        """
+        Stream green_city_index rows between two dates (inclusive)
+
+        Rows are fetched one page at a time using keyset pagination on date
+        and yielded oldest first, with only the requested columns.
+        """
+
+    @abstractmethod
+    def query_dimension_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        """Stream dimension_scores rows ordered by (date, dimension)"""
+
+    @abstractmethod
+    def query_normalized_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        """Stream normalized_scores rows ordered by (date, id)"""
+
+    def get_indexes(self, start=None, end=None):
+        """Return index rows between two dates (inclusive), oldest first"""
+        return list(self.query_index(start, end))
+
+    def get_normalized_scores(self, start=None, end=None, dimensions=None):
+        """Return normalized score rows, including their id, between two
+        dates (inclusive), oldest first"""
+        return list(self.query_normalized_scores(start, end, dimensions=dimensions))
+
+    @abstractmethod
+    def store_rollups(self, rollups, chunk_size=None):
+        """Upsert rollup rows keyed on (period, period_start, metric)"""
+
+    @abstractmethod
+    def query_rollups(
+        self,
+        period="month",
+        start=None,
+        end=None,
+        metrics=None,
+        columns=None,
+        page_size=None,
+    ):
+        """
+        Stream materialized rollups of one period type
+
+        Args:
+            period: 'week' or 'month'
+            start: First period start to include (YYYY-MM-DD)
+            end: Last period start to include (YYYY-MM-DD)
+            metrics: Only return these metrics, e.g. ["overall", "air"]
+                (default: all)
+            columns: Columns to return (default: all)
+            page_size: Rows per request
+
+        Yields:
+            dict: Rollup rows ordered by period_start and metric
+        """
+
+    def get_rollups(self, period="month", start=None, end=None, metrics=None):
+        """Return materialized rollups, see query_rollups"""
+        return list(self.query_rollups(period, start, end, metrics))
+
+    def refresh_rollups(self, dates):
+        """
+        Recalculate the weekly and monthly rollups of the periods containing
+        the given dates
+
+        Returns:
+            dict: Report of the rollup upsert
+        """
+        periods = {
+            period: {period_bounds(date, period) for date in dates}
+            for period in ROLLUP_PERIODS
+        }
+        bounds = [bound for spans in periods.values() for bound in spans]
+        if not bounds:
+            return {"stored": 0, "failed": []}
+
+        rows = list(
+            self.query_index(
+                min(start for start, _ in bounds),
+                max(end for _, end in bounds),
+                columns=["date"] + list(ROLLUP_METRICS.values()),
+            )
+        )
+        rollups = []
+        for period, spans in periods.items():
+            starts = {start for start, _ in spans}
+            rollups.extend(
+                row
+                for row in compute_rollups(rows, period)
+                if row["period_start"] in starts
+            )
+        return self.store_rollups(rollups)
+
+    def enable_idempotent_writes(self):
+        """
+        Upsert raw metrics on (dimension, metric_name, collection_timestamp)
+        and normalized scores on (dimension, metric_name, date), so writing
+        the same rows again replaces them instead of duplicating them
+
+        The database must have these unique keys; see the README.
+        """
+        self.idempotent_writes = True
+
+    def close(self):
+        """Release resources and finish pending work; nothing by default"""
+
+    def _refresh_rollups_after_write(self, dates):
+        """Keep the rollups current after storing indexes; a failure here
+        never fails the index write itself"""
+        try:
+            report = self.refresh_rollups(dates)
+            if report["failed"]:
+                logger.warning(
+                    f"Failed to refresh {len(report['failed'])} rollups: "
+                    f"{report['failed'][0]['error']}"
+                )
+        except Exception as e:
+            logger.warning(f"Failed to refresh rollups: {e}")
+
+
+class StorageWrapper(StorageBackend):
+    """
+    Storage backend that passes every call through to another backend
+
+    Base of the backends layered in front of a database, such as the read
+    cache and the outbox, which override only the calls they change.
+    """
+
+    def __init__(self, backend):
+        """
+        Args:
+            backend: StorageBackend to wrap
+        """
+        self.backend = backend
+
+    def __getattr__(self, name):
+        # Backend-specific helpers, e.g. SupabaseManager.get_client
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    @property
+    def idempotent_writes(self):
+        return self.backend.idempotent_writes
+
+    def enable_idempotent_writes(self):
+        self.backend.enable_idempotent_writes()
+
+    def store_raw_metric(self, dimension, metric_name, value, unit, source):
+        return self.backend.store_raw_metric(
+            dimension, metric_name, value, unit, source
+        )
+
+    def store_raw_metrics_bulk(self, rows, chunk_size=None):
+        return self.backend.store_raw_metrics_bulk(rows, chunk_size)
+
+    def store_normalized_score(
+        self,
+        dimension,
+        metric_name,
+        raw_value,
+        normalized_score,
+        calculation_method,
+        date,
+    ):
+        return self.backend.store_normalized_score(
+            dimension,
+            metric_name,
+            raw_value,
+            normalized_score,
+            calculation_method,
+            date,
+        )
+
+    def store_normalized_scores_bulk(self, rows, chunk_size=None):
+        return self.backend.store_normalized_scores_bulk(rows, chunk_size)
+
+    def update_normalized_scores_bulk(self, rows, chunk_size=None):
+        return self.backend.update_normalized_scores_bulk(rows, chunk_size)
+
+    def store_dimension_score(self, dimension, score, date):
+        return self.backend.store_dimension_score(dimension, score, date)
+
+    def store_index(self, date, overall_score, dimension_scores, target_score):
+        return self.backend.store_index(
+            date, overall_score, dimension_scores, target_score
+        )
+
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        return self.backend.store_indexes_bulk(indexes, chunk_size)
+
+    def get_latest_index(self):
+        return self.backend.get_latest_index()
+
+    def get_historical_index(self, days=30):
+        return self.backend.get_historical_index(days)
+
+    def query_index(self, start=None, end=None, columns=None, page_size=None):
+        return self.backend.query_index(start, end, columns, page_size)
+
+    def query_dimension_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        return self.backend.query_dimension_scores(
+            start, end, columns, page_size, dimensions
+        )
+
+    def query_normalized_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        return self.backend.query_normalized_scores(
+            start, end, columns, page_size, dimensions
+        )
+
+    def get_indexes(self, start=None, end=None):
+        return self.backend.get_indexes(start, end)
+
+    def get_normalized_scores(self, start=None, end=None, dimensions=None):
+        return self.backend.get_normalized_scores(start, end, dimensions)
+
+    def store_rollups(self, rollups, chunk_size=None):
+        return self.backend.store_rollups(rollups, chunk_size)
+
+    def query_rollups(
+        self,
+        period="month",
+        start=None,
+        end=None,
+        metrics=None,
+        columns=None,
+        page_size=None,
+    ):
+        return self.backend.query_rollups(
+            period, start, end, metrics, columns, page_size
+        )
+
+    def get_rollups(self, period="month", start=None, end=None, metrics=None):
+        return self.backend.get_rollups(period, start, end, metrics)
+
+    def refresh_rollups(self, dates):
+        return self.backend.refresh_rollups(dates)
+
+    def close(self):
+        return self.backend.close()
@@ -0,0 +1,63 @@
+# backend/storage/factory.py
+import os
+from dotenv import load_dotenv
+
+
+def get_storage_backend(name=None, cache_ttl=None, outbox_path=None):
+    """
+    Create the storage backend selected by configuration
+
+    Args:
+        name: 'supabase' or 'sqlite' (default: AGCI_STORAGE_BACKEND
+            environment variable, falling back to 'supabase')
+        cache_ttl: Seconds to cache index reads; 0 disables the read cache
+            (default: AGCI_READ_CACHE_TTL environment variable, or 0). Set
+            AGCI_READ_CACHE_PATH to share cached reads between processes.
+        outbox_path: Queue writes in this durable outbox file and deliver
+            them in the background, see OutboxStorage (default:
+            AGCI_OUTBOX_PATH environment variable; empty disables it).
+            AGCI_OUTBOX_FLUSH_TIMEOUT bounds how long close() waits for
+            queued writes.
+
+    Returns:
+        StorageBackend: The configured backend
+    """
+    load_dotenv()
+    name = (name or os.getenv("AGCI_STORAGE_BACKEND", "supabase")).lower()
+
+    if name == "supabase":
+        from backend.storage.supabase_client import SupabaseManager
+
+        backend = SupabaseManager()
+    elif name == "sqlite":
+        from backend.storage.sqlite_backend import SQLiteStorage
+
+        backend = SQLiteStorage()
+    else:
+        raise ValueError(f"Unknown storage backend: {name}")
+
+    if outbox_path is None:
+        outbox_path = os.getenv("AGCI_OUTBOX_PATH", "")
+    if outbox_path:
+        from backend.storage.outbox import Outbox, OutboxStorage
+
+        backend = OutboxStorage(
+            backend,
+            Outbox(outbox_path),
+            flush_timeout=float(os.getenv("AGCI_OUTBOX_FLUSH_TIMEOUT", "30")),
+        )
+
+    if cache_ttl is None:
+        cache_ttl = float(os.getenv("AGCI_READ_CACHE_TTL", "0"))
+    if cache_ttl > 0:
+        from backend.storage.read_cache import CachedStorage, ReadCache
+
+        cache = ReadCache(ttl=cache_ttl, shared_path=os.getenv("AGCI_READ_CACHE_PATH"))
+        cached = CachedStorage(backend, cache)
+        if outbox_path:
+            # Queued writes reach the database later; reads cached in between
+            # would hide them until they expire
+            backend.on_delivered(cached.written)
+        backend = cached
+
+    return backend
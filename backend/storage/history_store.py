@@ -0,0 +1,151 @@
+# backend/storage/history_store.py
+"""
+Append-only history of Green City Index results, partitioned by month
+
+Each month lives in its own JSON Lines file under year=YYYY/month=MM/ and a
+small manifest records the date range and row count of every partition.
+A daily run appends one line to one partition, and readers only open the
+partitions that overlap the dates they ask for.
+"""
+
+import argparse
+import json
+import os
+
+MANIFEST_FILE = "manifest.json"
+PARTITION_FILE = "index.jsonl"
+
+
+class PartitionedHistoryStore:
+    def __init__(self, root=None):
+        """
+        Args:
+            root: Directory of the store (default: AGCI_HISTORY_DIR or
+                data/history)
+        """
+        self.root = root or os.getenv(
+            "AGCI_HISTORY_DIR", os.path.join("data", "history")
+        )
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILE)
+
+    def _partition_key(self, date_str):
+        """Return the YYYY-MM partition for a YYYY-MM-DD date"""
+        return date_str[:7]
+
+    def _partition_path(self, key):
+        """Relative path of a partition file"""
+        year, month = key.split("-")
+        return os.path.join(f"year={year}", f"month={month}", PARTITION_FILE)
+
+    def load_manifest(self):
+        """Return the manifest, or an empty one for a new store"""
+        if not os.path.exists(self.manifest_path):
+            return {"partitions": {}}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        """Atomically replace the manifest"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, self.manifest_path)
+
+    def append(self, index):
+        """Append one index result to its month partition"""
+        return self.append_many([index])
+
+    def append_many(self, indexes):
+        """
+        Append index results, each to the partition of its date
+
+        Appending a date that is already stored adds a newer version of it;
+        readers return the latest version.
+
+        Returns:
+            int: Number of records appended
+        """
+        manifest = self.load_manifest()
+        partitions = manifest["partitions"]
+
+        by_partition = {}
+        for index in indexes:
+            by_partition.setdefault(self._partition_key(index["date"]), []).append(
+                index
+            )
+
+        for key, records in sorted(by_partition.items()):
+            relative_path = self._partition_path(key)
+            path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as f:
+                for index in records:
+                    f.write(json.dumps(index, separators=(",", ":")) + "\n")
+
+            dates = [index["date"] for index in records]
+            entry = partitions.get(key)
+            if entry is None:
+                entry = partitions[key] = {
+                    "path": relative_path,
+                    "min_date": min(dates),
+                    "max_date": max(dates),
+                    "rows": 0,
+                }
+            entry["min_date"] = min(entry["min_date"], *dates)
+            entry["max_date"] = max(entry["max_date"], *dates)
+            entry["rows"] += len(records)
+
+        self._save_manifest(manifest)
+        return len(indexes)
+
+    def read(self, start=None, end=None):
+        """
+        Read index results for a date range
+
+        Args:
+            start: First date to include (YYYY-MM-DD, default: unbounded)
+            end: Last date to include (YYYY-MM-DD, default: unbounded)
+
+        Returns:
+            list: Index results in date order, one per date
+        """
+        latest = {}
+        for key, entry in sorted(self.load_manifest()["partitions"].items()):
+            if start and entry["max_date"] < start:
+                continue
+            if end and entry["min_date"] > end:
+                continue
+
+            with open(os.path.join(self.root, entry["path"]), "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    index = json.loads(line)
+                    if start and index["date"] < start:
+                        continue
+                    if end and index["date"] > end:
+                        continue
+                    latest[index["date"]] = index
+
+        return [latest[date] for date in sorted(latest)]
+
+
+if __name__ == "__main__":
+    from backend.pipeline.load_historic_data import iter_json_records
+
+    parser = argparse.ArgumentParser(
+        description="Import a JSON index history into the partitioned store"
+    )
+    parser.add_argument(
+        "--file",
+        default="data/processed/green_city_index_complete_history.json",
+        help="JSON history file to import",
+    )
+    parser.add_argument("--root", default=None, help="Directory of the store")
+    args = parser.parse_args()
+
+    store = PartitionedHistoryStore(args.root)
+    count = store.append_many(list(iter_json_records(args.file)))
+    print(f"Imported {count} records into {store.root}")
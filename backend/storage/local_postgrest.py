@@ -0,0 +1,507 @@
+# backend/storage/local_postgrest.py
+"""
+Local stand-in for the Supabase REST API, backed by SQLite
+
+Implements the subset of PostgREST that SupabaseManager uses on our tables:
+insert, upsert (on_conflict with merge or ignore duplicates), select with
+column lists, eq/neq/gt/gte/lt/lte/like/ilike/in/is filters, or/and logic
+trees, order, limit and offset, plus update and delete. Latency and
+failures can be injected to load-test batching, concurrency and retries.
+
+Point the pipeline at it with
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_API_KEY=<LOCAL_API_KEY>
+after starting it with
+    python -m backend.storage.local_postgrest --port 54321
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from backend.storage.sqlite_backend import create_schema
+
+# supabase-py only accepts keys shaped like a JWT; the server ignores it
+LOCAL_API_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bG9jYWw"
+
+REST_PREFIX = "/rest/v1/"
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+OPERATORS = {
+    "eq": "=",
+    "neq": "<>",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+    "ilike": "LIKE",
+}
+
+
+class PostgRESTError(Exception):
+    """Error answered with a PostgREST-style JSON body"""
+
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _split_top_level(text):
+    """Split on commas that are not inside parentheses or double quotes"""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _sql_error(error):
+    """Translate a SQLite error into the PostgREST error Postgres would cause"""
+    message = str(error)
+    if "ON CONFLICT clause does not match" in message:
+        # Upsert on columns without a unique constraint
+        return PostgRESTError(
+            400,
+            "42P10",
+            "there is no unique or exclusion constraint matching the "
+            "ON CONFLICT specification",
+        )
+    return PostgRESTError(400, "42601", message)
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+class LocalPostgREST:
+    """SQLite database answering PostgREST requests"""
+
+    def __init__(self, path=":memory:", latency=0.0, jitter=0.0, error_rate=0.0):
+        """
+        Args:
+            path: SQLite file, or ":memory:"
+            latency: Seconds added to every request
+            jitter: Maximum random seconds added on top of latency
+            error_rate: Fraction of requests answered with 503 before they
+                reach the database
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        create_schema(self.conn)
+        self._columns = {}
+
+    def columns(self, table):
+        """Return the columns of a table, raising 404 for unknown tables"""
+        if table not in self._columns:
+            if not table.isidentifier():
+                raise PostgRESTError(404, "PGRST205", f"Invalid table name: {table}")
+            with self._lock:
+                rows = self.conn.execute(f"PRAGMA table_info('{table}')").fetchall()
+            if not rows:
+                raise PostgRESTError(
+                    404, "PGRST205", f"Could not find the table 'public.{table}'"
+                )
+            self._columns[table] = {
+                "names": [row["name"] for row in rows],
+                "primary_key": [
+                    row["name"]
+                    for row in sorted(rows, key=lambda r: r["pk"])
+                    if row["pk"]
+                ],
+            }
+        return self._columns[table]
+
+    def _column(self, table, name):
+        if name not in self.columns(table)["names"]:
+            raise PostgRESTError(400, "42703", f"column {table}.{name} does not exist")
+        return f'"{name}"'
+
+    def _condition(self, table, column, expression):
+        """Translate one filter such as gte.2025-05-01 into SQL"""
+        negate = expression.startswith("not.")
+        if negate:
+            expression = expression[4:]
+        operator, _, value = expression.partition(".")
+        column_sql = self._column(table, column)
+
+        if operator in OPERATORS:
+            value = _unquote(value)
+            if operator in ("like", "ilike"):
+                value = value.replace("*", "%")
+            if operator == "ilike":
+                sql, params = f"LOWER({column_sql}) LIKE LOWER(?)", [value]
+            else:
+                sql, params = f"{column_sql} {OPERATORS[operator]} ?", [value]
+        elif operator == "in":
+            values = [_unquote(v) for v in _split_top_level(value.strip("()"))]
+            placeholders = ", ".join("?" for _ in values)
+            sql, params = f"{column_sql} IN ({placeholders})", values
+        elif operator == "is":
+            literal = {"null": "NULL", "true": "1", "false": "0"}.get(value.lower())
+            if literal is None:
+                raise PostgRESTError(400, "PGRST100", f"Invalid is value: {value}")
+            sql, params = f"{column_sql} IS {literal}", []
+        else:
+            raise PostgRESTError(400, "PGRST100", f"Unsupported operator: {operator}")
+
+        if negate:
+            sql = f"NOT ({sql})"
+        return sql, params
+
+    def _logic(self, table, operator, tree):
+        """Translate a logic tree such as (a.gt.1,and(a.eq.1,b.gt.2))"""
+        conditions, params = [], []
+        for item in _split_top_level(tree[1:-1]):
+            match = re.match(r"^(not\.)?(and|or)(\(.*\))$", item)
+            if match:
+                sql, item_params = self._logic(table, match.group(2), match.group(3))
+                if match.group(1):
+                    sql = f"NOT {sql}"
+            else:
+                column, _, expression = item.partition(".")
+                sql, item_params = self._condition(table, column, expression)
+            conditions.append(sql)
+            params.extend(item_params)
+        return "(" + f" {operator.upper()} ".join(conditions) + ")", params
+
+    def _where(self, table, query):
+        """Build the WHERE clause from the filter parameters"""
+        conditions, params = [], []
+        for key, value in query:
+            if key in RESERVED_PARAMS:
+                continue
+            if key in ("or", "and", "not.or", "not.and"):
+                sql, item_params = self._logic(table, key.split(".")[-1], value)
+                if key.startswith("not."):
+                    sql = f"NOT {sql}"
+            else:
+                sql, item_params = self._condition(table, key, value)
+            conditions.append(sql)
+            params.extend(item_params)
+        if not conditions:
+            return "", []
+        return " WHERE " + " AND ".join(conditions), params
+
+    def _execute(self, sql, params=()):
+        try:
+            with self._lock, self.conn:
+                return [dict(row) for row in self.conn.execute(sql, params)]
+        except sqlite3.IntegrityError as e:
+            raise PostgRESTError(409, "23505", str(e))
+        except sqlite3.Error as e:
+            raise _sql_error(e)
+
+    def _execute_many(self, sql, rows):
+        """Run a RETURNING statement for many rows in one transaction"""
+        returned = []
+        try:
+            with self._lock, self.conn:
+                for params in rows:
+                    returned.extend(dict(row) for row in self.conn.execute(sql, params))
+        except sqlite3.IntegrityError as e:
+            raise PostgRESTError(409, "23505", str(e))
+        except sqlite3.Error as e:
+            raise _sql_error(e)
+        return returned
+
+    def select(self, table, query, range_header=None):
+        params = dict(query)
+        select = params.get("select", "*")
+        if select == "*":
+            projection = "*"
+        else:
+            projection = ", ".join(
+                self._column(table, column.strip()) for column in select.split(",")
+            )
+
+        where, where_params = self._where(table, query)
+        sql = f"SELECT {projection} FROM {table}{where}"
+
+        orders = [
+            part
+            for key, value in query
+            if key == "order"
+            for part in value.split(",")
+            if part
+        ]
+        if orders:
+            terms = []
+            for order in orders:
+                column, *modifiers = order.split(".")
+                term = self._column(table, column)
+                if "desc" in modifiers:
+                    term += " DESC"
+                if "nullsfirst" in modifiers:
+                    term += " NULLS FIRST"
+                elif "nullslast" in modifiers:
+                    term += " NULLS LAST"
+                terms.append(term)
+            sql += " ORDER BY " + ", ".join(terms)
+
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        if range_header and "-" in range_header:
+            first, _, last = range_header.partition("-")
+            offset = int(first)
+            if last:
+                limit = int(last) - offset + 1
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            where_params += [int(limit) if limit is not None else -1, offset]
+
+        rows = self._execute(sql, where_params)
+        return rows, offset
+
+    def insert(self, table, query, body, prefer):
+        rows = body if isinstance(body, list) else [body]
+        if not rows:
+            return []
+
+        params = dict(query)
+        if "columns" in params:
+            names = [_unquote(name) for name in params["columns"].split(",")]
+        else:
+            names = []
+            for row in rows:
+                names.extend(name for name in row if name not in names)
+        columns_sql = ", ".join(self._column(table, name) for name in names)
+        sql = (
+            f"INSERT INTO {table} ({columns_sql}) "
+            f"VALUES ({', '.join('?' for _ in names)})"
+        )
+
+        if "resolution=" in prefer:
+            keys = [k for k in params.get("on_conflict", "").split(",") if k]
+            keys = keys or self.columns(table)["primary_key"]
+            conflict = ", ".join(self._column(table, key) for key in keys)
+            updates = [name for name in names if name not in keys]
+            if "resolution=ignore-duplicates" in prefer or not updates:
+                sql += f" ON CONFLICT ({conflict}) DO NOTHING"
+            else:
+                assignments = ", ".join(
+                    f'"{name}" = excluded."{name}"' for name in updates
+                )
+                sql += f" ON CONFLICT ({conflict}) DO UPDATE SET {assignments}"
+
+        return self._execute_many(
+            sql + " RETURNING *",
+            [[row.get(name) for name in names] for row in rows],
+        )
+
+    def update(self, table, query, body):
+        if not body:
+            return []
+        names = list(body)
+        assignments = ", ".join(f"{self._column(table, name)} = ?" for name in names)
+        where, params = self._where(table, query)
+        return self._execute(
+            f"UPDATE {table} SET {assignments}{where} RETURNING *",
+            [body[name] for name in names] + params,
+        )
+
+    def delete(self, table, query):
+        where, params = self._where(table, query)
+        return self._execute(f"DELETE FROM {table}{where} RETURNING *", params)
+
+    def inject_faults(self):
+        """Sleep for the configured latency and maybe fail the request"""
+        delay = self.latency + (
+            self._random.uniform(0, self.jitter) if self.jitter else 0
+        )
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise PostgRESTError(503, "PGRST000", "Injected failure")
+
+
+class LocalPostgRESTHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def _send(self, status, data=None, headers=None):
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        app = self.server.app
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+
+        try:
+            if not url.path.startswith(REST_PREFIX):
+                raise PostgRESTError(404, "PGRST125", f"Invalid path: {url.path}")
+            table = url.path[len(REST_PREFIX) :].strip("/")
+            app.columns(table)
+            query = parse_qsl(url.query, keep_blank_values=True)
+            prefer = self.headers.get("Prefer", "")
+            body = json.loads(raw_body) if raw_body else None
+            app.inject_faults()
+
+            if method == "GET":
+                rows, offset = app.select(table, query, self.headers.get("Range"))
+                end = offset + len(rows) - 1 if rows else offset
+                self._send(200, rows, {"Content-Range": f"{offset}-{end}/*"})
+                return
+            if method == "POST":
+                rows, status = app.insert(table, query, body or [], prefer), 201
+            elif method == "PATCH":
+                rows, status = app.update(table, query, body or {}), 200
+            else:
+                rows, status = app.delete(table, query), 200
+        except PostgRESTError as e:
+            self._send(
+                e.status,
+                {"code": e.code, "message": e.message, "details": None, "hint": None},
+            )
+            return
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send(
+                400,
+                {"code": "PGRST102", "message": str(e), "details": None, "hint": None},
+            )
+            return
+
+        if "return=representation" in prefer:
+            self._send(status, rows)
+        else:
+            self._send(204 if method != "POST" else 201)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalPostgRESTServer:
+    """
+    HTTP server around LocalPostgREST, usable as a context manager
+
+        with LocalPostgRESTServer(latency=0.05) as server:
+            client = create_client(server.url, LOCAL_API_KEY)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **options):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (default: any free port)
+            **options: path, latency, jitter and error_rate of LocalPostgREST
+        """
+        self.app = LocalPostgREST(**options)
+        self.httpd = ThreadingHTTPServer((host, port), LocalPostgRESTHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self.app
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests in a daemon thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a local PostgREST-compatible API backed by SQLite"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=54321, help="Port to listen on")
+    parser.add_argument(
+        "--db",
+        default="data/local/postgrest.sqlite",
+        help="SQLite file, or :memory:",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="Latency added to every request"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0, help="Maximum random extra latency"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="Fraction of requests failed with 503",
+    )
+    args = parser.parse_args()
+
+    if args.db != ":memory:":
+        os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
+
+    server = LocalPostgRESTServer(
+        args.host,
+        args.port,
+        path=args.db,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+    )
+    print(f"Serving {args.db} at {server.url}")
+    print(f"export SUPABASE_URL={server.url}")
+    print(f"export SUPABASE_API_KEY={LOCAL_API_KEY}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
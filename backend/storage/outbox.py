@@ -0,0 +1,747 @@
+# backend/storage/outbox.py
+"""
+Durable outbox for storage writes
+
+Every write is first committed to a local SQLite file and acknowledged
+immediately. A background thread then delivers the queued writes to the
+real backend in batches: failed deliveries are retried with exponential
+backoff, and a circuit breaker stops sending while the database is down.
+Writes the database rejects outright, e.g. for a constraint violation, are
+marked dead at once instead of being retried.
+Writes that are still queued when the process exits are delivered by the
+next run. Deliveries are upserts on natural keys, so replaying a write that
+reached the database before its acknowledgement got lost is harmless.
+
+Usage:
+    python -m backend.storage.outbox              # show queued writes
+    python -m backend.storage.outbox --flush      # deliver them now
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from backend.storage.base import StorageWrapper
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (dead, id);
+"""
+
+# Backend methods taking a list of rows, so queued writes can be merged
+BULK_METHODS = {
+    "store_raw_metrics_bulk",
+    "store_normalized_scores_bulk",
+    "update_normalized_scores_bulk",
+    "store_indexes_bulk",
+    "store_rollups",
+}
+
+# SQLSTATE classes of errors that replaying cannot fix: data exceptions
+# (22), integrity constraint violations (23) and syntax errors or undefined
+# objects (42), e.g. 42P10 for an upsert without a matching unique key
+PERMANENT_SQLSTATE_CLASSES = ("22", "23", "42")
+
+# SQLite messages of the same errors
+PERMANENT_MESSAGES = ("constraint failed", "ON CONFLICT clause does not match")
+
+# HTTP client errors that are worth retrying
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+
+def is_permanent_error(error):
+    """
+    Whether a failed write would fail the same way however often it is
+    retried, e.g. a constraint violation or another 4xx answer
+
+    Args:
+        error: Exception raised by the write, or the error message of a row
+            the backend reported as failed
+
+    Returns:
+        bool: True for errors to give up on right away
+    """
+    if isinstance(error, (sqlite3.IntegrityError, ValueError, TypeError)):
+        return True
+
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return 400 <= status < 500 and status not in RETRYABLE_STATUS_CODES
+
+    message = str(error)
+    code = getattr(error, "code", None)
+    if not isinstance(code, str):
+        # PostgREST errors reported as a row's error message
+        match = re.search(r"'code': '([0-9A-Z]+)'", message)
+        code = match.group(1) if match else ""
+    if code[:2] in PERMANENT_SQLSTATE_CLASSES and len(code) == 5:
+        return True
+    # PostgREST's own request (PGRST1xx) and schema (PGRST2xx) errors are 4xx
+    if code.startswith(("PGRST1", "PGRST2")):
+        return True
+    return any(text in message for text in PERMANENT_MESSAGES)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing dependency for a while
+
+    After failure_threshold consecutive failures the breaker opens and
+    allow() returns False. Once reset_timeout has passed one trial call is
+    let through (half open): its success closes the breaker, its failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds to stay open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        """Whether a call may be made now"""
+        return self.state != "open"
+
+    def retry_in(self):
+        """Seconds until the next call is allowed"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(
+                        f"Circuit opened after {self.failures} failed writes, "
+                        f"pausing for {self.reset_timeout}s"
+                    )
+                self.opened_at = time.monotonic()
+
+
+class Outbox:
+    """
+    Queue of pending writes persisted in a SQLite file
+
+    Each entry holds a backend method name and the rows to pass to it.
+    Entries are kept until delivered; entries that failed too often are
+    marked dead and kept for inspection.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Outbox file (default: AGCI_OUTBOX_PATH or
+                data/local/outbox.sqlite), or ":memory:"
+        """
+        self.path = path or os.getenv(
+            "AGCI_OUTBOX_PATH", os.path.join("data", "local", "outbox.sqlite")
+        )
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(OUTBOX_SCHEMA)
+
+    def put(self, method, rows):
+        """
+        Queue a write
+
+        Args:
+            method: Backend method to call, e.g. "store_indexes_bulk"
+            rows: List of row dicts for the method
+
+        Returns:
+            int: Id of the entry
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO outbox (method, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    method,
+                    json.dumps(rows, default=str),
+                    time.time(),
+                    datetime.now().isoformat(),
+                ),
+            )
+        return cursor.lastrowid
+
+    def pending(self):
+        """
+        Return the entries waiting for delivery, oldest first
+
+        Returns:
+            list: Dicts with id, method, rows, attempts and next_attempt_at
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, method, payload, attempts, next_attempt_at "
+                "FROM outbox WHERE dead = 0 ORDER BY id"
+            ).fetchall()
+        return [
+            {
+                "id": entry_id,
+                "method": method,
+                "rows": json.loads(payload),
+                "attempts": attempts,
+                "next_attempt_at": next_attempt_at,
+            }
+            for entry_id, method, payload, attempts, next_attempt_at in rows
+        ]
+
+    def complete(self, ids):
+        """Remove delivered entries"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM outbox WHERE id = ?", [(entry_id,) for entry_id in ids]
+            )
+
+    def retry(self, entry_id, error, delay, dead=False):
+        """
+        Record a failed delivery
+
+        Args:
+            entry_id: Id of the entry
+            error: Error message
+            delay: Seconds before the next attempt
+            dead: Stop retrying the entry
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, "
+                "last_error = ?, dead = ? WHERE id = ?",
+                (time.time() + delay, error, int(dead), entry_id),
+            )
+
+    def next_attempt_at(self):
+        """Return when the earliest pending entry is due, or None"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE dead = 0"
+            ).fetchone()[0]
+
+    def counts(self):
+        """
+        Returns:
+            dict: Number of pending and dead entries
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT dead, COUNT(*) FROM outbox GROUP BY dead"
+            ).fetchall()
+        counts = dict(rows)
+        return {"pending": counts.get(0, 0), "dead": counts.get(1, 0)}
+
+    def revive(self):
+        """Queue dead entries for delivery again"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE outbox SET dead = 0, attempts = 0, next_attempt_at = ? "
+                "WHERE dead = 1",
+                (time.time(),),
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class OutboxStorage(StorageWrapper):
+    """
+    Write-ahead outbox in front of another storage backend
+
+    Writes are queued in an Outbox and acknowledged as soon as they are on
+    local disk; a background thread delivers them to the wrapped backend.
+    Queued writes of the same method are merged into one bulk call of up to
+    batch_size rows. Each method's writes are delivered in the order they
+    were made, so a retried write never overwrites a newer one. Reads go
+    straight to the wrapped backend and only see delivered writes.
+
+    A delivery may be replayed after it reached the database, e.g. when the
+    acknowledgement got lost, so the backend is switched to idempotent
+    writes, which need the unique keys described in the README.
+    """
+
+    def __init__(
+        self,
+        backend,
+        outbox=None,
+        batch_size=500,
+        interval=1.0,
+        base_delay=1.0,
+        max_delay=300.0,
+        max_attempts=20,
+        breaker=None,
+        flush_timeout=30.0,
+        autostart=True,
+    ):
+        """
+        Args:
+            backend: StorageBackend to deliver writes to
+            outbox: Outbox to queue writes in (default: Outbox())
+            batch_size: Maximum rows per delivery
+            interval: Seconds between delivery rounds of the background thread
+            base_delay: Seconds before the first retry, doubled per attempt
+            max_delay: Longest retry delay in seconds
+            max_attempts: Failed deliveries before an entry is marked dead
+            breaker: CircuitBreaker guarding the backend
+                (default: opens after 5 failures for 60 seconds)
+            flush_timeout: Seconds close() waits for queued writes
+            autostart: Start the background thread right away
+        """
+        super().__init__(backend)
+        backend.enable_idempotent_writes()
+        self.outbox = outbox or Outbox()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.breaker = breaker or CircuitBreaker()
+        self.flush_timeout = flush_timeout
+
+        self._delivery_listeners = []
+        self._deliver_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        if autostart:
+            self.start()
+
+    def on_delivered(self, callback):
+        """
+        Call callback(method, rows) whenever queued writes reach the backend,
+        e.g. to invalidate a read cache in front of this outbox
+
+        Args:
+            callback: Function taking the backend method and the written rows
+        """
+        self._delivery_listeners.append(callback)
+
+    # Queueing
+
+    def _enqueue(self, method, rows):
+        """
+        Queue rows for a backend method
+
+        Returns:
+            dict: Report counting every row as stored once it is queued
+        """
+        report = {"stored": 0, "failed": []}
+        if not rows:
+            return report
+        try:
+            self.outbox.put(method, rows)
+        except sqlite3.Error as e:
+            # Can't persist locally, write through instead of dropping
+            logger.error(f"Failed to queue {method} in the outbox: {e}")
+            return self._call(method, rows)
+        self._wake.set()
+        report["stored"] = len(rows)
+        return report
+
+    def store_raw_metric(self, dimension, metric_name, value, unit, source):
+        report = self.store_raw_metrics_bulk(
+            [
+                {
+                    "dimension": dimension,
+                    "metric_name": metric_name,
+                    "value": value,
+                    "unit": unit,
+                    "source": source,
+                }
+            ]
+        )
+        return not report["failed"]
+
+    def store_raw_metrics_bulk(self, rows, chunk_size=None):
+        # Stamp rows now, the timestamp is part of their upsert key
+        collection_timestamp = datetime.now().isoformat()
+        rows = [
+            {
+                **row,
+                "collection_timestamp": row.get("collection_timestamp")
+                or collection_timestamp,
+            }
+            for row in rows
+        ]
+        return self._enqueue("store_raw_metrics_bulk", rows)
+
+    def store_normalized_score(
+        self,
+        dimension,
+        metric_name,
+        raw_value,
+        normalized_score,
+        calculation_method,
+        date,
+    ):
+        report = self.store_normalized_scores_bulk(
+            [
+                {
+                    "dimension": dimension,
+                    "metric_name": metric_name,
+                    "raw_value": raw_value,
+                    "normalized_score": normalized_score,
+                    "calculation_method": calculation_method,
+                    "date": date,
+                }
+            ]
+        )
+        return not report["failed"]
+
+    def store_normalized_scores_bulk(self, rows, chunk_size=None):
+        return self._enqueue("store_normalized_scores_bulk", list(rows))
+
+    def update_normalized_scores_bulk(self, rows, chunk_size=None):
+        return self._enqueue("update_normalized_scores_bulk", list(rows))
+
+    def store_dimension_score(self, dimension, score, date):
+        report = self._enqueue(
+            "store_dimension_score",
+            [{"dimension": dimension, "score": score, "date": date}],
+        )
+        return not report["failed"]
+
+    def store_index(self, date, overall_score, dimension_scores, target_score):
+        report = self.store_indexes_bulk(
+            [
+                {
+                    "date": date,
+                    "overall_score": overall_score,
+                    "dimension_scores": dimension_scores,
+                    "target_score": target_score,
+                }
+            ]
+        )
+        return not report["failed"]
+
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        return self._enqueue("store_indexes_bulk", list(indexes))
+
+    def store_rollups(self, rollups, chunk_size=None):
+        return self._enqueue("store_rollups", list(rollups))
+
+    # Delivery
+
+    def _call(self, method, rows):
+        """Run one backend write, returning its report"""
+        if method in BULK_METHODS:
+            return getattr(self.backend, method)(rows)
+
+        report = {"stored": 0, "failed": []}
+        for i, row in enumerate(rows):
+            if getattr(self.backend, method)(**row):
+                report["stored"] += 1
+            else:
+                report["failed"].append(
+                    {"index": i, "row": row, "error": f"{method} failed"}
+                )
+        return report
+
+    def _send(self, method, rows):
+        """
+        Deliver rows
+
+        Permanent errors show the database is reachable, so only the others
+        count toward the circuit breaker.
+
+        Returns:
+            tuple: None on success, otherwise the error message and whether
+            the error is permanent
+        """
+        try:
+            report = self._call(method, rows)
+        except Exception as e:
+            error, permanent = str(e) or type(e).__name__, is_permanent_error(e)
+        else:
+            if not report["failed"]:
+                self.breaker.record_success()
+                return None
+            error = report["failed"][0]["error"]
+            permanent = is_permanent_error(error)
+        if not permanent:
+            self.breaker.record_failure()
+        return error, permanent
+
+    def _complete(self, entries):
+        """Remove delivered entries and tell the listeners"""
+        self.outbox.complete([entry["id"] for entry in entries])
+        rows = [row for entry in entries for row in entry["rows"]]
+        for callback in self._delivery_listeners:
+            try:
+                callback(entries[0]["method"], rows)
+            except Exception as e:
+                logger.error(f"Outbox delivery listener failed: {e}")
+
+    def _batches(self, entries):
+        """Group consecutive entries into deliveries of up to batch_size rows"""
+        batch, size = [], 0
+        for entry in entries:
+            if batch and size + len(entry["rows"]) > self.batch_size:
+                yield batch
+                batch, size = [], 0
+            batch.append(entry)
+            size += len(entry["rows"])
+        if batch:
+            yield batch
+
+    def _deliver(self, entries):
+        """
+        Deliver one method's entries in order, stopping at the first that
+        fails temporarily; a failed merged batch is retried one entry at a
+        time to find the entry that fails. Entries failing permanently are
+        marked dead and skipped.
+
+        Returns:
+            bool: Whether every entry was delivered or given up on
+        """
+        for batch in self._batches(entries):
+            if not self.breaker.allow():
+                return False
+            rows = [row for entry in batch for row in entry["rows"]]
+            failure = self._send(batch[0]["method"], rows)
+            if failure is None:
+                self._complete(batch)
+                continue
+
+            if len(batch) > 1:
+                if not self._deliver_each(batch):
+                    return False
+                continue
+
+            if not self._failed(batch[0], *failure):
+                return False
+        return True
+
+    def _deliver_each(self, entries):
+        for entry in entries:
+            if not self.breaker.allow():
+                return False
+            failure = self._send(entry["method"], entry["rows"])
+            if failure is None:
+                self._complete([entry])
+            elif not self._failed(entry, *failure):
+                return False
+        return True
+
+    def _failed(self, entry, error, permanent):
+        """
+        Give up on or reschedule a failed entry
+
+        Returns:
+            bool: Whether later entries of the method may be delivered
+        """
+        if permanent:
+            self._give_up(entry, error, entry["attempts"] + 1)
+            return True
+        self._reschedule(entry, error)
+        return False
+
+    def _give_up(self, entry, error, attempts):
+        logger.error(
+            f"Giving up on {entry['method']} outbox entry {entry['id']} after "
+            f"{attempts} attempts: {error}"
+        )
+        self.outbox.retry(entry["id"], error, 0, dead=True)
+
+    def _reschedule(self, entry, error):
+        attempts = entry["attempts"] + 1
+        if attempts >= self.max_attempts:
+            self._give_up(entry, error, attempts)
+            return
+
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        # Jitter so several processes don't retry in lockstep
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning(
+            f"Failed to deliver {entry['method']} outbox entry {entry['id']} "
+            f"(attempt {attempts}), retrying in {delay:.1f}s: {error}"
+        )
+        self.outbox.retry(entry["id"], error, delay)
+
+    def deliver_due(self):
+        """
+        Run one delivery round over the entries that are due
+
+        Returns:
+            int: Number of entries still pending
+        """
+        with self._deliver_lock:
+            pending = self.outbox.pending()
+            now = time.time()
+            by_method = {}
+            for entry in pending:
+                by_method.setdefault(entry["method"], []).append(entry)
+
+            for entries in by_method.values():
+                # Keep each method in order: nothing passes a waiting entry
+                due = []
+                for entry in entries:
+                    if entry["next_attempt_at"] > now:
+                        break
+                    due.append(entry)
+                if due and self.breaker.allow():
+                    self._deliver(due)
+
+            return self.outbox.counts()["pending"]
+
+    def _next_attempt_in(self):
+        """Seconds until some pending entry can be delivered"""
+        next_attempt_at = self.outbox.next_attempt_at()
+        if next_attempt_at is None:
+            return None
+        return max(0.0, next_attempt_at - time.time(), self.breaker.retry_in())
+
+    def flush(self, timeout=None):
+        """
+        Deliver queued writes, waiting for retries as needed
+
+        Args:
+            timeout: Maximum seconds to wait (default: until delivered)
+
+        Returns:
+            bool: Whether the outbox is empty
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.deliver_due() == 0:
+                return True
+            wait = self._next_attempt_in()
+            if wait is None:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(max(wait, 0.01))
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                self.deliver_due()
+            except Exception as e:
+                logger.error(f"Outbox delivery round failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """Start delivering in a background thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="agci-outbox", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self, timeout=None):
+        """
+        Stop the background thread and deliver what is left, waiting at most
+        timeout seconds (default: flush_timeout). Undelivered writes stay in
+        the outbox for the next run.
+
+        Returns:
+            bool: Whether every write was delivered
+        """
+        self.stop()
+        delivered = self.flush(self.flush_timeout if timeout is None else timeout)
+        if not delivered:
+            counts = self.outbox.counts()
+            logger.warning(
+                f"{counts['pending']} writes remain queued in {self.outbox.path} "
+                "and will be delivered by the next run"
+            )
+        self.backend.close()
+        return delivered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and deliver queued writes")
+    parser.add_argument("--path", default=None, help="Outbox file")
+    parser.add_argument(
+        "--flush", action="store_true", help="Deliver queued writes to the backend"
+    )
+    parser.add_argument(
+        "--revive", action="store_true", help="Retry writes that were given up on"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=60.0, help="Seconds to wait when flushing"
+    )
+    args = parser.parse_args(argv)
+
+    outbox = Outbox(args.path)
+    if args.revive:
+        print(f"Revived {outbox.revive()} writes")
+    if args.flush:
+        from backend.storage.factory import get_storage_backend
+
+        storage = OutboxStorage(
+            get_storage_backend(outbox_path=""), outbox, autostart=False
+        )
+        storage.close(timeout=args.timeout)
+
+    counts = outbox.counts()
+    print(f"{counts['pending']} pending, {counts['dead']} dead writes in {outbox.path}")
+    return 0 if counts["pending"] == 0 else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+# backend/storage/read_cache.py
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from backend.storage.base import StorageWrapper
+
+
+class ReadCache:
+    """
+    TTL cache of query results with LRU eviction
+
+    Results are kept in process memory and, when a shared path is given,
+    also in a SQLite file so several processes (e.g. the installation
+    controller and a local API) reuse each other's reads. Invalidating bumps
+    a generation counter in the shared file, which makes every process drop
+    its in-memory copies as well.
+    """
+
+    def __init__(self, ttl=300, max_entries=128, shared_path=None):
+        """
+        Args:
+            ttl: Seconds a cached result stays fresh
+            max_entries: Results kept in memory before the least recently
+                used one is evicted
+            shared_path: Optional SQLite file shared between processes
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared_path = shared_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        if shared_path:
+            directory = os.path.dirname(shared_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS reads ("
+                    "key TEXT PRIMARY KEY, body TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS generation (value INTEGER NOT NULL)"
+                )
+                if conn.execute("SELECT COUNT(*) FROM generation").fetchone()[0] == 0:
+                    conn.execute("INSERT INTO generation (value) VALUES (0)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection to the shared file; one per operation"""
+        conn = sqlite3.connect(self.shared_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _shared_generation(self, conn):
+        return conn.execute("SELECT value FROM generation").fetchone()[0]
+
+    def get(self, key):
+        """Return a copy of the cached result, or None if missing or expired"""
+        now = time.time()
+        row = None
+        if self.shared_path:
+            with self._connect() as conn:
+                generation = self._shared_generation(conn)
+                row = conn.execute(
+                    "SELECT body, expires_at FROM reads WHERE key = ?", (key,)
+                ).fetchone()
+            with self._lock:
+                if generation != self._generation:
+                    # Another process wrote new data
+                    self._entries.clear()
+                    self._generation = generation
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                return copy.deepcopy(entry[1])
+            self._entries.pop(key, None)
+
+        if row and row[1] > now:
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            return copy.deepcopy(value)
+        return None
+
+    def set(self, key, value):
+        """Cache a result for ttl seconds"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, copy.deepcopy(value), expires_at)
+        if self.shared_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO reads (key, body, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), expires_at),
+                )
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached result, in this and all sharing processes"""
+        with self._lock:
+            self._entries.clear()
+        if self.shared_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM reads")
+                conn.execute("UPDATE generation SET value = value + 1")
+                generation = self._shared_generation(conn)
+            with self._lock:
+                self._generation = generation
+
+
+class CachedStorage(StorageWrapper):
+    """
+    Read-through cache in front of another storage backend
+
+    get_latest_index, get_historical_index and get_rollups are served from a
+    ReadCache;
+    every other call goes straight to the wrapped backend. Writing an index
+    invalidates the cache so readers see the new date immediately. In front
+    of an OutboxStorage a write only reaches the backend later, so the cache
+    must also be invalidated on delivery, see written().
+    """
+
+    # Backend writes that change what the cached reads return
+    INVALIDATING_WRITES = {"store_index", "store_indexes_bulk", "store_rollups"}
+
+    def __init__(self, backend, cache=None):
+        """
+        Args:
+            backend: StorageBackend to wrap
+            cache: ReadCache to use (default: in-process, 5 minute TTL)
+        """
+        super().__init__(backend)
+        self.cache = cache or ReadCache()
+
+    def _cached(self, key, load):
+        value = self.cache.get(key)
+        if value is None:
+            value = load()
+            # Don't cache empty results, they usually mean an error
+            if value:
+                self.cache.set(key, value)
+        return value
+
+    def _invalidate_if_stored(self, stored):
+        if stored:
+            self.cache.invalidate()
+
+    def written(self, method, rows):
+        """
+        Invalidate the cache after rows were written to the wrapped backend
+        by another path, e.g. delivered from an outbox
+
+        Args:
+            method: Backend method that wrote the rows
+            rows: Rows written
+        """
+        if method in self.INVALIDATING_WRITES:
+            self._invalidate_if_stored(rows)
+
+    def store_index(self, date, overall_score, dimension_scores, target_score):
+        success = self.backend.store_index(
+            date, overall_score, dimension_scores, target_score
+        )
+        self._invalidate_if_stored(success)
+        return success
+
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        report = self.backend.store_indexes_bulk(indexes, chunk_size)
+        self._invalidate_if_stored(report["stored"])
+        return report
+
+    def get_latest_index(self):
+        return self._cached("latest_index", self.backend.get_latest_index)
+
+    def get_historical_index(self, days=30):
+        return self._cached(
+            f"historical_index:{days}",
+            lambda: self.backend.get_historical_index(days),
+        )
+
+    def get_rollups(self, period="month", start=None, end=None, metrics=None):
+        return self._cached(
+            f"rollups:{period}:{start}:{end}:{metrics}",
+            lambda: self.backend.get_rollups(period, start, end, metrics),
+        )
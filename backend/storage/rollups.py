@@ -0,0 +1,113 @@
+# backend/storage/rollups.py
+"""
+Weekly and monthly rollups of the Green City Index
+
+Every period (an ISO week starting on Monday, or a calendar month) gets one
+row per metric, i.e. the overall score and each dimension score, holding
+the number of days plus the mean, min, max and quartiles over the period.
+"""
+
+import statistics
+from datetime import date, timedelta
+
+ROLLUP_PERIODS = ("week", "month")
+
+# Rollup metric -> green_city_index column
+ROLLUP_METRICS = {
+    "overall": "overall_score",
+    "air": "air_score",
+    "water": "water_score",
+    "nature": "nature_score",
+    "waste": "waste_score",
+    "noise": "noise_score",
+}
+
+PERCENTILES = (0.25, 0.5, 0.75)
+
+ROLLUP_COLUMNS = [
+    "period",
+    "period_start",
+    "period_end",
+    "metric",
+    "count",
+    "mean",
+    "min",
+    "max",
+] + [f"p{int(q * 100)}" for q in PERCENTILES]
+
+
+def period_bounds(date_str, period):
+    """
+    Return the first and last day of the period containing a date
+
+    Args:
+        date_str: Date as YYYY-MM-DD
+        period: 'week' or 'month'
+
+    Returns:
+        tuple: (start, end) as YYYY-MM-DD strings
+    """
+    day = date.fromisoformat(str(date_str)[:10])
+    if period == "week":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=6)
+    elif period == "month":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    else:
+        raise ValueError(f"Unknown rollup period: {period}")
+    return start.isoformat(), end.isoformat()
+
+
+def _quantile(values, q):
+    """Quantile of sorted values, interpolated linearly between the two
+    closest ranks"""
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def compute_rollups(index_rows, period):
+    """
+    Aggregate daily index rows into per-period statistics
+
+    Written in plain Python: rollups are refreshed on every index write for
+    a few dozen rows, where building DataFrames cost more than the writes.
+
+    Args:
+        index_rows: green_city_index rows with date and the score columns
+        period: 'week' or 'month'
+
+    Returns:
+        list: Rollup rows with the keys in ROLLUP_COLUMNS, ordered by
+        period_start and metric
+    """
+    groups = {}
+    for row in index_rows:
+        period_start = period_bounds(str(row["date"]), period)[0]
+        for metric, column in ROLLUP_METRICS.items():
+            value = row.get(column)
+            if value is not None and value == value:  # skip None and NaN
+                groups.setdefault((period_start, metric), []).append(float(value))
+
+    rollups = []
+    for (period_start, metric), values in sorted(groups.items()):
+        values.sort()
+        rollups.append(
+            {
+                "period": period,
+                "period_start": period_start,
+                "period_end": period_bounds(period_start, period)[1],
+                "metric": metric,
+                "count": len(values),
+                "mean": round(statistics.fmean(values), 2),
+                "min": round(values[0], 2),
+                "max": round(values[-1], 2),
+                **{
+                    f"p{int(q * 100)}": round(_quantile(values, q), 2)
+                    for q in PERCENTILES
+                },
+            }
+        )
+    return rollups
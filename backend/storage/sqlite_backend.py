@@ -0,0 +1,558 @@
+# backend/storage/sqlite_backend.py
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from backend.storage.base import StorageBackend
+from backend.storage.rollups import ROLLUP_COLUMNS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dimension TEXT NOT NULL,
+    metric_name TEXT NOT NULL,
+    value REAL,
+    unit TEXT,
+    source TEXT,
+    collection_timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_raw_metrics_metric_time
+    ON raw_metrics (dimension, metric_name, collection_timestamp);
+
+CREATE TABLE IF NOT EXISTS normalized_scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dimension TEXT NOT NULL,
+    metric_name TEXT NOT NULL,
+    raw_value REAL,
+    normalized_score REAL,
+    calculation_method TEXT,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_normalized_scores_date
+    ON normalized_scores (date);
+CREATE INDEX IF NOT EXISTS idx_normalized_scores_metric_date
+    ON normalized_scores (dimension, metric_name, date);
+
+CREATE TABLE IF NOT EXISTS dimension_scores (
+    dimension TEXT NOT NULL,
+    score REAL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (dimension, date)
+);
+CREATE INDEX IF NOT EXISTS idx_dimension_scores_date
+    ON dimension_scores (date);
+
+CREATE TABLE IF NOT EXISTS green_city_index (
+    date TEXT PRIMARY KEY,
+    overall_score REAL,
+    air_score REAL,
+    water_score REAL,
+    nature_score REAL,
+    waste_score REAL,
+    noise_score REAL,
+    target_score REAL
+);
+
+CREATE TABLE IF NOT EXISTS index_rollups (
+    period TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER,
+    mean REAL,
+    min REAL,
+    max REAL,
+    p25 REAL,
+    p50 REAL,
+    p75 REAL,
+    PRIMARY KEY (period, period_start, metric)
+);
+"""
+
+# Natural keys needed for idempotent raw metric and normalized score
+# writes: index name -> (table, columns)
+UNIQUE_KEYS = {
+    "idx_raw_metrics_key": (
+        "raw_metrics",
+        ["dimension", "metric_name", "collection_timestamp"],
+    ),
+    "idx_normalized_scores_key": (
+        "normalized_scores",
+        ["dimension", "metric_name", "date"],
+    ),
+}
+
+
+def create_schema(conn):
+    """Create the tables and indexes on a SQLite connection"""
+    conn.executescript(SCHEMA)
+
+
+def add_unique_keys(conn, dedupe=False):
+    """
+    Add the UNIQUE_KEYS to a database, as idempotent writes require
+
+    Databases written with plain inserts may hold rows that share a key.
+    Unless dedupe is set that is an error; with dedupe the most recently
+    inserted row of each key is kept and the others are deleted.
+
+    Returns:
+        dict: Table -> number of duplicate rows deleted
+
+    Raises:
+        RuntimeError: If a table holds duplicates and dedupe is not set
+    """
+    existing = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    deleted = {}
+    with conn:
+        for name, (table, columns) in UNIQUE_KEYS.items():
+            if name in existing:
+                continue
+            key = ", ".join(columns)
+            duplicates = conn.execute(
+                f"SELECT COALESCE(SUM(n - 1), 0) FROM (SELECT COUNT(*) AS n "
+                f"FROM {table} GROUP BY {key} HAVING n > 1)"
+            ).fetchone()[0]
+            if duplicates and not dedupe:
+                raise RuntimeError(
+                    f"{table} has {duplicates} rows sharing a ({key}) key; "
+                    "run python -m backend.storage.sqlite_backend --dedupe "
+                    "<database> to keep the newest row of each key"
+                )
+            if duplicates:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE id NOT IN "
+                    f"(SELECT MAX(id) FROM {table} GROUP BY {key})"
+                )
+                logger.warning(f"Deleted {duplicates} duplicate rows from {table}")
+                deleted[table] = duplicates
+            conn.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({key})")
+            logger.info(f"Added unique key ({key}) to {table}")
+    return deleted
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Embedded SQLite implementation of the storage backend
+
+    Mirrors the Supabase tables locally so the full pipeline and analytics
+    run at disk speed without network access.
+    """
+
+    # Default number of rows read per page
+    READ_PAGE_SIZE = 1000
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Database file (default: AGCI_SQLITE_PATH or
+                data/local/agci.sqlite), or ":memory:"
+        """
+        self.path = path or os.getenv(
+            "AGCI_SQLITE_PATH", os.path.join("data", "local", "agci.sqlite")
+        )
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # One shared connection, serialized by a lock, so the backend can be
+        # used from collector and writer threads
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        create_schema(self.conn)
+
+    def enable_idempotent_writes(self):
+        """Add the unique keys, then upsert on them; see add_unique_keys"""
+        with self._lock:
+            add_unique_keys(self.conn)
+        super().enable_idempotent_writes()
+
+    def _write_many(self, sql, records, columns):
+        """Run one statement for many records in a single transaction"""
+        report = {"stored": 0, "failed": []}
+        if not records:
+            return report
+
+        try:
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    sql, [tuple(row[col] for col in columns) for row in records]
+                )
+            report["stored"] = len(records)
+        except Exception as e:
+            logger.error(f"Failed to write {len(records)} rows: {e}")
+            report["failed"] = [
+                {"index": i, "row": row, "error": str(e)}
+                for i, row in enumerate(records)
+            ]
+        return report
+
+    def store_raw_metric(self, dimension, metric_name, value, unit, source):
+        report = self.store_raw_metrics_bulk(
+            [
+                {
+                    "dimension": dimension,
+                    "metric_name": metric_name,
+                    "value": value,
+                    "unit": unit,
+                    "source": source,
+                }
+            ]
+        )
+        return not report["failed"]
+
+    def store_raw_metrics_bulk(self, rows, chunk_size=None):
+        collection_timestamp = datetime.now().isoformat()
+        records = [
+            {
+                **row,
+                "collection_timestamp": row.get("collection_timestamp")
+                or collection_timestamp,
+            }
+            for row in rows
+        ]
+        columns = [
+            "dimension",
+            "metric_name",
+            "value",
+            "unit",
+            "source",
+            "collection_timestamp",
+        ]
+        sql = (
+            "INSERT INTO raw_metrics (dimension, metric_name, value, unit, source, "
+            "collection_timestamp) VALUES (?, ?, ?, ?, ?, ?)"
+        )
+        if self.idempotent_writes:
+            sql += (
+                " ON CONFLICT (dimension, metric_name, collection_timestamp) "
+                "DO UPDATE SET value = excluded.value, unit = excluded.unit, "
+                "source = excluded.source"
+            )
+        return self._write_many(sql, records, columns)
+
+    def store_normalized_score(
+        self,
+        dimension,
+        metric_name,
+        raw_value,
+        normalized_score,
+        calculation_method,
+        date,
+    ):
+        report = self.store_normalized_scores_bulk(
+            [
+                {
+                    "dimension": dimension,
+                    "metric_name": metric_name,
+                    "raw_value": raw_value,
+                    "normalized_score": normalized_score,
+                    "calculation_method": calculation_method,
+                    "date": date,
+                }
+            ]
+        )
+        return not report["failed"]
+
+    def store_normalized_scores_bulk(self, rows, chunk_size=None):
+        columns = [
+            "dimension",
+            "metric_name",
+            "raw_value",
+            "normalized_score",
+            "calculation_method",
+            "date",
+        ]
+        sql = (
+            "INSERT INTO normalized_scores (dimension, metric_name, raw_value, "
+            "normalized_score, calculation_method, date) VALUES (?, ?, ?, ?, ?, ?)"
+        )
+        if self.idempotent_writes:
+            sql += (
+                " ON CONFLICT (dimension, metric_name, date) DO UPDATE SET "
+                "raw_value = excluded.raw_value, "
+                "normalized_score = excluded.normalized_score, "
+                "calculation_method = excluded.calculation_method"
+            )
+        return self._write_many(sql, rows, columns)
+
+    def update_normalized_scores_bulk(self, rows, chunk_size=None):
+        return self._write_many(
+            "UPDATE normalized_scores SET raw_value = ?, normalized_score = ?, "
+            "calculation_method = ? WHERE id = ?",
+            rows,
+            ["raw_value", "normalized_score", "calculation_method", "id"],
+        )
+
+    def store_dimension_score(self, dimension, score, date):
+        report = self._write_many(
+            "INSERT INTO dimension_scores (dimension, score, date) VALUES (?, ?, ?) "
+            "ON CONFLICT (dimension, date) DO UPDATE SET score = excluded.score",
+            [{"dimension": dimension, "score": score, "date": date}],
+            ["dimension", "score", "date"],
+        )
+        return not report["failed"]
+
+    def store_index(self, date, overall_score, dimension_scores, target_score):
+        report = self.store_indexes_bulk(
+            [
+                {
+                    "date": date,
+                    "overall_score": overall_score,
+                    "dimension_scores": dimension_scores,
+                    "target_score": target_score,
+                }
+            ]
+        )
+        return not report["failed"]
+
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        by_date = {index["date"]: index for index in indexes}
+        records = list(by_date.values())
+        report = {"stored": 0, "failed": []}
+        if not records:
+            return report
+
+        index_rows = [
+            (
+                index["date"],
+                index["overall_score"],
+                index["dimension_scores"]["air"],
+                index["dimension_scores"]["water"],
+                index["dimension_scores"]["nature"],
+                index["dimension_scores"]["waste"],
+                index["dimension_scores"]["noise"],
+                index["target_score"],
+            )
+            for index in records
+        ]
+        dimension_rows = [
+            (dim, score, index["date"])
+            for index in records
+            for dim, score in index["dimension_scores"].items()
+        ]
+
+        try:
+            # Index and dimension scores are committed together
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO green_city_index (date, overall_score, air_score, "
+                    "water_score, nature_score, waste_score, noise_score, "
+                    "target_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (date) DO UPDATE SET "
+                    "overall_score = excluded.overall_score, "
+                    "air_score = excluded.air_score, "
+                    "water_score = excluded.water_score, "
+                    "nature_score = excluded.nature_score, "
+                    "waste_score = excluded.waste_score, "
+                    "noise_score = excluded.noise_score, "
+                    "target_score = excluded.target_score",
+                    index_rows,
+                )
+                self.conn.executemany(
+                    "INSERT INTO dimension_scores (dimension, score, date) "
+                    "VALUES (?, ?, ?) "
+                    "ON CONFLICT (dimension, date) DO UPDATE SET score = excluded.score",
+                    dimension_rows,
+                )
+            report["stored"] = len(records)
+        except Exception as e:
+            logger.error(f"Failed to store {len(records)} indexes: {e}")
+            report["failed"] = [
+                {"index": i, "row": index, "error": str(e)}
+                for i, index in enumerate(records)
+            ]
+            return report
+
+        self._refresh_rollups_after_write([index["date"] for index in records])
+        return report
+
+    def store_rollups(self, rollups, chunk_size=None):
+        updates = ", ".join(
+            f"{column} = excluded.{column}" for column in ROLLUP_COLUMNS[2:]
+        )
+        return self._write_many(
+            f"INSERT INTO index_rollups ({', '.join(ROLLUP_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in ROLLUP_COLUMNS)}) "
+            f"ON CONFLICT (period, period_start, metric) DO UPDATE SET {updates}",
+            rollups,
+            ROLLUP_COLUMNS,
+        )
+
+    def get_latest_index(self):
+        rows = self.get_historical_index(days=1)
+        return rows[0] if rows else None
+
+    def get_historical_index(self, days=30):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM green_city_index ORDER BY date DESC LIMIT ?", (days,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _query_keyset(
+        self,
+        table,
+        keys,
+        start,
+        end,
+        columns,
+        page_size,
+        filters=None,
+        date_column="date",
+    ):
+        """
+        Yield the rows of a table one page at a time, seeking past the last
+        key of the previous page instead of using OFFSET
+
+        Args:
+            table: Name of the table
+            keys: Unique ordering columns, e.g. ["date"] or ["date", "id"]
+            start: First date to include (default: unbounded)
+            end: Last date to include (default: unbounded)
+            columns: Columns to return (default: all)
+            page_size: Rows per query (default: READ_PAGE_SIZE)
+            filters: Dict of column -> allowed values, None values are ignored
+            date_column: Column start and end apply to
+        """
+        page_size = page_size or self.READ_PAGE_SIZE
+        if columns:
+            for column in columns:
+                if not column.isidentifier():
+                    raise ValueError(f"Invalid column name: {column}")
+            selected = list(columns) + [key for key in keys if key not in columns]
+            projection = ", ".join(f'"{column}"' for column in selected)
+        else:
+            projection = "*"
+
+        conditions, params = [], []
+        if start is not None:
+            conditions.append(f"{date_column} >= ?")
+            params.append(str(start))
+        if end is not None:
+            conditions.append(f"{date_column} <= ?")
+            params.append(str(end))
+        for column, values in (filters or {}).items():
+            if values is not None:
+                conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+
+        key_list = ", ".join(keys)
+        last = None
+        while True:
+            where = list(conditions)
+            if last is not None:
+                where.append(f"({key_list}) > ({', '.join('?' for _ in keys)})")
+            sql = f"SELECT {projection} FROM {table}"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += f" ORDER BY {key_list} LIMIT ?"
+
+            with self._lock:
+                page = self.conn.execute(
+                    sql, params + list(last or []) + [page_size]
+                ).fetchall()
+
+            for row in page:
+                row = dict(row)
+                yield {column: row[column] for column in columns} if columns else row
+            if len(page) < page_size:
+                return
+            last = [page[-1][key] for key in keys]
+
+    def query_index(self, start=None, end=None, columns=None, page_size=None):
+        return self._query_keyset(
+            "green_city_index", ["date"], start, end, columns, page_size
+        )
+
+    def query_dimension_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        return self._query_keyset(
+            "dimension_scores",
+            ["date", "dimension"],
+            start,
+            end,
+            columns,
+            page_size,
+            {"dimension": dimensions},
+        )
+
+    def query_normalized_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        return self._query_keyset(
+            "normalized_scores",
+            ["date", "id"],
+            start,
+            end,
+            columns,
+            page_size,
+            {"dimension": dimensions},
+        )
+
+    def query_rollups(
+        self,
+        period="month",
+        start=None,
+        end=None,
+        metrics=None,
+        columns=None,
+        page_size=None,
+    ):
+        return self._query_keyset(
+            "index_rollups",
+            ["period_start", "metric"],
+            start,
+            end,
+            columns,
+            page_size,
+            {"period": [period], "metric": metrics},
+            date_column="period_start",
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Add the unique keys idempotent writes need to a SQLite "
+        "database, e.g. before enabling the outbox"
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=None,
+        help="Database file (default: AGCI_SQLITE_PATH or data/local/agci.sqlite)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Delete rows sharing a key, keeping the most recently inserted one",
+    )
+    args = parser.parse_args(argv)
+
+    storage = SQLiteStorage(args.path)
+    try:
+        deleted = add_unique_keys(storage.conn, dedupe=args.dedupe)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    for table, count in deleted.items():
+        print(f"Deleted {count} duplicate rows from {table}")
+    print(f"Unique keys present in {storage.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
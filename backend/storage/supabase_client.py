@@ -4,18 +4,31 @@ from dotenv import load_dotenv
 from supabase import create_client, Client
 import logging
 from datetime import datetime
+from backend.storage.base import StorageBackend
+from backend.storage.rollups import ROLLUP_COLUMNS
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
-class SupabaseManager:
+class SupabaseManager(StorageBackend):
     """
     Manages Supabase connections and provides methods for database operations
     """
 
     _instance = None
 
+    # Default number of rows sent per multi-row insert
+    BULK_CHUNK_SIZE = 500
+
+    # Default rows fetched per request when paging (PostgREST caps responses)
+    READ_PAGE_SIZE = 1000
+
+    # Unique keys raw metrics and normalized scores are upserted on once
+    # idempotent writes are enabled; the tables need matching constraints
+    RAW_METRICS_KEY = "dimension,metric_name,collection_timestamp"
+    NORMALIZED_SCORES_KEY = "dimension,metric_name,date"
+
     def __new__(cls):
         """Singleton pattern to ensure only one client instance exists"""
         if cls._instance is None:
@@ -71,21 +84,21 @@ class SupabaseManager:
             logger.warning("No Supabase client available")
             return False
 
+        record = {
+            "dimension": dimension,
+            "metric_name": metric_name,
+            "value": value,
+            "unit": unit,
+            "source": source,
+            "collection_timestamp": datetime.now().isoformat(),
+        }
         try:
-            result = (
-                self.client.table("raw_metrics")
-                .insert(
-                    {
-                        "dimension": dimension,
-                        "metric_name": metric_name,
-                        "value": value,
-                        "unit": unit,
-                        "source": source,
-                        "collection_timestamp": datetime.now().isoformat(),
-                    }
-                )
-                .execute()
-            )
+            query = self.client.table("raw_metrics")
+            if self.idempotent_writes:
+                query = query.upsert(record, on_conflict=self.RAW_METRICS_KEY)
+            else:
+                query = query.insert(record)
+            result = query.execute()
 
             return len(result.data) > 0
         except Exception as e:
@@ -119,31 +132,172 @@ class SupabaseManager:
             logger.warning("No Supabase client available")
             return False
 
+        record = {
+            "dimension": dimension,
+            "metric_name": metric_name,
+            "raw_value": raw_value,
+            "normalized_score": normalized_score,
+            "calculation_method": calculation_method,
+            "date": date,
+        }
         try:
-            result = (
-                self.client.table("normalized_scores")
-                .insert(
-                    {
-                        "dimension": dimension,
-                        "metric_name": metric_name,
-                        "raw_value": raw_value,
-                        "normalized_score": normalized_score,
-                        "calculation_method": calculation_method,
-                        "date": date,
-                    }
-                )
-                .execute()
-            )
+            query = self.client.table("normalized_scores")
+            if self.idempotent_writes:
+                query = query.upsert(record, on_conflict=self.NORMALIZED_SCORES_KEY)
+            else:
+                query = query.insert(record)
+            result = query.execute()
 
             return len(result.data) > 0
         except Exception as e:
             logger.error(f"Failed to store normalized score: {e}")
             return False
 
+    def store_raw_metrics_bulk(self, rows, chunk_size=None):
+        """
+        Store many raw metrics using one multi-row insert per chunk
+
+        With idempotent writes enabled the rows are upserted on
+        (dimension, metric_name, collection_timestamp) instead.
+
+        Args:
+            rows: List of dicts with dimension, metric_name, value, unit and source
+            chunk_size: Maximum number of rows per insert (default: BULK_CHUNK_SIZE)
+
+        Returns:
+            dict: Report with the number of rows stored and the failed rows
+        """
+        collection_timestamp = datetime.now().isoformat()
+        records = [
+            {
+                "dimension": row["dimension"],
+                "metric_name": row["metric_name"],
+                "value": row["value"],
+                "unit": row["unit"],
+                "source": row["source"],
+                "collection_timestamp": row.get(
+                    "collection_timestamp", collection_timestamp
+                ),
+            }
+            for row in rows
+        ]
+        on_conflict = self.RAW_METRICS_KEY if self.idempotent_writes else None
+        return self._write_bulk("raw_metrics", records, chunk_size, on_conflict)
+
+    def store_normalized_scores_bulk(self, rows, chunk_size=None):
+        """
+        Store many normalized scores using one multi-row insert per chunk
+
+        With idempotent writes enabled the rows are upserted on
+        (dimension, metric_name, date), so storing a metric's score for a
+        date again replaces the earlier score.
+
+        Args:
+            rows: List of dicts with dimension, metric_name, raw_value,
+                normalized_score, calculation_method and date
+            chunk_size: Maximum number of rows per insert (default: BULK_CHUNK_SIZE)
+
+        Returns:
+            dict: Report with the number of rows stored and the failed rows
+        """
+        records = [
+            {
+                "dimension": row["dimension"],
+                "metric_name": row["metric_name"],
+                "raw_value": row["raw_value"],
+                "normalized_score": row["normalized_score"],
+                "calculation_method": row["calculation_method"],
+                "date": row["date"],
+            }
+            for row in rows
+        ]
+        on_conflict = self.NORMALIZED_SCORES_KEY if self.idempotent_writes else None
+        return self._write_bulk("normalized_scores", records, chunk_size, on_conflict)
+
+    def update_normalized_scores_bulk(self, rows, chunk_size=None):
+        """
+        Overwrite stored normalized scores using upserts keyed on their id
+
+        Args:
+            rows: List of normalized score dicts as returned by
+                get_normalized_scores, including id
+            chunk_size: Maximum number of rows per upsert (default: BULK_CHUNK_SIZE)
+
+        Returns:
+            dict: Report with the number of rows stored and the failed rows
+        """
+        records = [
+            {
+                "id": row["id"],
+                "dimension": row["dimension"],
+                "metric_name": row["metric_name"],
+                "raw_value": row["raw_value"],
+                "normalized_score": row["normalized_score"],
+                "calculation_method": row["calculation_method"],
+                "date": row["date"],
+            }
+            for row in rows
+        ]
+        return self._write_bulk("normalized_scores", records, chunk_size, "id")
+
+    def _write_bulk(self, table, records, chunk_size=None, on_conflict=None):
+        """
+        Write records to a table in chunks, one request per chunk
+
+        Records are inserted, or upserted on the given conflict columns when
+        on_conflict is set. A failed chunk marks every row in it as failed,
+        the remaining chunks are still sent.
+
+        Args:
+            table: Name of the table
+            records: List of row dicts
+            chunk_size: Maximum number of rows per request
+            on_conflict: Comma-separated unique key columns for an upsert
+
+        Returns:
+            dict: {"stored": int, "failed": [{"index", "row", "error"}, ...]}
+        """
+        report = {"stored": 0, "failed": []}
+        if not records:
+            return report
+
+        if not self.client:
+            logger.warning("No Supabase client available")
+            report["failed"] = [
+                {"index": i, "row": row, "error": "No Supabase client available"}
+                for i, row in enumerate(records)
+            ]
+            return report
+
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start : start + chunk_size]
+            try:
+                query = self.client.table(table)
+                if on_conflict:
+                    query = query.upsert(chunk, on_conflict=on_conflict)
+                else:
+                    query = query.insert(chunk)
+                query.execute()
+                report["stored"] += len(chunk)
+            except Exception as e:
+                logger.error(
+                    f"Failed to write rows {start}-{start + len(chunk) - 1} "
+                    f"to {table}: {e}"
+                )
+                report["failed"].extend(
+                    {"index": start + i, "row": row, "error": str(e)}
+                    for i, row in enumerate(chunk)
+                )
+
+        return report
+
     def store_dimension_score(self, dimension, score, date):
         """
         Store a dimension score in the dimension_scores table
 
+        Upserts on (dimension, date), so an existing score is replaced.
+
         Args:
             dimension: Category (Air, Water, etc.)
             score: Dimension score (0-100)
@@ -152,41 +306,12 @@ class SupabaseManager:
         Returns:
             bool: Success status
         """
-        if not self.client:
-            logger.warning("No Supabase client available")
-            return False
-
-        try:
-            # Check if record already exists
-            existing = (
-                self.client.table("dimension_scores")
-                .select("*")
-                .eq("dimension", dimension)
-                .eq("date", date)
-                .execute()
-            )
-
-            if len(existing.data) > 0:
-                # Update existing record
-                result = (
-                    self.client.table("dimension_scores")
-                    .update({"score": score})
-                    .eq("dimension", dimension)
-                    .eq("date", date)
-                    .execute()
-                )
-            else:
-                # Insert new record
-                result = (
-                    self.client.table("dimension_scores")
-                    .insert({"dimension": dimension, "score": score, "date": date})
-                    .execute()
-                )
-
-            return True
-        except Exception as e:
-            logger.error(f"Failed to store dimension score: {e}")
-            return False
+        report = self._write_bulk(
+            "dimension_scores",
+            [{"dimension": dimension, "score": score, "date": date}],
+            on_conflict="dimension,date",
+        )
+        return not report["failed"]
 
     def store_index(self, date, overall_score, dimension_scores, target_score):
         """
@@ -201,64 +326,103 @@ class SupabaseManager:
         Returns:
             bool: Success status
         """
-        if not self.client:
-            logger.warning("No Supabase client available")
-            return False
+        report = self.store_indexes_bulk(
+            [
+                {
+                    "date": date,
+                    "overall_score": overall_score,
+                    "dimension_scores": dimension_scores,
+                    "target_score": target_score,
+                }
+            ]
+        )
+        return not report["failed"]
+
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        """
+        Store the index and dimension scores for many dates
 
-        try:
-            # Check if record already exists
-            existing = (
-                self.client.table("green_city_index")
-                .select("*")
-                .eq("date", date)
-                .execute()
-            )
+        Each chunk of dates costs two upserts: one on green_city_index keyed
+        on date and one on dimension_scores keyed on (dimension, date). If a
+        date appears more than once, the last record wins. Afterwards the
+        weekly and monthly rollups of the stored dates are refreshed.
 
-            if len(existing.data) > 0:
-                # Update existing record
-                result = (
-                    self.client.table("green_city_index")
-                    .update(
-                        {
-                            "overall_score": overall_score,
-                            "air_score": dimension_scores["air"],
-                            "water_score": dimension_scores["water"],
-                            "nature_score": dimension_scores["nature"],
-                            "waste_score": dimension_scores["waste"],
-                            "noise_score": dimension_scores["noise"],
-                            "target_score": target_score,
-                        }
-                    )
-                    .eq("date", date)
-                    .execute()
+        Args:
+            indexes: List of dicts with date, overall_score, dimension_scores
+                and target_score
+            chunk_size: Maximum number of dates per upsert (default: BULK_CHUNK_SIZE)
+
+        Returns:
+            dict: Report with the number of dates stored and the failed records
+        """
+        by_date = {index["date"]: index for index in indexes}
+        records = list(by_date.values())
+
+        report = {"stored": 0, "failed": []}
+        stored_dates = []
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start : start + chunk_size]
+            index_rows = [
+                {
+                    "date": index["date"],
+                    "overall_score": index["overall_score"],
+                    "air_score": index["dimension_scores"]["air"],
+                    "water_score": index["dimension_scores"]["water"],
+                    "nature_score": index["dimension_scores"]["nature"],
+                    "waste_score": index["dimension_scores"]["waste"],
+                    "noise_score": index["dimension_scores"]["noise"],
+                    "target_score": index["target_score"],
+                }
+                for index in chunk
+            ]
+            dimension_rows = [
+                {"dimension": dim, "score": score, "date": index["date"]}
+                for index in chunk
+                for dim, score in index["dimension_scores"].items()
+            ]
+
+            failed = self._write_bulk(
+                "green_city_index", index_rows, len(index_rows), "date"
+            )["failed"]
+            if not failed:
+                failed = self._write_bulk(
+                    "dimension_scores",
+                    dimension_rows,
+                    len(dimension_rows),
+                    "dimension,date",
+                )["failed"]
+
+            if failed:
+                report["failed"].extend(
+                    {"index": start + i, "row": index, "error": failed[0]["error"]}
+                    for i, index in enumerate(chunk)
                 )
             else:
-                # Insert new record
-                result = (
-                    self.client.table("green_city_index")
-                    .insert(
-                        {
-                            "date": date,
-                            "overall_score": overall_score,
-                            "air_score": dimension_scores["air"],
-                            "water_score": dimension_scores["water"],
-                            "nature_score": dimension_scores["nature"],
-                            "waste_score": dimension_scores["waste"],
-                            "noise_score": dimension_scores["noise"],
-                            "target_score": target_score,
-                        }
-                    )
-                    .execute()
-                )
+                report["stored"] += len(chunk)
+                stored_dates.extend(index["date"] for index in chunk)
 
-            # Also store individual dimension scores
-            for dim, score in dimension_scores.items():
-                self.store_dimension_score(dim, score, date)
+        if stored_dates:
+            self._refresh_rollups_after_write(stored_dates)
+        return report
 
-            return True
-        except Exception as e:
-            logger.error(f"Failed to store index: {e}")
-            return False
+    def store_rollups(self, rollups, chunk_size=None):
+        """
+        Store rollup rows in the index_rollups table
+
+        Args:
+            rollups: List of rollup dicts as built by compute_rollups
+            chunk_size: Maximum number of rows per upsert (default: BULK_CHUNK_SIZE)
+
+        Returns:
+            dict: Report with the number of rows stored and the failed rows
+        """
+        records = [
+            {column: row[column] for column in ROLLUP_COLUMNS} for row in rollups
+        ]
+        return self._write_bulk(
+            "index_rollups", records, chunk_size, "period,period_start,metric"
+        )
 
     def get_latest_index(self):
         """
@@ -319,3 +483,174 @@ class SupabaseManager:
         except Exception as e:
             logger.error(f"Failed to get historical index: {e}")
             return []
+
+    def _keyset_filter(self, keys, last):
+        """
+        Build a PostgREST or= filter selecting rows after the last key
+
+        For keys (date, id) this is date > d OR (date = d AND id > i).
+        """
+        clauses = []
+        for i, key in enumerate(keys):
+            equal = [f"{k}.eq.{last[k]}" for k in keys[:i]]
+            after = f"{key}.gt.{last[key]}"
+            clauses.append(f"and({','.join(equal + [after])})" if equal else after)
+        return ",".join(clauses)
+
+    def _query_keyset(
+        self,
+        table,
+        keys,
+        start,
+        end,
+        columns,
+        page_size,
+        filters=None,
+        date_column="date",
+    ):
+        """
+        Yield the rows of a table one page per request, seeking past the last
+        key of the previous page instead of using an offset
+
+        Args:
+            table: Name of the table
+            keys: Unique ordering columns, e.g. ["date"] or ["date", "id"]
+            start: First date to include (YYYY-MM-DD, default: unbounded)
+            end: Last date to include (YYYY-MM-DD, default: unbounded)
+            columns: Columns to return (default: all)
+            page_size: Rows per request (default: READ_PAGE_SIZE)
+            filters: Dict of column -> allowed values, None values are ignored
+            date_column: Column start and end apply to
+        """
+        if not self.client:
+            logger.warning("No Supabase client available")
+            return
+
+        page_size = page_size or self.READ_PAGE_SIZE
+        if columns:
+            selected = list(columns) + [key for key in keys if key not in columns]
+            projection = ",".join(selected)
+        else:
+            projection = "*"
+
+        last = None
+        while True:
+            query = self.client.table(table).select(projection)
+            if start is not None:
+                query = query.gte(date_column, str(start))
+            if end is not None:
+                query = query.lte(date_column, str(end))
+            for column, values in (filters or {}).items():
+                if values is not None:
+                    query = query.in_(column, list(values))
+            if last is not None:
+                query = query.or_(self._keyset_filter(keys, last))
+            for key in keys:
+                query = query.order(key)
+
+            try:
+                page = query.limit(page_size).execute().data or []
+            except Exception as e:
+                logger.error(f"Failed to query {table}: {e}")
+                raise
+
+            for row in page:
+                yield {column: row[column] for column in columns} if columns else row
+            if len(page) < page_size:
+                return
+            last = {key: page[-1][key] for key in keys}
+
+    def query_index(self, start=None, end=None, columns=None, page_size=None):
+        """
+        Stream index rows between two dates, one page per request
+
+        Args:
+            start: First date to include (YYYY-MM-DD, default: unbounded)
+            end: Last date to include (YYYY-MM-DD, default: unbounded)
+            columns: Columns to return, e.g. ["date", "overall_score"]
+                (default: all)
+            page_size: Rows per request (default: READ_PAGE_SIZE)
+
+        Yields:
+            dict: Index rows, oldest first
+        """
+        return self._query_keyset(
+            "green_city_index", ["date"], start, end, columns, page_size
+        )
+
+    def query_dimension_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        """
+        Stream dimension scores between two dates, see query_index
+
+        Args:
+            dimensions: Only return these dimensions (default: all)
+
+        Yields:
+            dict: Dimension score rows ordered by date and dimension
+        """
+        return self._query_keyset(
+            "dimension_scores",
+            ["date", "dimension"],
+            start,
+            end,
+            columns,
+            page_size,
+            {"dimension": dimensions},
+        )
+
+    def query_normalized_scores(
+        self, start=None, end=None, columns=None, page_size=None, dimensions=None
+    ):
+        """
+        Stream normalized scores between two dates, see query_index
+
+        Args:
+            dimensions: Only return these dimensions (default: all)
+
+        Yields:
+            dict: Normalized score rows ordered by date and id
+        """
+        return self._query_keyset(
+            "normalized_scores",
+            ["date", "id"],
+            start,
+            end,
+            columns,
+            page_size,
+            {"dimension": dimensions},
+        )
+
+    def query_rollups(
+        self,
+        period="month",
+        start=None,
+        end=None,
+        metrics=None,
+        columns=None,
+        page_size=None,
+    ):
+        """
+        Stream weekly or monthly rollups from the index_rollups table
+
+        Args:
+            period: 'week' or 'month'
+            start: First period start to include (YYYY-MM-DD)
+            end: Last period start to include (YYYY-MM-DD)
+            metrics: Only return these metrics, e.g. ["overall", "air"]
+                (default: all)
+
+        Yields:
+            dict: Rollup rows ordered by period_start and metric
+        """
+        return self._query_keyset(
+            "index_rollups",
+            ["period_start", "metric"],
+            start,
+            end,
+            columns,
+            page_size,
+            {"period": [period], "metric": metrics},
+            date_column="period_start",
+        )
@@ -0,0 +1,94 @@
+# backend/tests/test_air_quality_archive.py
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from backend.collectors.air_quality import AirQualityCollector
+from backend.pipeline.historic_data_generator import SimplifiedHistoricDataGenerator
+
+
+class ArchiveFixtureHandler(BaseHTTPRequestHandler):
+    """Serves hourly history where pm10 equals the day of the month"""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start = datetime.strptime(query["start_date"][0], "%Y-%m-%d")
+        end = datetime.strptime(query["end_date"][0], "%Y-%m-%d")
+        self.server.requests.append((query["start_date"][0], query["end_date"][0]))
+
+        times, pm10 = [], []
+        day = start
+        while day <= end:
+            for hour in range(24):
+                times.append(f"{day:%Y-%m-%d}T{hour:02d}:00")
+                pm10.append(float(day.day))
+            day += timedelta(days=1)
+
+        body = json.dumps(
+            {
+                "hourly": {
+                    "time": times,
+                    "pm10": pm10,
+                    "pm2_5": [4.0] * len(times),
+                    "nitrogen_dioxide": [8.0] * len(times),
+                    "european_aqi": [None] * len(times),
+                }
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _collector(server):
+    collector = AirQualityCollector(cache=False)
+    collector.base_url = f"http://127.0.0.1:{server.server_port}/v1/air-quality"
+    return collector
+
+
+def test_history_is_fetched_in_large_ranges():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArchiveFixtureHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        history = _collector(server).fetch_history(
+            "2024-01-01", "2024-12-31", days_per_request=92
+        )
+
+        assert len(server.requests) == 4
+        assert len(history) == 366
+        assert history["2024-03-15"] == {
+            "pm10": 15.0,
+            "pm2_5": 4.0,
+            "no2": 8.0,
+            "european_aqi": None,
+        }
+    finally:
+        server.shutdown()
+
+
+def test_generator_uses_archive_air_data():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArchiveFixtureHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        generator = SimplifiedHistoricDataGenerator()
+        generator.air_collector = _collector(server)
+
+        history = generator.generate_historic_dataset(
+            "2024-05-01", "2024-05-10", air_source="archive"
+        )
+
+        assert len(server.requests) == 1
+        assert [index["raw_data"]["air"]["pm10"] for index in history] == [
+            float(day) for day in range(1, 11)
+        ]
+    finally:
+        server.shutdown()
@@ -0,0 +1,94 @@
+# backend/tests/test_air_quality_async.py
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from backend.collectors.air_quality import AirQualityCollector
+
+
+class StubAirQualityHandler(BaseHTTPRequestHandler):
+    """Answers like open-meteo, failing the first request of a flaky latitude"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        latitude = float(query["latitude"][0])
+
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.calls[latitude] = server.calls.get(latitude, 0) + 1
+            first_call = server.calls[latitude] == 1
+        time.sleep(0.02)
+        with server.lock:
+            server.in_flight -= 1
+
+        if latitude == server.flaky_latitude and first_call:
+            body, status = b"{}", 503
+        else:
+            body = json.dumps(
+                {
+                    "hourly": {
+                        "pm10": [latitude, latitude],
+                        "pm2_5": [1.0, 3.0],
+                        "nitrogen_dioxide": [4.0, 4.0],
+                    },
+                    "current": {"european_aqi": 20},
+                }
+            ).encode()
+            status = 200
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAirQualityHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.calls = {}
+    server.flaky_latitude = 3.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_fetch_many_async_limits_concurrency_and_retries():
+    server = _start_stub()
+    try:
+        collector = AirQualityCollector(backoff=0.01, cache=False)
+        collector.base_url = f"http://127.0.0.1:{server.server_port}/v1/air-quality"
+
+        queries = [{"latitude": float(i), "longitude": 10.0} for i in range(12)]
+        results = asyncio.run(collector.fetch_many_async(queries, concurrency=3))
+
+        assert [r["pm10"] for r in results] == [float(i) for i in range(12)]
+        assert results[0]["pm2_5"] == 2.0
+        assert server.calls[3.0] == 2
+        assert server.max_in_flight <= 3
+    finally:
+        server.shutdown()
+
+
+def test_fetch_current_data_async():
+    server = _start_stub()
+    try:
+        collector = AirQualityCollector(latitude=5.0, cache=False)
+        collector.base_url = f"http://127.0.0.1:{server.server_port}/v1/air-quality"
+
+        result = asyncio.run(collector.fetch_current_data_async())
+
+        assert result == {"pm10": 5.0, "pm2_5": 2.0, "no2": 4.0, "european_aqi": 20}
+    finally:
+        server.shutdown()
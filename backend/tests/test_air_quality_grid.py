@@ -0,0 +1,83 @@
+# backend/tests/test_air_quality_grid.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from backend.collectors.air_quality import AirQualityCollector
+
+
+class GridFixtureHandler(BaseHTTPRequestHandler):
+    """Serves one day of hourly data per coordinate, pm10 equal to latitude;
+    latitude 0 answers with an API error"""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        latitudes = [float(lat) for lat in query["latitude"][0].split(",")]
+        date = query["start_date"][0]
+
+        if 0.0 in latitudes:
+            body = {"error": True, "reason": "Latitude must be in range"}
+            status = 400
+        else:
+            times = [f"{date}T{hour:02d}:00" for hour in range(24)]
+            body = [
+                {
+                    "hourly": {
+                        "time": times,
+                        "pm10": [latitude] * 24,
+                        "pm2_5": [4.0] * 24,
+                        "nitrogen_dioxide": [None] * 12 + [8.0] * 12,
+                        "european_aqi": [20.0] * 24,
+                    }
+                }
+                for latitude in latitudes
+            ]
+            # A single coordinate returns an object instead of a list
+            if len(body) == 1:
+                body = body[0]
+            status = 200
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def collector():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GridFixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    collector = AirQualityCollector(cache=False)
+    collector.base_url = f"http://127.0.0.1:{server.server_port}/v1/air-quality"
+    yield collector
+    server.shutdown()
+
+
+def test_grid_splits_multi_coordinate_list_responses(collector):
+    locations = {"a": (56.1, 10.2), "b": (56.2, 10.1), "c": (56.3, 10.0)}
+
+    daily = collector.fetch_grid(
+        locations, "2024-05-01", locations_per_request=2
+    ).set_index("location")
+
+    assert list(daily.index) == ["a", "b", "c"]
+    assert daily.loc["b", "pm10"] == pytest.approx(56.2)
+    assert daily.loc["c", "no2"] == 8.0
+
+
+def test_error_responses_raise_instead_of_returning_no_data(collector):
+    with pytest.raises(requests.HTTPError):
+        collector.fetch_grid({"bad": (0.0, 10.0)}, "2024-05-01")
+
+    collector.latitude = 0.0
+    with pytest.raises(requests.HTTPError):
+        collector.fetch_current_data()
@@ -0,0 +1,44 @@
+# backend/tests/test_benchmarks.py
+import pytest
+
+from backend.benchmarks.run_benchmarks import REFERENCE, compare, measure, run
+
+
+def test_compare_flags_only_regressions_beyond_the_threshold():
+    baseline = {
+        REFERENCE: {"p50_ms": 1.0, "relative": 1.0},
+        "fast": {"p50_ms": 1.0, "relative": 2.0},
+        "slow": {"p50_ms": 1.0, "relative": 2.0},
+    }
+    # A machine twice as slow: absolute medians double, relative ones don't
+    results = {
+        REFERENCE: {"p50_ms": 2.0, "relative": 1.0},
+        "fast": {"p50_ms": 4.8, "relative": 2.4},
+        "slow": {"p50_ms": 6.0, "relative": 3.0},
+        "new": {"p50_ms": 9.0, "relative": 4.5},
+    }
+
+    regressions = compare(results, baseline, threshold=0.25)
+
+    assert [r["name"] for r in regressions] == ["slow"]
+    assert regressions[0]["ratio"] == 1.5
+
+
+def test_measure_reports_percentiles():
+    result = measure(lambda: None, repeat=20, warmup=0)
+
+    assert result["calls"] == 20
+    assert result["min_ms"] <= result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+
+def test_storage_benchmarks_run_against_the_local_postgrest():
+    # A smoke run: timings over HTTP are too noisy to assert on here
+    results = run(["supabase.store_raw_metrics_bulk"], repeat=3, warmup=0)
+
+    assert list(results) == [REFERENCE, "supabase.store_raw_metrics_bulk"]
+    result = results["supabase.store_raw_metrics_bulk"]
+    assert result["calls"] == 3
+    assert {"throughput", "min_ms", "p50_ms", "p95_ms", "p99_ms"} <= set(result)
+    assert result["relative"] == pytest.approx(
+        result["p50_ms"] / results[REFERENCE]["p50_ms"], rel=1e-3
+    )
@@ -0,0 +1,139 @@
+# backend/tests/test_bulk_writes.py
+from backend.storage.supabase_client import SupabaseManager
+
+
+class FakeQuery:
+    def __init__(self, client, table, rows, on_conflict=None):
+        self.client = client
+        self.table = table
+        self.rows = rows
+        self.on_conflict = on_conflict
+
+    def execute(self):
+        self.client.requests.append((self.table, self.rows, self.on_conflict))
+        if any(row.get("metric_name") == "broken" for row in self.rows):
+            raise RuntimeError("insert rejected")
+        return type("Result", (), {"data": self.rows})()
+
+
+class FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def insert(self, rows):
+        return FakeQuery(self.client, self.name, rows)
+
+    def upsert(self, rows, on_conflict=""):
+        return FakeQuery(self.client, self.name, rows, on_conflict)
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = []
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+def _raw_rows(count):
+    return [
+        {
+            "dimension": "air",
+            "metric_name": f"metric_{i}",
+            "value": float(i),
+            "unit": "μg/m³",
+            "source": "API",
+        }
+        for i in range(count)
+    ]
+
+
+def test_raw_metrics_bulk_sends_one_insert_per_chunk(monkeypatch):
+    db = SupabaseManager()
+    client = FakeClient()
+    monkeypatch.setattr(db, "client", client)
+
+    report = db.store_raw_metrics_bulk(_raw_rows(17), chunk_size=10)
+
+    assert report == {"stored": 17, "failed": []}
+    assert [len(rows) for _, rows, _ in client.requests] == [10, 7]
+    assert all(table == "raw_metrics" for table, _, _ in client.requests)
+
+
+def test_normalized_scores_bulk_reports_failed_rows(monkeypatch):
+    db = SupabaseManager()
+    client = FakeClient()
+    monkeypatch.setattr(db, "client", client)
+
+    rows = [
+        {
+            "dimension": "water",
+            "metric_name": name,
+            "raw_value": 1.0,
+            "normalized_score": 50,
+            "calculation_method": "linear_scaling",
+            "date": "2025-05-05",
+        }
+        for name in ["ili", "consumption", "broken", "treatment_compliance"]
+    ]
+    report = db.store_normalized_scores_bulk(rows, chunk_size=2)
+
+    assert report["stored"] == 2
+    assert [f["index"] for f in report["failed"]] == [2, 3]
+    assert report["failed"][0]["error"] == "insert rejected"
+
+
+def test_bulk_without_client_fails_every_row(monkeypatch):
+    db = SupabaseManager()
+    monkeypatch.setattr(db, "client", None)
+
+    report = db.store_raw_metrics_bulk(_raw_rows(3))
+
+    assert report["stored"] == 0
+    assert len(report["failed"]) == 3
+
+
+def _index(date, overall=70.0):
+    return {
+        "date": date,
+        "overall_score": overall,
+        "dimension_scores": {
+            "air": 80.0,
+            "water": 75.0,
+            "nature": 65.0,
+            "waste": 70.0,
+            "noise": 60.0,
+        },
+        "target_score": 70.0,
+    }
+
+
+def test_store_index_is_two_upserts(monkeypatch):
+    db = SupabaseManager()
+    client = FakeClient()
+    monkeypatch.setattr(db, "client", client)
+
+    assert db.store_index(**_index("2025-05-05"))
+
+    assert [(table, len(rows), key) for table, rows, key in client.requests] == [
+        ("green_city_index", 1, "date"),
+        ("dimension_scores", 5, "dimension,date"),
+    ]
+
+
+def test_indexes_bulk_batches_dates_and_keeps_last_duplicate(monkeypatch):
+    db = SupabaseManager()
+    client = FakeClient()
+    monkeypatch.setattr(db, "client", client)
+
+    indexes = [_index(f"2025-05-{day:02d}") for day in range(1, 6)]
+    indexes.append(_index("2025-05-05", overall=71.0))
+    report = db.store_indexes_bulk(indexes, chunk_size=3)
+
+    assert report == {"stored": 5, "failed": []}
+    index_requests = [
+        rows for table, rows, _ in client.requests if table == "green_city_index"
+    ]
+    assert [len(rows) for rows in index_requests] == [3, 2]
+    assert index_requests[-1][-1]["overall_score"] == 71.0
@@ -0,0 +1,65 @@
+# backend/tests/test_collection.py
+import threading
+
+import pytest
+
+from backend.pipeline.green_city_index import GreenCityIndex
+from backend.pipeline.index_calculator import IndexCalculator
+from backend.storage.sqlite_backend import SQLiteStorage
+
+AIR = {"pm10": 10.0, "pm2_5": 5.0, "no2": 8.0, "european_aqi": 30}
+
+
+def broken():
+    raise RuntimeError("sensor offline")
+
+
+def make_gci(**options):
+    gci = GreenCityIndex(storage=SQLiteStorage(":memory:"), **options)
+    gci.air_collector.fetch_current_data = lambda: dict(AIR)
+    return gci
+
+
+def test_failing_collector_is_left_out_in_both_modes():
+    for concurrent in [True, False]:
+        gci = make_gci(concurrent=concurrent)
+        gci.air_collector.fetch_current_data = broken
+
+        raw_data = gci.collect_all_data()
+
+        assert "air" not in raw_data
+        assert sorted(dim for dim in raw_data if dim != "timestamp") == [
+            "nature",
+            "noise",
+            "waste",
+            "water",
+        ]
+
+
+def test_slow_collector_times_out_with_its_own_timeout():
+    release = threading.Event()
+    gci = make_gci(collector_timeout={"noise": 0.05})
+    gci.noise_simulator.get_current_data = lambda: release.wait(5) and {}
+
+    raw_data = gci.collect_all_data()
+    release.set()
+
+    assert "noise" not in raw_data
+    assert raw_data["air"] == AIR
+
+
+def test_partial_index_is_reweighted_marked_and_not_stored():
+    gci = make_gci()
+    gci.air_collector.fetch_current_data = broken
+
+    index = gci.calculate_index(gci.collect_all_data())
+
+    assert index["partial"]
+    assert index["missing_dimensions"] == ["air"]
+    assert "air" not in index["dimension_scores"]
+    scores = index["dimension_scores"].values()
+    assert index["overall_score"] == pytest.approx(sum(scores) / len(scores), abs=0.1)
+    assert gci.storage.get_latest_index() is None
+
+    partial = IndexCalculator().compute({dim: {} for dim in ["air", "water"]})
+    assert partial["missing_dimensions"] == ["nature", "waste", "noise"]
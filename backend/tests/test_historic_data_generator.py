@@ -0,0 +1,82 @@
+# backend/tests/test_historic_data_generator.py
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.pipeline.historic_data_generator import SimplifiedHistoricDataGenerator
+from backend.pipeline.scoring_config import ScoringConfig
+
+
+def test_vectorized_generator_matches_scalar_path():
+    generator = SimplifiedHistoricDataGenerator(reference_date=datetime(2025, 5, 6))
+    # Covers every special event day and month of the year
+    dates = [datetime(2023, 12, 20) + timedelta(days=i) for i in range(400)]
+
+    expected = [generator.generate_data_for_date(date) for date in dates]
+
+    assert generator.generate_data_for_dates(dates) == expected
+
+
+def test_numpy_noise_is_reproducible_for_a_seed():
+    generator = SimplifiedHistoricDataGenerator(reference_date=datetime(2025, 5, 6))
+    dates = np.arange("2015-01-01", "2025-01-01", dtype="datetime64[D]")
+
+    keys, first = generator.generate_data_matrix(dates, noise="numpy", seed=7)
+    _, second = generator.generate_data_matrix(dates, noise="numpy", seed=7)
+
+    assert first.shape == (len(dates), len(keys))
+    assert np.array_equal(first, second)
+
+
+def test_batch_scoring_is_identical_to_per_record_compute():
+    generator = SimplifiedHistoricDataGenerator(reference_date=datetime(2025, 5, 6))
+    dates = [datetime(2024, 1, 1) + timedelta(days=i) for i in range(20)]
+    all_raw_data = generator.generate_data_for_dates(dates)
+    # Archive air data can be missing single metrics or a whole day
+    all_raw_data[3]["air"].update(pm10=None, no2=float("nan"))
+    all_raw_data[4]["air"] = {"pm10": None, "pm2_5": None, "no2": None}
+    del all_raw_data[5]["noise"]
+
+    expected = [
+        generator.calculator.compute(
+            raw_data, date=raw_data["timestamp"][:10], timestamp=raw_data["timestamp"]
+        )
+        for raw_data in all_raw_data
+    ]
+    batch = generator.calculator.compute_batch(
+        all_raw_data,
+        [raw_data["timestamp"][:10] for raw_data in all_raw_data],
+        [raw_data["timestamp"] for raw_data in all_raw_data],
+    )
+
+    assert json.dumps(batch) == json.dumps(expected)
+    assert batch[5]["missing_dimensions"] == ["noise"]
+
+
+def test_scoring_config_is_used_for_generated_history():
+    config = ScoringConfig(
+        "2", weights={"air": 1.0, "water": 0, "nature": 0, "waste": 0, "noise": 0}
+    )
+    generator = SimplifiedHistoricDataGenerator(
+        reference_date=datetime(2025, 5, 6), scoring_config=config
+    )
+
+    history = generator.generate_historic_dataset("2024-01-01", "2024-01-06")
+
+    assert [index["date"] for index in history][:2] == ["2024-01-01", "2024-01-02"]
+    for index in history:
+        assert index["overall_score"] == index["dimension_scores"]["air"]
+
+
+def test_generating_data_creates_no_collector_or_storage(monkeypatch):
+    def unavailable():
+        raise AssertionError("storage created")
+
+    monkeypatch.setattr(
+        "backend.pipeline.historic_data_generator.get_storage_backend", unavailable
+    )
+    generator = SimplifiedHistoricDataGenerator(reference_date=datetime(2025, 5, 6))
+
+    assert len(generator.generate_historic_dataset("2024-01-01", "2024-01-03")) == 3
+    assert generator._air_collector is None and generator._storage is None
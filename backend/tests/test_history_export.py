@@ -0,0 +1,46 @@
+# backend/tests/test_history_export.py
+import json
+
+from backend.pipeline.history_export import load_indexes, read_history, save_to_parquet
+
+HISTORY_FILE = "data/processed/green_city_index_complete_history.json"
+
+
+def _history():
+    with open(HISTORY_FILE) as f:
+        return json.load(f)
+
+
+def test_projection_and_date_range_return_one_row_per_date(tmp_path):
+    history = _history()
+    path = save_to_parquet(history, str(tmp_path / "history.parquet"))
+
+    scores = read_history(
+        path, columns=["date", "overall_score"], start="2024-01-01", end="2024-01-31"
+    )
+
+    expected = {
+        index["date"]: index["overall_score"]
+        for index in history
+        if "2024-01-01" <= index["date"] <= "2024-01-31"
+    }
+    assert list(scores.columns) == ["date", "overall_score"]
+    assert {
+        day.strftime("%Y-%m-%d"): score
+        for day, score in zip(scores["date"], scores["overall_score"])
+    } == expected
+    assert len(scores) == len(expected)
+
+
+def test_indexes_round_trip(tmp_path):
+    history = _history()[:30]
+    path = save_to_parquet(history, str(tmp_path / "history.parquet"))
+
+    loaded = load_indexes(path)
+
+    for original, index in zip(sorted(history, key=lambda i: i["date"]), loaded):
+        assert index["date"] == original["date"]
+        assert index["overall_score"] == original["overall_score"]
+        assert index["dimension_scores"] == original["dimension_scores"]
+        for dimension, metrics in index["raw_data"].items():
+            assert metrics == original["raw_data"][dimension]
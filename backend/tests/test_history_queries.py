@@ -0,0 +1,62 @@
+# backend/tests/test_history_queries.py
+from backend.storage.sqlite_backend import SQLiteStorage
+from backend.storage.supabase_client import SupabaseManager
+
+SCORES = {"air": 80.0, "water": 75.0, "nature": 65.0, "waste": 70.0, "noise": 60.0}
+
+
+def _storage(days):
+    storage = SQLiteStorage(":memory:")
+    storage.store_indexes_bulk(
+        [
+            {
+                "date": f"2025-05-{day:02d}",
+                "overall_score": 60.0 + day,
+                "dimension_scores": SCORES,
+                "target_score": 70.0,
+            }
+            for day in range(1, days + 1)
+        ]
+    )
+    return storage
+
+
+def test_query_index_pages_through_a_date_window():
+    storage = _storage(10)
+    statements = []
+    storage.conn.set_trace_callback(statements.append)
+
+    rows = list(
+        storage.query_index(
+            "2025-05-03", "2025-05-09", columns=["overall_score"], page_size=3
+        )
+    )
+
+    assert rows == [{"overall_score": 60.0 + day} for day in range(3, 10)]
+    assert len([sql for sql in statements if sql.startswith("SELECT")]) == 3
+
+
+def test_query_dimension_scores_seeks_on_date_and_dimension():
+    storage = _storage(2)
+
+    rows = list(
+        storage.query_dimension_scores(
+            columns=["date", "dimension"], page_size=4, dimensions=["air", "noise"]
+        )
+    )
+
+    assert rows == [
+        {"date": "2025-05-01", "dimension": "air"},
+        {"date": "2025-05-01", "dimension": "noise"},
+        {"date": "2025-05-02", "dimension": "air"},
+        {"date": "2025-05-02", "dimension": "noise"},
+    ]
+
+
+def test_supabase_keyset_filter_continues_after_the_last_row():
+    keys = ["date", "id"]
+    last = {"date": "2025-05-01", "id": 42}
+
+    assert SupabaseManager()._keyset_filter(keys, last) == (
+        "date.gt.2025-05-01,and(date.eq.2025-05-01,id.gt.42)"
+    )
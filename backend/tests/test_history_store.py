@@ -0,0 +1,44 @@
+# backend/tests/test_history_store.py
+import json
+
+from backend.storage.history_store import PartitionedHistoryStore
+
+
+def _index(date, score):
+    return {"date": date, "overall_score": score, "dimension_scores": {}}
+
+
+def test_append_writes_one_line_to_the_month_partition(tmp_path):
+    store = PartitionedHistoryStore(str(tmp_path))
+    store.append_many([_index("2025-04-30", 70.0), _index("2025-05-01", 71.0)])
+
+    store.append(_index("2025-05-02", 72.0))
+
+    may = tmp_path / "year=2025" / "month=05" / "index.jsonl"
+    assert len(may.read_text().splitlines()) == 2
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["partitions"]["2025-05"] == {
+        "path": "year=2025/month=05/index.jsonl",
+        "min_date": "2025-05-01",
+        "max_date": "2025-05-02",
+        "rows": 2,
+    }
+
+
+def test_read_opens_only_overlapping_partitions(tmp_path, monkeypatch):
+    store = PartitionedHistoryStore(str(tmp_path))
+    store.append_many([_index("2025-04-30", 70.0), _index("2025-05-01", 71.0)])
+    store.append(_index("2025-05-01", 75.0))
+
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    rows = store.read(start="2025-05-01", end="2025-05-31")
+
+    assert rows == [_index("2025-05-01", 75.0)]
+    assert not any("month=04" in path for path in opened)
@@ -0,0 +1,59 @@
+# backend/tests/test_http_cache.py
+import pytest
+
+from backend.collectors.air_quality import AirQualityCollector
+from backend.collectors.http_cache import CacheMissError, ResponseCache
+
+URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+
+
+def test_past_dates_never_expire_and_current_dates_use_ttl(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), default_ttl=0)
+    historic = {
+        "latitude": 56.1567,
+        "start_date": "2024-01-01",
+        "end_date": "2024-01-31",
+    }
+    current = {
+        "latitude": 56.1567,
+        "start_date": "2999-01-01",
+        "end_date": "2999-01-01",
+    }
+
+    cache.set(URL, historic, {"hourly": {"pm10": [1.0]}})
+    cache.set(URL, current, {"hourly": {"pm10": [2.0]}})
+
+    assert cache.get(URL, historic) == {"hourly": {"pm10": [1.0]}}
+    assert cache.get(URL, current) is None
+
+
+def test_offline_mode_raises_on_miss(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), offline=True)
+
+    with pytest.raises(CacheMissError):
+        cache.get(URL, {"latitude": 1.0})
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), max_bytes=100)
+    params = [{"end_date": "2024-01-0%d" % day} for day in range(1, 4)]
+
+    cache.set(URL, params[0], {"values": "x" * 30})
+    cache.set(URL, params[1], {"values": "y" * 30})
+    cache.get(URL, params[0])
+    cache.set(URL, params[2], {"values": "z" * 30})
+
+    assert cache.get(URL, params[0]) is not None
+    assert cache.get(URL, params[1]) is None
+    assert cache.get(URL, params[2]) is not None
+
+
+def test_collector_caches_only_when_a_path_is_configured(tmp_path, monkeypatch):
+    monkeypatch.delenv("AGCI_HTTP_CACHE_PATH", raising=False)
+    assert AirQualityCollector().cache is None
+
+    path = tmp_path / "http_cache.sqlite"
+    monkeypatch.setenv("AGCI_HTTP_CACHE_PATH", str(path))
+    collector = AirQualityCollector()
+    assert collector.cache.path == str(path)
+    assert path.exists()
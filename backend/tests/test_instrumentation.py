@@ -0,0 +1,80 @@
+# backend/tests/test_instrumentation.py
+import json
+import time
+
+import pytest
+
+from backend.pipeline.green_city_index import GreenCityIndex
+from backend.pipeline.instrumentation import Instrumentation
+from backend.storage.sqlite_backend import SQLiteStorage
+
+
+def test_pipeline_run_reports_stages_collectors_and_storage(tmp_path):
+    instrumentation = Instrumentation("test")
+    gci = GreenCityIndex(
+        storage=SQLiteStorage(":memory:"), instrumentation=instrumentation
+    )
+    gci.air_collector.fetch_current_data = lambda: {"pm10": 10.0, "pm2_5": 5.0}
+
+    def broken():
+        raise RuntimeError("sensor offline")
+
+    gci.noise_simulator.get_current_data = broken
+
+    gci.calculate_index(gci.collect_all_data())
+    gci.storage.get_normalized_scores()
+    path = instrumentation.write_report(str(tmp_path), status="success")
+
+    with open(path) as f:
+        report = json.load(f)
+    metrics = report["metrics"]
+    assert report["run"] == "test"
+    assert metrics["collector.air"]["calls"] == 1
+    assert metrics["collector.noise"]["errors"] == 1
+    for stage in ["collect", "store_raw_data", "normalization"]:
+        assert metrics[f"stage.{stage}"]["calls"] == 1
+    assert metrics["storage.store_raw_metrics_bulk"]["bytes"] > 0
+    # Reads are timed but their payload isn't serialized to be measured
+    assert metrics["storage.get_normalized_scores"]["calls"] == 1
+    assert metrics["storage.get_normalized_scores"]["bytes"] == 0
+    # Without noise data the index is partial and not stored
+    assert "stage.store_index" not in metrics
+    assert "storage.store_index" not in metrics
+
+
+def test_stage_errors_and_prometheus_textfile(tmp_path):
+    instrumentation = Instrumentation("test")
+    with pytest.raises(ValueError):
+        with instrumentation.stage("stage.broken"):
+            raise ValueError("boom")
+
+    path = instrumentation.write_prometheus(str(tmp_path / "agci.prom"), "failed")
+
+    text = (tmp_path / "agci.prom").read_text()
+    assert path.endswith("agci.prom")
+    assert 'agci_run_success{run="test"} 0' in text
+    assert 'agci_operation_errors{run="test",operation="stage.broken"} 1' in text
+
+
+def test_generator_results_are_timed_until_exhausted():
+    instrumentation = Instrumentation("test")
+
+    class Source:
+        def query_rows(self):
+            for row in range(3):
+                time.sleep(0.01)
+                yield row
+
+        def query_broken(self):
+            yield 1
+            raise RuntimeError("connection lost")
+
+    source = instrumentation.instrument(Source(), "storage")
+    rows = source.query_rows()
+    assert "storage.query_rows" not in instrumentation.metrics
+
+    assert list(rows) == [0, 1, 2]
+    assert instrumentation.metrics["storage.query_rows"]["seconds"] >= 0.03
+    with pytest.raises(RuntimeError):
+        list(source.query_broken())
+    assert instrumentation.metrics["storage.query_broken"]["errors"] == 1
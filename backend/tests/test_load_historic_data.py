@@ -0,0 +1,89 @@
+# backend/tests/test_load_historic_data.py
+import json
+
+import pytest
+
+from backend.pipeline.load_historic_data import (
+    iter_json_records,
+    stream_json_to_supabase,
+)
+from backend.storage.supabase_client import SupabaseManager
+
+HISTORY_FILE = "data/processed/green_city_index_complete_history.json"
+
+
+class RecordingClient:
+    """Minimal Supabase stand-in that records upserted index dates"""
+
+    def __init__(self, fail_after=None):
+        self.dates = []
+        self.fail_after = fail_after
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=""):
+        self.rows = rows
+        self.on_conflict = on_conflict
+        return self
+
+    def execute(self):
+        if self.on_conflict == "date":
+            if self.fail_after is not None and len(self.dates) >= self.fail_after:
+                raise ConnectionError("connection reset")
+            self.dates.extend(row["date"] for row in self.rows)
+        return type("Result", (), {"data": self.rows})()
+
+
+def test_iter_json_records_matches_json_load():
+    with open(HISTORY_FILE) as f:
+        expected = json.load(f)
+
+    assert list(iter_json_records(HISTORY_FILE, read_size=1000)) == expected
+
+
+def test_malformed_record_fails_without_buffering_the_file(tmp_path):
+    path = tmp_path / "history.json"
+    good = json.dumps({"date": "2025-05-01", "overall_score": 70.0})
+    path.write_text("[" + good + ', {"date": oops}, ' + ", ".join([good] * 5000) + "]")
+
+    records = iter_json_records(str(path), read_size=100, max_record_size=1000)
+    assert next(records)["date"] == "2025-05-01"
+    with pytest.raises(ValueError, match="exceeds 1000 characters"):
+        next(records)
+
+
+def test_stream_resumes_from_checkpoint(tmp_path, monkeypatch):
+    records = [
+        {
+            "date": f"2024-01-{day:02d}",
+            "overall_score": 70.0,
+            "dimension_scores": {
+                "air": 70.0,
+                "water": 70.0,
+                "nature": 70.0,
+                "waste": 70.0,
+                "noise": 70.0,
+            },
+        }
+        for day in range(1, 11)
+    ]
+    json_path = tmp_path / "history.json"
+    json_path.write_text(json.dumps(records, indent=2))
+    checkpoint = tmp_path / "history.checkpoint"
+
+    db = SupabaseManager()
+    interrupted = RecordingClient(fail_after=4)
+    monkeypatch.setattr(db, "client", interrupted)
+    assert (
+        stream_json_to_supabase(json_path, batch_size=4, checkpoint_path=checkpoint)
+        == 4
+    )
+
+    resumed = RecordingClient()
+    monkeypatch.setattr(db, "client", resumed)
+    assert (
+        stream_json_to_supabase(json_path, batch_size=4, checkpoint_path=checkpoint)
+        == 6
+    )
+    assert resumed.dates == [r["date"] for r in records[4:]]
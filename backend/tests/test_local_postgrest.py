@@ -0,0 +1,109 @@
+# backend/tests/test_local_postgrest.py
+import time
+
+import httpx
+import pytest
+from supabase import create_client
+
+from backend.storage.local_postgrest import LOCAL_API_KEY, LocalPostgRESTServer
+from backend.storage.supabase_client import SupabaseManager
+
+SCORES = {"air": 80.0, "water": 75.0, "nature": 65.0, "waste": 70.0, "noise": 60.0}
+
+
+def _indexes(days):
+    return [
+        {
+            "date": f"2025-05-{day:02d}",
+            "overall_score": 60.0 + day,
+            "dimension_scores": SCORES,
+            "target_score": 70.0,
+        }
+        for day in range(1, days + 1)
+    ]
+
+
+@pytest.fixture
+def server():
+    with LocalPostgRESTServer() as server:
+        yield server
+
+
+@pytest.fixture
+def db(server, monkeypatch):
+    db = SupabaseManager()
+    monkeypatch.setattr(db, "client", create_client(server.url, LOCAL_API_KEY))
+    return db
+
+
+def test_supabase_manager_runs_against_the_local_server(db):
+    assert db.store_indexes_bulk(_indexes(12)) == {"stored": 12, "failed": []}
+    assert db.store_index("2025-05-12", 99.0, SCORES, 70.0)
+
+    assert db.get_latest_index()["overall_score"] == 99.0
+    assert [row["date"] for row in db.get_historical_index(2)] == [
+        "2025-05-12",
+        "2025-05-11",
+    ]
+    rows = db.query_dimension_scores(
+        "2025-05-02", "2025-05-03", columns=["score"], page_size=3
+    )
+    assert len(list(rows)) == 10
+    (month,) = db.get_rollups("month", metrics=["overall"])
+    assert (month["count"], month["max"]) == (12, 99.0)
+
+
+def test_update_delete_and_errors(db):
+    table = db.client.table("green_city_index")
+    db.store_indexes_bulk(_indexes(3))
+
+    updated = table.update({"target_score": 80.0}).gte("date", "2025-05-02").execute()
+    deleted = table.delete().in_("date", ["2025-05-01", "2025-05-03"]).execute()
+
+    assert [row["date"] for row in updated.data] == ["2025-05-02", "2025-05-03"]
+    assert len(deleted.data) == 2
+    with pytest.raises(Exception, match="does not exist"):
+        table.select("missing_column").execute()
+
+
+def test_injected_latency_and_failures(server, db):
+    server.app.latency = 0.05
+    started = time.perf_counter()
+    assert db.get_latest_index() is None
+    assert time.perf_counter() - started >= 0.05
+
+    server.app.latency = 0
+    server.app.error_rate = 1.0
+    report = db.store_indexes_bulk(_indexes(2))
+    assert report["stored"] == 0
+    assert "Injected failure" in report["failed"][0]["error"]
+
+
+def test_raw_metrics_are_inserted_unless_writes_are_idempotent(db, monkeypatch):
+    row = {
+        "dimension": "air",
+        "metric_name": "pm10",
+        "value": 12.0,
+        "unit": "μg/m³",
+        "source": "API",
+        "collection_timestamp": "2025-05-01T02:00:00",
+    }
+    assert db.store_raw_metrics_bulk([row, row]) == {"stored": 2, "failed": []}
+
+    # Like a database without the unique keys, upserts are rejected
+    monkeypatch.setattr(db, "idempotent_writes", True)
+    report = db.store_raw_metrics_bulk([row])
+    assert "42P10" in report["failed"][0]["error"]
+
+
+def test_read_errors_are_raised_instead_of_returning_no_rows(monkeypatch):
+    with LocalPostgRESTServer() as server:
+        url = server.url
+    # Nothing listens on the port once the server is stopped
+    db = SupabaseManager()
+    monkeypatch.setattr(db, "client", create_client(url, LOCAL_API_KEY))
+
+    with pytest.raises(httpx.ConnectError):
+        db.get_indexes()
+    with pytest.raises(httpx.ConnectError):
+        db.get_normalized_scores()
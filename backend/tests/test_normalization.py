@@ -0,0 +1,41 @@
+# backend/tests/test_normalization.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.collectors.air_quality import AirQualityCollector
+from backend.collectors.normalization import normalize_batch, normalize_record
+from backend.collectors.water_management import WaterManagementSimulator
+
+
+def test_record_matches_original_formulas():
+    scores = AirQualityCollector().normalize_metrics(
+        {"pm2_5": 10.0, "pm10": 50.0, "no2": None, "european_aqi": 38}
+    )
+
+    assert scores == pytest.approx({"pm2_5": 75.0, "pm10": 0.0, "overall": 37.5})
+
+
+def test_batch_on_dataframe_matches_per_record_scores():
+    frame = pd.DataFrame(
+        {
+            "consumption": [95.0, 130.0, 260.0],
+            "ili": [0.8, 2.5, np.nan],
+            "treatment_compliance": [100.0, 75.0, 40.0],
+        }
+    )
+
+    batch = normalize_batch("water", frame)
+
+    simulator = WaterManagementSimulator()
+    for i, row in enumerate(frame.to_dict("records")):
+        row = {name: value for name, value in row.items() if not np.isnan(value)}
+        expected = simulator.normalize_metrics(row)
+        assert batch.iloc[i].dropna().to_dict() == pytest.approx(expected)
+
+
+def test_missing_columns_are_left_out():
+    scores = normalize_record("noise", {"lden_exposed_pct": 20.0})
+
+    assert scores == {"lden_exposed_pct": 50.0, "overall": 50.0}
+    assert normalize_record("noise", {}) == {}
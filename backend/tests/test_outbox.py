@@ -0,0 +1,208 @@
+# backend/tests/test_outbox.py
+import sqlite3
+
+import pytest
+
+from backend.storage.factory import get_storage_backend
+from backend.storage.outbox import (
+    CircuitBreaker,
+    Outbox,
+    OutboxStorage,
+    is_permanent_error,
+)
+from backend.storage.sqlite_backend import SQLiteStorage, main
+
+SCORES = {"air": 80.0, "water": 75.0, "nature": 65.0, "waste": 70.0, "noise": 60.0}
+
+RAW_ROWS = [
+    {
+        "dimension": "air",
+        "metric_name": "pm10",
+        "value": 12.0,
+        "unit": "μg/m³",
+        "source": "API",
+        "collection_timestamp": "2025-05-01T02:00:00",
+    },
+    {
+        "dimension": "noise",
+        "metric_name": "lden_exposed_pct",
+        "value": 18.0,
+        "unit": "%",
+        "source": "Simulated",
+        "collection_timestamp": "2025-05-01T02:00:00",
+    },
+]
+
+
+class FlakyStorage(SQLiteStorage):
+    """SQLite backend whose index writes fail while down is set"""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.down = False
+        self.calls = 0
+
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("database unreachable")
+        return super().store_indexes_bulk(indexes, chunk_size)
+
+
+def test_writes_are_queued_then_delivered_in_one_batch():
+    backend = SQLiteStorage(":memory:")
+    storage = OutboxStorage(backend, Outbox(":memory:"), autostart=False)
+
+    storage.store_index("2025-05-01", 70.0, SCORES, 70.0)
+    storage.store_index("2025-05-02", 71.0, SCORES, 70.0)
+    report = storage.store_raw_metrics_bulk(RAW_ROWS)
+
+    assert report == {"stored": 2, "failed": []}
+    assert storage.outbox.counts() == {"pending": 3, "dead": 0}
+    assert backend.get_latest_index() is None
+
+    assert storage.flush(timeout=5)
+    assert [row["date"] for row in backend.get_indexes()] == [
+        "2025-05-01",
+        "2025-05-02",
+    ]
+    count = backend.conn.execute("SELECT COUNT(*) FROM raw_metrics").fetchone()[0]
+    assert count == 2
+
+
+def test_replayed_writes_are_idempotent():
+    backend = SQLiteStorage(":memory:")
+    storage = OutboxStorage(backend, Outbox(":memory:"), autostart=False)
+
+    for _ in range(2):
+        storage.store_raw_metrics_bulk(RAW_ROWS)
+        storage.store_normalized_score("air", "pm10", 12.0, 80, "linear", "2025-05-01")
+    assert storage.flush(timeout=5)
+
+    counts = {
+        table: backend.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ["raw_metrics", "normalized_scores"]
+    }
+    assert counts == {"raw_metrics": 2, "normalized_scores": 1}
+
+
+def test_duplicates_must_be_removed_before_idempotent_writes(tmp_path):
+    path = str(tmp_path / "agci.sqlite")
+    backend = SQLiteStorage(path)
+    # Without the outbox scores are plain inserts
+    for _ in range(2):
+        backend.store_normalized_score("air", "pm10", 12.0, 80, "linear", "2025-05-01")
+
+    with pytest.raises(RuntimeError, match="--dedupe"):
+        OutboxStorage(backend, Outbox(":memory:"), autostart=False)
+
+    assert main([path, "--dedupe"]) == 0
+    storage = OutboxStorage(backend, Outbox(":memory:"), autostart=False)
+    storage.store_normalized_score("air", "pm10", 12.0, 90, "linear", "2025-05-01")
+    assert storage.flush(timeout=5)
+    assert [row["normalized_score"] for row in backend.get_normalized_scores()] == [
+        90.0
+    ]
+
+
+def test_outage_backs_off_opens_the_breaker_and_survives_restarts(tmp_path):
+    path = str(tmp_path / "outbox.sqlite")
+    backend = FlakyStorage()
+    backend.down = True
+    storage = OutboxStorage(
+        backend,
+        Outbox(path),
+        base_delay=0,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        autostart=False,
+    )
+    for day in range(1, 4):
+        storage.store_index(f"2025-05-0{day}", 70.0 + day, SCORES, 70.0)
+
+    assert not storage.flush(timeout=0.2)
+    # One merged batch plus one single entry, then the breaker is open
+    assert backend.calls == 2
+    assert storage.breaker.state == "open"
+    storage.outbox.close()
+
+    # A later run picks the queued writes up from disk
+    backend.down = False
+    storage = OutboxStorage(backend, Outbox(path), autostart=False)
+    assert storage.outbox.counts()["pending"] == 3
+    assert storage.close(timeout=5)
+    assert [row["overall_score"] for row in backend.get_indexes()] == [
+        71.0,
+        72.0,
+        73.0,
+    ]
+
+
+def test_failing_entry_is_given_up_after_max_attempts():
+    storage = OutboxStorage(
+        SQLiteStorage(":memory:"),
+        Outbox(":memory:"),
+        base_delay=0,
+        max_attempts=2,
+        breaker=CircuitBreaker(failure_threshold=100),
+        autostart=False,
+    )
+    # Missing dimension scores can never be stored
+    storage.store_indexes_bulk([{"date": "2025-05-01", "overall_score": 70.0}])
+
+    assert storage.flush(timeout=5)
+    assert storage.outbox.counts() == {"pending": 0, "dead": 1}
+
+
+class RejectingStorage(SQLiteStorage):
+    """SQLite backend rejecting one date with a constraint violation"""
+
+    def __init__(self, rejected):
+        super().__init__(":memory:")
+        self.rejected = rejected
+        self.calls = 0
+
+    def store_indexes_bulk(self, indexes, chunk_size=None):
+        self.calls += 1
+        if any(index["date"] == self.rejected for index in indexes):
+            raise sqlite3.IntegrityError("CHECK constraint failed: overall_score")
+        return super().store_indexes_bulk(indexes, chunk_size)
+
+
+def test_permanent_errors_are_given_up_at_once_without_opening_the_breaker():
+    backend = RejectingStorage("2025-05-02")
+    storage = OutboxStorage(
+        backend,
+        Outbox(":memory:"),
+        breaker=CircuitBreaker(failure_threshold=1),
+        autostart=False,
+    )
+    for day in range(1, 4):
+        storage.store_index(f"2025-05-0{day}", 70.0 + day, SCORES, 70.0)
+
+    assert storage.flush(timeout=5)
+    # The merged batch, then each entry once
+    assert backend.calls == 4
+    assert storage.outbox.counts() == {"pending": 0, "dead": 1}
+    assert storage.breaker.state == "closed"
+    assert [row["date"] for row in backend.get_indexes()] == [
+        "2025-05-01",
+        "2025-05-03",
+    ]
+
+    assert is_permanent_error("{'message': 'duplicate key', 'code': '23505'}")
+    assert is_permanent_error("ON CONFLICT clause does not match any PRIMARY KEY")
+    assert not is_permanent_error("{'message': 'Injected failure', 'code': 'PGRST000'}")
+    assert not is_permanent_error(ConnectionError("database unreachable"))
+
+
+def test_background_thread_delivers_and_factory_wraps(tmp_path, monkeypatch):
+    monkeypatch.setenv("AGCI_SQLITE_PATH", str(tmp_path / "agci.sqlite"))
+    monkeypatch.setenv("AGCI_OUTBOX_PATH", str(tmp_path / "outbox.sqlite"))
+
+    storage = get_storage_backend("sqlite", cache_ttl=0)
+    assert isinstance(storage, OutboxStorage)
+    storage.interval = 0.01
+
+    storage.store_index("2025-05-01", 70.0, SCORES, 70.0)
+    assert storage.close(timeout=5)
+    assert storage.backend.get_latest_index()["date"] == "2025-05-01"
@@ -0,0 +1,83 @@
+# backend/tests/test_read_cache.py
+from backend.storage.factory import get_storage_backend
+from backend.storage.read_cache import CachedStorage, ReadCache
+from backend.storage.sqlite_backend import SQLiteStorage
+
+SCORES = {"air": 80.0, "water": 75.0, "nature": 65.0, "waste": 70.0, "noise": 60.0}
+
+
+class CountingStorage(SQLiteStorage):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.reads = 0
+
+    def get_historical_index(self, days=30):
+        self.reads += 1
+        return super().get_historical_index(days)
+
+
+def test_reads_are_cached_until_a_new_index_is_stored():
+    backend = CountingStorage()
+    storage = CachedStorage(backend, ReadCache(ttl=60))
+    storage.store_index("2025-05-01", 70.0, SCORES, 70.0)
+
+    for _ in range(3):
+        assert storage.get_latest_index()["date"] == "2025-05-01"
+    assert backend.reads == 1
+
+    storage.store_index("2025-05-02", 71.0, SCORES, 70.0)
+
+    assert storage.get_latest_index()["date"] == "2025-05-02"
+    assert backend.reads == 2
+
+
+def test_expired_and_evicted_entries_are_reloaded():
+    cache = ReadCache(ttl=0, max_entries=1)
+    cache.set("a", [1])
+    assert cache.get("a") is None
+
+    cache = ReadCache(ttl=60, max_entries=1)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    assert cache.get("a") is None
+    assert cache.get("b") == [2]
+
+
+def test_shared_cache_is_reused_and_invalidated_across_instances(tmp_path):
+    path = str(tmp_path / "reads.sqlite")
+    writer = ReadCache(ttl=60, shared_path=path)
+    reader = ReadCache(ttl=60, shared_path=path)
+
+    writer.set("latest_index", {"date": "2025-05-01"})
+    assert reader.get("latest_index") == {"date": "2025-05-01"}
+
+    writer.invalidate()
+    assert reader.get("latest_index") is None
+
+
+def test_factory_wraps_backend_when_ttl_is_configured(tmp_path, monkeypatch):
+    monkeypatch.setenv("AGCI_SQLITE_PATH", str(tmp_path / "agci.sqlite"))
+    monkeypatch.setenv("AGCI_READ_CACHE_TTL", "300")
+
+    storage = get_storage_backend("sqlite")
+
+    assert isinstance(storage, CachedStorage)
+    assert storage.cache.ttl == 300
+    assert storage.path == str(tmp_path / "agci.sqlite")
+
+
+def test_cache_is_invalidated_when_the_outbox_delivers(tmp_path, monkeypatch):
+    monkeypatch.setenv("AGCI_SQLITE_PATH", str(tmp_path / "agci.sqlite"))
+    monkeypatch.setenv("AGCI_OUTBOX_PATH", str(tmp_path / "outbox.sqlite"))
+    storage = get_storage_backend("sqlite", cache_ttl=300)
+    storage.backend.stop()
+
+    storage.store_index("2025-05-01", 70.0, SCORES, 70.0)
+    assert storage.backend.flush(timeout=5)
+    storage.store_index("2025-05-02", 71.0, SCORES, 70.0)
+    # Read while the second write is still queued
+    assert storage.get_latest_index()["date"] == "2025-05-01"
+
+    assert storage.backend.flush(timeout=5)
+    assert storage.get_latest_index()["date"] == "2025-05-02"
+    storage.close()
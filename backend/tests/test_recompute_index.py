@@ -0,0 +1,59 @@
+# backend/tests/test_recompute_index.py
+from backend.pipeline.green_city_index import GreenCityIndex
+from backend.pipeline.recompute_index import recompute_index
+from backend.pipeline.scoring_config import ScoringConfig
+from backend.storage.sqlite_backend import SQLiteStorage
+
+RAW_DATA = {
+    "air": {"pm10": 20.0, "pm2_5": 10.0, "no2": 15.0, "european_aqi": 30},
+    "water": {"consumption": 130.0, "ili": 2.0, "treatment_compliance": 95.0},
+    "nature": {"protected_area_pct": 6.0, "tree_canopy_pct": 18.0},
+    "waste": {"waste_per_capita": 0.45, "recycling_rate": 55.0},
+    "noise": {"lden_exposed_pct": 12.0, "sleep_disturbed_pct": 4.0},
+}
+
+
+def _stored_history(dates):
+    storage = SQLiteStorage(":memory:")
+    gci = GreenCityIndex(storage=storage)
+    for date in dates:
+        gci._store_index(gci.calculator.compute(RAW_DATA, date=date))
+    return storage
+
+
+def test_only_the_changed_dimension_is_rewritten():
+    storage = _stored_history(["2025-05-01", "2025-05-02"])
+    water_before = storage.get_normalized_scores(dimensions=["water"])
+    config = ScoringConfig.from_dict(
+        {
+            "version": "2",
+            "scales": {"air": {"pm2_5": [5.0, 15.0, "lower_is_better", 1.0]}},
+        }
+    )
+
+    report = recompute_index(storage, config)
+
+    assert report["dimensions"] == ["air"]
+    assert report["normalized_scores"] == 2
+    assert report["indexes"] == 2
+    expected = GreenCityIndex(scoring_config=config).calculator.compute(RAW_DATA)
+    latest = storage.get_latest_index()
+    assert latest["air_score"] == expected["dimension_scores"]["air"]
+    assert latest["overall_score"] == expected["overall_score"]
+    assert storage.get_normalized_scores(dimensions=["water"]) == water_before
+
+    # Running it again finds nothing left to change
+    again = recompute_index(storage, config)
+    assert (again["normalized_scores"], again["indexes"]) == (0, 0)
+
+
+def test_weight_change_only_reweights_the_overall_score():
+    storage = _stored_history(["2025-05-01"])
+    weights = {"air": 0.4, "water": 0.15, "nature": 0.15, "waste": 0.15, "noise": 0.15}
+
+    report = recompute_index(storage, ScoringConfig("2", weights), dry_run=True)
+
+    assert report["dimensions"] == []
+    assert report["reweighted"]
+    assert report["normalized_scores"] == 0
+    assert report["indexes"] == 1
@@ -0,0 +1,55 @@
+# backend/tests/test_rollups.py
+import pytest
+
+from backend.storage.rollups import period_bounds
+from backend.storage.sqlite_backend import SQLiteStorage
+
+
+def _index(date, overall):
+    scores = {"air": overall, "water": 70.0, "nature": 70.0, "waste": 70.0}
+    return {
+        "date": date,
+        "overall_score": overall,
+        "dimension_scores": dict(scores, noise=70.0),
+        "target_score": 70.0,
+    }
+
+
+def test_period_bounds():
+    assert period_bounds("2025-05-08", "week") == ("2025-05-05", "2025-05-11")
+    assert period_bounds("2024-02-10", "month") == ("2024-02-01", "2024-02-29")
+    with pytest.raises(ValueError):
+        period_bounds("2025-05-08", "year")
+
+
+def test_rollups_are_kept_current_on_every_index_write():
+    storage = SQLiteStorage(":memory:")
+    storage.store_indexes_bulk(
+        [_index(f"2025-05-{day:02d}", 60.0 + day) for day in range(1, 11)]
+    )
+
+    (month,) = storage.get_rollups("month", metrics=["overall"])
+    assert month == {
+        "period": "month",
+        "period_start": "2025-05-01",
+        "period_end": "2025-05-31",
+        "metric": "overall",
+        "count": 10,
+        "mean": 65.5,
+        "min": 61.0,
+        "max": 70.0,
+        "p25": 63.25,
+        "p50": 65.5,
+        "p75": 67.75,
+    }
+
+    storage.store_index("2025-05-12", 80.0, _index("", 80.0)["dimension_scores"], 70)
+
+    weeks = storage.get_rollups("week", start="2025-05-05", metrics=["air"])
+    assert [(week["period_start"], week["count"]) for week in weeks] == [
+        ("2025-05-05", 6),
+        ("2025-05-12", 1),
+    ]
+    (month,) = storage.get_rollups("month", metrics=["overall"])
+    assert (month["count"], month["max"]) == (11, 80.0)
+    assert len(storage.get_rollups("month")) == 6
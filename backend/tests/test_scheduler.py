@@ -0,0 +1,159 @@
+# backend/tests/test_scheduler.py
+import threading
+
+import pytest
+
+from backend.pipeline.green_city_index import GreenCityIndex
+from backend.pipeline.instrumentation import Instrumentation
+from backend.pipeline.scheduler import (
+    CollectionScheduler,
+    SchedulerLock,
+    parse_interval,
+    parse_intervals,
+)
+from backend.storage.history_store import PartitionedHistoryStore
+from backend.storage.sqlite_backend import SQLiteStorage
+
+
+def make_gci():
+    gci = GreenCityIndex(
+        storage=SQLiteStorage(":memory:"), concurrent=False, write_behind=True
+    )
+    readings = iter(range(10, 100))
+    gci.air_collector.fetch_current_data = lambda: {"pm10": float(next(readings))}
+    return gci
+
+
+def test_intervals_are_parsed_over_the_defaults():
+    assert parse_interval("90") == 90
+    assert parse_interval("30m") == 1800
+    assert parse_interval("7d") == 7 * 86400
+
+    intervals = parse_intervals("air=15m, nature=14d")
+    assert intervals["air"] == 900
+    assert intervals["nature"] == 14 * 86400
+    assert intervals["water"] == 86400
+    with pytest.raises(ValueError):
+        parse_intervals(["soil=1h"])
+
+
+def test_dimensions_run_on_their_own_intervals_with_snapshots(tmp_path):
+    gci = make_gci()
+    history = PartitionedHistoryStore(str(tmp_path / "history"))
+    scheduler = CollectionScheduler(
+        gci,
+        intervals={"air": 60, "water": 600, "nature": 600, "waste": 600, "noise": 600},
+        snapshot_interval=120,
+        jitter=0,
+        history=history,
+    )
+
+    first = scheduler.run_pending(now=0)
+    assert sorted(first["collected"]) == ["air", "nature", "noise", "waste", "water"]
+    assert first["snapshot"] is not None
+
+    # Air is due again, but the next snapshot waits for the snapshot interval
+    second = scheduler.run_pending(now=60)
+    assert second == {"collected": ["air"], "snapshot": None}
+    assert scheduler.latest["air"] == {"pm10": 11.0}
+
+    third = scheduler.run_pending(now=120)
+    assert third["collected"] == ["air"]
+    assert third["snapshot"]["raw_data"]["air"] == {"pm10": 12.0}
+    assert third["snapshot"]["raw_data"]["nature"] == scheduler.latest["nature"]
+
+    # Every snapshot replaces today's index and is kept in the history
+    stored = gci.storage.get_latest_index()
+    assert stored["overall_score"] == third["snapshot"]["overall_score"]
+    assert len(history.read()) == 1
+    assert scheduler.seconds_until_next(now=120) == 60
+
+    # A failed collection is retried sooner than its interval
+    gci.nature_simulator.get_current_data = lambda: {}
+    scheduler.retry_interval = 30
+    nature = scheduler.latest["nature"]
+    assert "nature" in scheduler.run_pending(now=600)["collected"]
+    assert scheduler.latest["nature"] == nature
+    assert scheduler.next_run["nature"] == 630
+    gci.close()
+
+
+def test_no_snapshot_until_every_dimension_has_data(tmp_path):
+    gci = make_gci()
+    history = PartitionedHistoryStore(str(tmp_path / "history"))
+    scheduler = CollectionScheduler(gci, jitter=0, retry_interval=30, history=history)
+    noise = gci.noise_simulator.get_current_data
+
+    def broken():
+        raise RuntimeError("sensor offline")
+
+    gci.noise_simulator.get_current_data = broken
+    first = scheduler.run_pending(now=0)
+    assert first["snapshot"] is None
+    assert scheduler.missing_dimensions() == ["noise"]
+    assert scheduler.seconds_until_next(now=0) == 30
+
+    gci.noise_simulator.get_current_data = noise
+    retry = scheduler.run_pending(now=30)
+    assert retry["collected"] == ["noise"]
+    assert retry["snapshot"]["partial"] is False
+    gci.close()
+
+    assert gci.storage.get_latest_index()["date"] == retry["snapshot"]["date"]
+    assert len(history.read()) == 1
+
+
+def test_run_stops_gracefully_and_lock_prevents_overlap(tmp_path):
+    lock = SchedulerLock(str(tmp_path / "scheduler.lock"))
+    assert lock.acquire()
+    assert not SchedulerLock(str(tmp_path / "scheduler.lock")).acquire()
+
+    gci = make_gci()
+    scheduler = CollectionScheduler(gci, jitter=0)
+    thread = threading.Thread(target=scheduler.run)
+    thread.start()
+    while scheduler.last_index is None and thread.is_alive():
+        thread.join(0.01)
+
+    scheduler.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert gci.storage.get_latest_index() is not None
+
+    gci.close()
+    lock.release()
+    assert SchedulerLock(str(tmp_path / "scheduler.lock")).acquire()
+
+
+def test_prometheus_textfile_reports_failed_runs(tmp_path):
+    gci = make_gci()
+    path = tmp_path / "agci.prom"
+    scheduler = CollectionScheduler(
+        gci,
+        jitter=0,
+        instrumentation=Instrumentation("scheduler"),
+        prometheus_path=str(path),
+    )
+
+    scheduler.run_pending(now=0)
+    assert 'agci_run_success{run="scheduler"} 1' in path.read_text()
+
+    scheduler.failures += 1
+    scheduler.run_pending(now=1)
+    assert 'agci_run_success{run="scheduler"} 0' in path.read_text()
+    gci.close()
+
+
+def test_snapshots_replace_todays_normalized_scores():
+    gci = make_gci()
+    scheduler = CollectionScheduler(gci, jitter=0, snapshot_interval=60)
+
+    counts = []
+    for now in [0, 60, 120]:
+        scheduler.pending_snapshot = True
+        assert scheduler.run_pending(now=now)["snapshot"] is not None
+        counts.append(len(gci.storage.get_normalized_scores()))
+
+    assert counts[0] > 0
+    assert counts == [counts[0]] * 3
+    gci.close()
@@ -0,0 +1,58 @@
+# backend/tests/test_sqlite_backend.py
+from backend.pipeline.green_city_index import GreenCityIndex
+from backend.storage.factory import get_storage_backend
+from backend.storage.sqlite_backend import SQLiteStorage
+
+
+def test_pipeline_runs_against_sqlite():
+    storage = SQLiteStorage(":memory:")
+    gci = GreenCityIndex(storage=storage)
+    gci.air_collector.fetch_current_data = lambda: {
+        "pm10": 10.0,
+        "pm2_5": 5.0,
+        "no2": 8.0,
+        "european_aqi": 30,
+    }
+
+    index = gci.calculate_index(gci.collect_all_data())
+
+    latest = storage.get_latest_index()
+    assert latest["date"] == index["date"]
+    assert latest["overall_score"] == index["overall_score"]
+    raw_count = storage.conn.execute("SELECT COUNT(*) FROM raw_metrics").fetchone()[0]
+    assert raw_count == 17
+
+
+def test_index_writes_are_upserts():
+    storage = SQLiteStorage(":memory:")
+    scores = {"air": 80.0, "water": 75.0, "nature": 65.0, "waste": 70.0, "noise": 60.0}
+
+    assert storage.store_index("2025-05-05", 70.0, scores, 70.0)
+    assert storage.store_index("2025-05-05", 72.0, dict(scores, air=90.0), 70.0)
+
+    assert storage.get_historical_index() == [
+        {
+            "date": "2025-05-05",
+            "overall_score": 72.0,
+            "air_score": 90.0,
+            "water_score": 75.0,
+            "nature_score": 65.0,
+            "waste_score": 70.0,
+            "noise_score": 60.0,
+            "target_score": 70.0,
+        }
+    ]
+    air = storage.conn.execute(
+        "SELECT score FROM dimension_scores WHERE dimension = 'air'"
+    ).fetchall()
+    assert [row[0] for row in air] == [90.0]
+
+
+def test_backend_is_selected_by_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("AGCI_STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("AGCI_SQLITE_PATH", str(tmp_path / "agci.sqlite"))
+
+    storage = get_storage_backend()
+
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.path == str(tmp_path / "agci.sqlite")
@@ -0,0 +1,92 @@
+# backend/tests/test_write_behind.py
+import threading
+import time
+
+from backend.pipeline.green_city_index import GreenCityIndex
+from backend.pipeline.write_behind import WriteBehindWriter
+from backend.storage.sqlite_backend import SQLiteStorage
+
+
+class GatedStorage(SQLiteStorage):
+    """SQLite backend whose bulk raw metric writes wait for a gate"""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.batches = []
+
+    def store_raw_metrics_bulk(self, rows, chunk_size=None):
+        self.entered.set()
+        self.gate.wait(5)
+        self.batches.append(len(rows))
+        return super().store_raw_metrics_bulk(rows, chunk_size)
+
+
+def raw_row(name, value):
+    return {
+        "dimension": "air",
+        "metric_name": name,
+        "value": value,
+        "unit": "μg/m³",
+        "source": "API",
+    }
+
+
+def test_scoring_does_not_wait_for_storage_until_flush():
+    storage = GatedStorage()
+    gci = GreenCityIndex(storage=storage, concurrent=False, write_behind=True)
+    gci.air_collector.fetch_current_data = lambda: {"pm10": 10.0, "pm2_5": 5.0}
+
+    # Storage is blocked, yet collection and scoring complete
+    index = gci.calculate_index(gci.collect_all_data())
+    assert storage.batches == []
+    assert storage.get_latest_index() is None
+
+    storage.gate.set()
+    report = gci.close(timeout=5)
+
+    assert report["failed"] == [] and report["pending"] == 0
+    assert storage.get_latest_index()["date"] == index["date"]
+    assert len(storage.get_normalized_scores()) > 0
+
+
+def test_queued_bulk_writes_are_coalesced_and_failures_reported():
+    storage = GatedStorage()
+    # Upserts, as behind the outbox, would collapse rows sharing a timestamp
+    storage.enable_idempotent_writes()
+    writer = WriteBehindWriter(storage, batch_size=3)
+
+    writer.submit("store_raw_metrics_bulk", [raw_row("pm10", 1.0)])
+    assert storage.entered.wait(5)
+    for value in range(4):
+        writer.submit("store_raw_metrics_bulk", [raw_row("no2", float(value))])
+    writer.submit("store_index", [{"date": "2025-05-01"}])
+    storage.gate.set()
+    report = writer.close(timeout=5)
+
+    # The first write runs alone, the next ones are merged up to batch_size
+    assert storage.batches == [1, 3, 1]
+    assert report["stored"] == 5
+    count = storage.conn.execute("SELECT COUNT(*) FROM raw_metrics").fetchone()[0]
+    assert count == 5
+    assert [failed["method"] for failed in report["failed"]] == ["store_index"]
+
+
+def test_close_returns_within_its_timeout_when_the_queue_is_full():
+    storage = GatedStorage()
+    writer = WriteBehindWriter(storage, max_queue=1)
+    writer.submit("store_raw_metrics_bulk", [raw_row("pm10", 1.0)])
+    assert storage.entered.wait(5)
+    writer.submit("store_raw_metrics_bulk", [raw_row("pm10", 2.0)])
+
+    started = time.monotonic()
+    report = writer.close(timeout=0.2)
+
+    assert time.monotonic() - started < 1
+    assert report["pending"] == 2
+    # The thread stops after the write in progress, the queued one is dropped
+    storage.gate.set()
+    writer._thread.join(5)
+    assert not writer._thread.is_alive()
+    assert storage.batches == [1]